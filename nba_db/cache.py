@@ -0,0 +1,236 @@
+"""persistent on-disk cache of stats.nba.com responses
+"""
+# -- Imports --------------------------------------------------------------------------
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+CACHE_DIR = os.environ.get(
+    "NBA_DB_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "nba_db")
+)
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# time to live in seconds per endpoint, None means the response never expires
+ENDPOINT_TTLS = {
+    "boxscoresummaryv2": None,  # see _game_ttl
+    "playbyplayv2": None,  # see _game_ttl
+    "commonplayerinfo": 7 * DAY,
+    "teamdetails": 7 * DAY,
+    "teaminfocommon": DAY,
+    "leaguegamelog": None,  # see _season_ttl
+    "draftcombinestats": None,  # see _season_ttl
+    "drafthistory": None,  # see _season_ttl
+}
+DEFAULT_TTL = DAY
+CURRENT_SEASON_TTL = 6 * HOUR
+# games that are not final (yet) or answered without rows
+UNFINISHED_GAME_TTL = HOUR
+FINAL_GAME_STATUS = 3
+END_OF_PERIOD = 13  # EVENTMSGTYPE of the event ending a period
+
+
+# -- Functions -----------------------------------------------------------------------
+def normalize_params(params: Dict[str, Any]) -> Dict[str, str]:
+    """normalizes request parameters so equivalent requests share a cache key
+
+    Args:
+        params (Dict[str, Any]): request parameters
+
+    Returns:
+        Dict[str, str]: parameters sorted by key with values as strings ('' for None)
+    """
+    return {
+        str(key): "" if value is None else str(value)
+        for key, value in sorted(params.items(), key=lambda kv: str(kv[0]))
+    }
+
+
+def cache_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """computes the content address of a request
+
+    Args:
+        endpoint (str): endpoint name, e.g. ``playbyplayv2``
+        params (Dict[str, Any]): request parameters
+
+    Returns:
+        str: sha256 hex digest of the endpoint and normalized parameters
+    """
+    raw = json.dumps([endpoint.lower(), normalize_params(params)], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def current_season_start_year(today: Optional[datetime] = None) -> int:
+    """returns the calendar year in which the current NBA season started
+
+    Args:
+        today (datetime, optional): reference date. Defaults to now.
+
+    Returns:
+        int: e.g. 2023 for the 2023-24 season
+    """
+    today = today or datetime.now()
+    return today.year if today.month >= 9 else today.year - 1
+
+
+def _season_ttl(params: Dict[str, str]) -> Optional[float]:
+    # requests by date window always cover the current season
+    if params.get("DateFrom") or params.get("DateTo"):
+        return CURRENT_SEASON_TTL
+    season = params.get("Season") or params.get("SeasonYear") or ""
+    try:
+        start_year = int(season[:4])
+    except ValueError:
+        return CURRENT_SEASON_TTL
+    if start_year >= current_season_start_year():
+        return CURRENT_SEASON_TTL
+    return None
+
+
+def _result_set(contents: str, name: str) -> List[Dict[str, Any]]:
+    # rows of a result set of a response as dicts, empty if it is missing
+    for result_set in json.loads(contents).get("resultSets", []):
+        if result_set.get("name") == name:
+            headers = result_set["headers"]
+            return [dict(zip(headers, row)) for row in result_set["rowSet"]]
+    return []
+
+
+def is_final_game(endpoint: str, contents: str) -> bool:
+    """checks whether a box score or play by play response covers a final game
+
+    A box score is final once its game summary has the final game status. A
+    play by play is final once its last event ends the 4th period or an
+    overtime with the score not tied.
+
+    Args:
+        endpoint (str): endpoint name, ``boxscoresummaryv2`` or ``playbyplayv2``
+        contents (str): response text
+
+    Returns:
+        bool: False for games in progress or not started yet, empty responses and responses that cannot be read
+    """
+    try:
+        if endpoint.lower() == "boxscoresummaryv2":
+            summary = _result_set(contents, "GameSummary")
+            return any(
+                str(row.get("GAME_STATUS_ID")) == str(FINAL_GAME_STATUS)
+                for row in summary
+            )
+        events = _result_set(contents, "PlayByPlay")
+        if not events:
+            return False
+        last = events[-1]
+        scores = [event["SCORE"] for event in events if event.get("SCORE")]
+        home, away = scores[-1].split("-") if scores else ("0", "0")
+        return (
+            int(last["EVENTMSGTYPE"]) == END_OF_PERIOD
+            and int(last["PERIOD"]) >= 4
+            and int(home) != int(away)
+        )
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return False
+
+
+def endpoint_ttl(
+    endpoint: str, params: Dict[str, Any], contents: Optional[str] = None
+) -> Optional[float]:
+    """returns the time to live of a response
+
+    Args:
+        endpoint (str): endpoint name
+        params (Dict[str, Any]): request parameters
+        contents (str, optional): response text, box scores and play by play only never expire once their game is final. Defaults to None.
+
+    Returns:
+        Optional[float]: seconds a cached response stays fresh, None if it never expires
+    """
+    endpoint = endpoint.lower()
+    if endpoint in ("leaguegamelog", "draftcombinestats", "drafthistory"):
+        return _season_ttl(normalize_params(params))
+    if endpoint in ("boxscoresummaryv2", "playbyplayv2") and contents is not None:
+        return None if is_final_game(endpoint, contents) else UNFINISHED_GAME_TTL
+    return ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL)
+
+
+# -- Classes -------------------------------------------------------------------------
+class ResponseCache:
+    """SQLite backed store of raw (zlib compressed) endpoint responses
+
+    Responses are keyed by :func:`cache_key` and expire according to
+    :func:`endpoint_ttl`, so box scores and play by play of games that were not
+    final when fetched are requested again. With ``ignore_ttl`` set every stored response is served
+    regardless of age, which lets a rebuild replay a previous crawl offline.
+
+    Args:
+        path (str, optional): path of the cache database. Defaults to ``$NBA_DB_CACHE_DIR/responses.sqlite``.
+        ignore_ttl (bool, optional): serve expired responses too. Defaults to False.
+    """
+
+    def __init__(self, path: Optional[str] = None, ignore_ttl: bool = False):
+        self.path = path or os.path.join(CACHE_DIR, "responses.sqlite")
+        self.ignore_ttl = ignore_ttl
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS response (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                params TEXT NOT NULL,
+                contents BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[str]:
+        """returns the cached response text or None on a miss or expired entry"""
+        key = cache_key(endpoint, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT contents, fetched_at FROM response WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                contents = zlib.decompress(row[0]).decode("utf-8")
+                ttl = endpoint_ttl(endpoint, params, contents)
+                if self.ignore_ttl or ttl is None or time.time() - row[1] < ttl:
+                    self.hits += 1
+                    return contents
+            self.misses += 1
+        return None
+
+    def put(self, endpoint: str, params: Dict[str, Any], contents: str) -> None:
+        """stores a response text"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response VALUES (?, ?, ?, ?, ?)",
+                (
+                    cache_key(endpoint, params),
+                    endpoint.lower(),
+                    json.dumps(normalize_params(params)),
+                    zlib.compress(contents.encode("utf-8")),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """closes the cache database"""
+        with self._lock:
+            self._conn.close()
+        logger.info(f"Response cache: {self.hits} hits, {self.misses} misses.")
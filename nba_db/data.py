@@ -333,6 +333,53 @@ class PlayByPlaySchema(SchemaModel):
         coerce = True
 
 
+class PlayByPlayEventSchema(SchemaModel):
+    game_id: Series[String] = pa.Field()
+    eventnum: Series[Int] = pa.Field()
+    eventmsgtype: Series[Int] = pa.Field()
+    eventmsgactiontype: Series[Int] = pa.Field()
+    period: Series[Int] = pa.Field()
+    wctimestring: Series[String] = pa.Field()
+    pctimestring: Series[String] = pa.Field()
+    homedescription: Series[String] = pa.Field(nullable=True)
+    neutraldescription: Series[String] = pa.Field(nullable=True)
+    visitordescription: Series[String] = pa.Field(nullable=True)
+    score: Series[String] = pa.Field(nullable=True)
+    scoremargin: Series[String] = pa.Field(nullable=True)
+    person1type: Series[Float] = pa.Field(nullable=True)
+    player1_id: Series[String] = pa.Field(nullable=True)
+    player1_team_key: Series[Int] = pa.Field(nullable=True)
+    person2type: Series[Float] = pa.Field(nullable=True)
+    player2_id: Series[String] = pa.Field(nullable=True)
+    player2_team_key: Series[Int] = pa.Field(nullable=True)
+    person3type: Series[Float] = pa.Field(nullable=True)
+    player3_id: Series[String] = pa.Field(nullable=True)
+    player3_team_key: Series[Int] = pa.Field(nullable=True)
+    video_available_flag: Series[String] = pa.Field()
+
+    class Config:
+        coerce = True
+
+
+class PlayByPlayPlayerSchema(SchemaModel):
+    player_id: Series[String] = pa.Field()
+    player_name: Series[String] = pa.Field()
+
+    class Config:
+        coerce = True
+
+
+class PlayByPlayTeamSchema(SchemaModel):
+    team_key: Series[Int] = pa.Field()
+    team_id: Series[String] = pa.Field(nullable=True)
+    team_city: Series[String] = pa.Field(nullable=True)
+    team_nickname: Series[String] = pa.Field(nullable=True)
+    team_abbreviation: Series[String] = pa.Field(nullable=True)
+
+    class Config:
+        coerce = True
+
+
 class DraftCombineStatsSchema(SchemaModel):
     season: Series[String] = pa.Field()
     player_id: Series[String] = pa.Field()
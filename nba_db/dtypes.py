@@ -0,0 +1,123 @@
+"""compact storage dtypes of extracted frames
+"""
+# -- Imports --------------------------------------------------------------------------
+from functools import lru_cache
+from typing import List, NamedTuple, Type
+
+import numpy as np
+import pandas as pd
+from pandera import SchemaModel
+from pandera.engines.numpy_engine import Object
+from pandera.engines.pandas_engine import NpString
+
+# -- Constants ------------------------------------------------------------------------
+CATEGORY_RATIO = 0.5  # largest share of distinct values of a column stored as category
+# float columns that hold measurements or rates rather than counts
+FLOAT_MARKERS = (
+    "pct",
+    "_pg",
+    "height",
+    "wingspan",
+    "reach",
+    "leap",
+    "agility",
+    "sprint",
+)
+NULLABLE_INTS = ("Int8", "Int16", "Int32", "Int64")
+
+
+# -- Classes -------------------------------------------------------------------------
+class StoragePlan(NamedTuple):
+    """compact in-memory dtypes of the columns of a data schema
+
+    Args:
+        categories (List[str]): string columns stored as category when their values repeat
+        integers (List[str]): integer columns downcast to the smallest integer dtype
+        counts (List[str]): float columns stored as nullable integers when all values are whole
+    """
+
+    categories: List[str]
+    integers: List[str]
+    counts: List[str]
+
+
+# -- Functions -----------------------------------------------------------------------
+@lru_cache(maxsize=None)
+def storage_plan(schema: Type[SchemaModel]) -> StoragePlan:
+    """compiles the storage plan of a data schema
+
+    Args:
+        schema (Type[SchemaModel]): data schema
+
+    Returns:
+        StoragePlan: storage plan of the schema
+    """
+    categories, integers, counts = [], [], []
+    for name, column in schema.to_schema().columns.items():
+        dtype = column.dtype
+        if isinstance(dtype, Object):
+            continue
+        if isinstance(dtype, NpString):
+            categories.append(name)
+        elif pd.api.types.is_integer_dtype(str(dtype)):
+            integers.append(name)
+        elif pd.api.types.is_float_dtype(str(dtype)):
+            if not any(marker in name for marker in FLOAT_MARKERS):
+                counts.append(name)
+    return StoragePlan(categories, integers, counts)
+
+
+def _nullable_int(series: pd.Series) -> str:
+    # smallest nullable integer dtype that holds every value of the series
+    values = series.dropna()
+    if values.empty:
+        return NULLABLE_INTS[0]
+    low, high = values.min(), values.max()
+    for dtype in NULLABLE_INTS:
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return dtype
+    return NULLABLE_INTS[-1]
+
+
+def to_storage_dtypes(schema: Type[SchemaModel], df: pd.DataFrame) -> pd.DataFrame:
+    """converts a validated frame to the compact dtypes of its storage plan
+
+    String columns whose values repeat (ids, abbreviations, team names on
+    every play by play row) become categoricals, integer columns are downcast
+    to int8, int16 or int32 and float columns holding whole counts become
+    nullable integers. The values are unchanged, so the frame is written to
+    the database exactly as before. Columns missing from the frame or not
+    fitting the plan are left alone.
+
+    Args:
+        schema (Type[SchemaModel]): data schema the frame was validated against
+        df (pd.DataFrame): validated frame
+
+    Returns:
+        pd.DataFrame: frame with compact dtypes
+    """
+    plan = storage_plan(schema)
+    columns = {}
+    for name in plan.categories:
+        if name not in df.columns or isinstance(df[name].dtype, pd.CategoricalDtype):
+            continue
+        series = df[name]
+        if series.nunique(dropna=True) <= CATEGORY_RATIO * len(series):
+            columns[name] = series.astype("category")
+    for name in plan.integers:
+        if name in df.columns and pd.api.types.is_integer_dtype(df[name]):
+            columns[name] = pd.to_numeric(df[name], downcast="integer")
+    for name in plan.counts:
+        if name not in df.columns or not pd.api.types.is_float_dtype(df[name]):
+            continue
+        series = df[name]
+        values = series.dropna().to_numpy()
+        if np.isfinite(values).all() and (values == np.round(values)).all():
+            columns[name] = series.astype(_nullable_int(series))
+    if not columns:
+        return df
+    df = df.copy()
+    for name, series in columns.items():
+        df[name] = series
+    return df
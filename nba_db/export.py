@@ -0,0 +1,482 @@
+"""chunked export of database tables to csv and parquet files
+"""
+# -- Imports --------------------------------------------------------------------------
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from nba_db.ledger import LEDGER_TABLE
+from nba_db.logger import worker_logging
+from nba_db.schema import (
+    CHANGES_TABLE,
+    PLAY_BY_PLAY_TABLES,
+    PLAY_BY_PLAY_VIEW,
+    get_generation,
+    play_by_play_select_sql,
+)
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+CSV_DIR = "nba-db/csv"
+PARQUET_DIR = "nba-db/parquet"
+PARQUET_COMPRESSION = "zstd"
+EXPORT_WORKERS = min(4, os.cpu_count() or 1)
+SEASON_COLUMNS = ("season_id", "season", "season_year")
+EXPORT_STATE_TABLE = "export_state"
+EXPORT_CHUNK_SIZE = 100_000  # rows read from the database at a time
+INTERNAL_TABLES = (LEDGER_TABLE, EXPORT_STATE_TABLE, CHANGES_TABLE)
+STATE_COLUMNS = ("max_rowid", "row_count", "columns", "fingerprint", "generation")
+
+
+# -- Functions -----------------------------------------------------------------------
+def ensure_export_state(conn) -> None:
+    """creates the export state table if it does not exist yet
+
+    The state lives in the database itself so that it is published and
+    downloaded together with the csv files it describes.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+    """
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS {EXPORT_STATE_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            max_rowid INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            columns TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            generation INTEGER NOT NULL DEFAULT -1
+        )"""
+    )
+    if "generation" not in _columns(conn, EXPORT_STATE_TABLE):
+        # states recorded before generations were tracked force a full export
+        conn.execute(
+            f"ALTER TABLE {EXPORT_STATE_TABLE} "
+            "ADD COLUMN generation INTEGER NOT NULL DEFAULT -1"
+        )
+    conn.commit()
+
+
+def list_tables(conn) -> List[str]:
+    """returns the data tables of the database, leaving out bookkeeping tables
+
+    The normalized play by play tables are left out as well; play by play is
+    exported in its wide layout from the ``play_by_play`` view, so the
+    published files keep their shape.
+    """
+    hidden = (*INTERNAL_TABLES, *PLAY_BY_PLAY_TABLES)
+    placeholders = ", ".join("?" for _ in hidden)
+    return [
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_schema WHERE (type = 'table' "
+            "OR (type = 'view' AND name = ?)) "
+            f"AND name NOT LIKE 'sqlite_%' AND name NOT IN ({placeholders}) "
+            "ORDER BY name",
+            (PLAY_BY_PLAY_VIEW, *hidden),
+        )
+    ]
+
+
+def _source(table: str) -> Tuple[str, str, str]:
+    # query of the exported rows with their rowid as "__rowid", the rowid
+    # expression to filter on and the table holding the rowids
+    if table == PLAY_BY_PLAY_VIEW:
+        select = play_by_play_select_sql(['e.rowid AS "__rowid"'])
+        return select, "e.rowid", "play_by_play_event"
+    return f'SELECT rowid AS "__rowid", * FROM "{table}"', "rowid", table
+
+
+def _generation(conn, table: str) -> int:
+    if table == PLAY_BY_PLAY_VIEW:
+        # the view changes with every table it joins
+        tables = (PLAY_BY_PLAY_VIEW, *PLAY_BY_PLAY_TABLES)
+        return sum(get_generation(conn, name) for name in tables)
+    return get_generation(conn, table)
+
+
+def _columns(conn, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def _fingerprint(conn, table: str, max_rowid: int) -> str:
+    # hash of the first and the high-water mark row; catches tables rewritten
+    # outside of write_table, which does not record their generation
+    select, rowid, physical = _source(table)
+    digest = hashlib.sha256()
+    for row in conn.execute(
+        f'{select} WHERE {rowid} = (SELECT MIN(rowid) FROM "{physical}") '
+        f"OR {rowid} = ? ORDER BY {rowid}",
+        (max_rowid,),
+    ):
+        digest.update(repr(row[1:]).encode())
+    return digest.hexdigest()
+
+
+def _table_state(conn, table: str, max_rowid: int, row_count: int) -> Dict:
+    return {
+        "max_rowid": max_rowid,
+        "row_count": row_count,
+        "columns": json.dumps(_columns(conn, table)),
+        "fingerprint": _fingerprint(conn, table, max_rowid),
+        "generation": _generation(conn, table),
+    }
+
+
+def get_export_state(conn, table: str) -> Optional[Dict]:
+    """returns the recorded export state of a table, None if it was never exported"""
+    row = conn.execute(
+        f"SELECT {', '.join(STATE_COLUMNS)} FROM {EXPORT_STATE_TABLE} "
+        "WHERE table_name = ?",
+        (table,),
+    ).fetchone()
+    if row is None:
+        return None
+    return dict(zip(STATE_COLUMNS, row))
+
+
+def _save_export_state(conn, table: str, state: Dict) -> None:
+    conn.execute(
+        f"INSERT OR REPLACE INTO {EXPORT_STATE_TABLE} "
+        f"(table_name, {', '.join(STATE_COLUMNS)}) "
+        f"VALUES (?, {', '.join('?' for _ in STATE_COLUMNS)})",
+        (table, *(state[column] for column in STATE_COLUMNS)),
+    )
+    conn.commit()
+
+
+def is_append_only(conn, table: str, state: Optional[Dict], path: str) -> bool:
+    """checks whether a table only grew since its last export
+
+    A table counts as rewritten (and is exported in full) if it was never
+    exported, its csv file is missing, its columns changed, its generation
+    moved (a replace, an upsert updating stored rows, a migration or a
+    deletion, see :func:`nba_db.schema.record_change`), rows up to the
+    high-water mark were deleted or the rows at the high-water mark differ.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        table (str): table name
+        state (Dict, optional): recorded export state
+        path (str): csv file of the table
+
+    Returns:
+        bool: whether appending rows above the high-water mark is sufficient
+    """
+    if state is None or not os.path.isfile(path):
+        return False
+    if state["columns"] != json.dumps(_columns(conn, table)):
+        return False
+    if state["generation"] != _generation(conn, table):
+        return False
+    _, _, physical = _source(table)
+    row_count = conn.execute(
+        f'SELECT COUNT(*) FROM "{physical}" WHERE rowid <= ?', (state["max_rowid"],)
+    ).fetchone()[0]
+    if row_count != state["row_count"]:
+        return False
+    return _fingerprint(conn, table, state["max_rowid"]) == state["fingerprint"]
+
+
+def _export_table_csv(conn, table: str, csv_dir: str, full: bool) -> Tuple[int, Dict]:
+    # writes the csv file and returns the row count with the new export state, which
+    # the caller saves so that workers never write to the database
+    path = os.path.join(csv_dir, f"{table}.csv")
+    state = get_export_state(conn, table)
+    append = not full and is_append_only(conn, table, state, path)
+    start = state["max_rowid"] if append else None
+    query, rowid, _ = _source(table)
+    params = ()
+    if append:
+        query += f" WHERE {rowid} > ?"
+        params = (start,)
+    max_rowid = start or 0
+    written = 0
+    if not append:
+        logger.info(f"Exporting {table} in full...")
+        if os.path.exists(path):
+            os.remove(path)
+    header = not append
+    for chunk in pd.read_sql(
+        query + f" ORDER BY {rowid}", conn, params=params, chunksize=EXPORT_CHUNK_SIZE
+    ):
+        if chunk.empty:
+            continue
+        max_rowid = int(chunk["__rowid"].iloc[-1])
+        chunk = chunk.drop(columns="__rowid")
+        chunk.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+        written += len(chunk)
+    if header:
+        # empty table: still write the header line
+        pd.DataFrame(columns=_columns(conn, table)).to_csv(path, index=False)
+    row_count = (state["row_count"] if append else 0) + written
+    logger.info(f"Exported {written} {'new ' if append else ''}rows of {table}.")
+    return written, _table_state(conn, table, max_rowid, row_count)
+
+
+def export_table(conn, table: str, csv_dir: str = CSV_DIR, full: bool = False) -> int:
+    """exports a table to ``<csv_dir>/<table>.csv``, appending only new rows
+
+    The table is streamed in chunks of ``EXPORT_CHUNK_SIZE`` rows, so memory
+    use does not depend on the size of the table.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        table (str): table name
+        csv_dir (str, optional): output directory. Defaults to CSV_DIR.
+        full (bool, optional): regenerate the csv file even if the table only grew. Defaults to False.
+
+    Returns:
+        int: number of rows written
+    """
+    written, state = _export_table_csv(conn, table, csv_dir, full)
+    _save_export_state(conn, table, state)
+    return written
+
+
+def _database_path(conn) -> str:
+    # file of the main database, empty for in-memory databases
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return path
+    return ""
+
+
+def _run_in_process(db_path: str, func: Callable, table: str, *args) -> Any:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return func(conn, table, *args)
+    finally:
+        conn.close()
+
+
+def _map_tables(
+    conn, func: Callable, tables: List[str], workers: int, *args
+) -> Dict[str, Any]:
+    """applies ``func(conn, table, *args)`` to every table, in parallel if possible
+
+    Independent tables are exported by a process pool in which every worker
+    opens its own read-only connection. Workers are spawned rather than
+    forked, since the exporting process runs threads (log listener, proxy
+    probing, database writer) whose locks a fork could copy while held.
+    In-memory databases, which other processes cannot open, and
+    ``workers=1`` fall back to a sequential export.
+    """
+    db_path = _database_path(conn)
+    if workers <= 1 or not db_path or len(tables) <= 1:
+        return {table: func(conn, table, *args) for table in tables}
+    conn.commit()
+    context = multiprocessing.get_context("spawn")
+    # workers log through the parent, which owns the console and log files
+    with worker_logging(context=context) as (initializer, initargs):
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tables)),
+            mp_context=context,
+            initializer=initializer,
+            initargs=initargs,
+        ) as executor:
+            futures = {
+                table: executor.submit(_run_in_process, db_path, func, table, *args)
+                for table in tables
+            }
+            return {table: future.result() for table, future in futures.items()}
+
+
+def _remove_stale_files(out_dir: str, ext: str, tables: List[str]) -> None:
+    for file in os.listdir(out_dir):
+        name, file_ext = os.path.splitext(file)
+        if file_ext == ext and name not in tables:
+            logger.warning(f"Removing {ext} file of dropped table {name}...")
+            os.remove(os.path.join(out_dir, file))
+
+
+def export_csv(
+    conn,
+    csv_dir: str = CSV_DIR,
+    full: bool = False,
+    workers: int = EXPORT_WORKERS,
+) -> Dict[str, int]:
+    """exports every data table to csv files incrementally
+
+    Append-only tables only get the rows added since the previous export, so
+    the daily export time scales with the day's new data. Tables that were
+    replaced are regenerated in full, and csv files of tables that no longer
+    exist are removed. Tables are streamed in chunks and exported in parallel.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        csv_dir (str, optional): output directory. Defaults to CSV_DIR.
+        full (bool, optional): regenerate every csv file. Defaults to False.
+        workers (int, optional): number of tables exported at once. Defaults to EXPORT_WORKERS.
+
+    Returns:
+        Dict[str, int]: number of rows written per table
+    """
+    ensure_export_state(conn)
+    os.makedirs(csv_dir, exist_ok=True)
+    tables = list_tables(conn)
+    logger.info(f"Exporting {len(tables)} database tables to csv files...")
+    _remove_stale_files(csv_dir, ".csv", tables)
+    conn.execute(
+        f"DELETE FROM {EXPORT_STATE_TABLE} WHERE table_name NOT IN "
+        f"({', '.join('?' for _ in tables) or 'NULL'})",
+        tables,
+    )
+    conn.commit()
+    results = _map_tables(conn, _export_table_csv, tables, workers, csv_dir, full)
+    written = {}
+    for table, (rows, state) in results.items():
+        _save_export_state(conn, table, state)
+        written[table] = rows
+    logger.info("Exported database tables to csv files.")
+    return written
+
+
+# -- Parquet -------------------------------------------------------------------------
+def _arrow_schema(conn, table: str):
+    import pyarrow as pa
+
+    fields = []
+    for _, name, declared, *_ in conn.execute(f'PRAGMA table_info("{table}")'):
+        declared = (declared or "").upper()
+        if "INT" in declared:
+            dtype = pa.int64()
+        elif any(t in declared for t in ("REAL", "FLOA", "DOUB", "NUMERIC")):
+            dtype = pa.float64()
+        else:
+            dtype = pa.string()
+        fields.append(pa.field(name, dtype))
+    return pa.schema(fields)
+
+
+def _season_expression(columns: List[str]) -> Optional[str]:
+    # sql expression identifying the season of a row, None if the table has none
+    for column in SEASON_COLUMNS:
+        if column in columns:
+            return f'"{column}"'
+    if "game_id" in columns:
+        # game ids encode season type and season, e.g. 00223 in 0022300001
+        return 'substr("game_id", 1, 5)'
+    return None
+
+
+def _to_arrow(df: pd.DataFrame, schema):
+    import pyarrow as pa
+
+    arrays = []
+    for field in schema:
+        column = df[field.name]
+        if pa.types.is_string(field.type):
+            column = column.map(
+                lambda v: v if v is None or isinstance(v, str) else str(v)
+            )
+        arrays.append(pa.array(column, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def export_table_parquet(
+    conn,
+    table: str,
+    parquet_dir: str = PARQUET_DIR,
+    compression: str = PARQUET_COMPRESSION,
+) -> int:
+    """exports a table to ``<parquet_dir>/<table>.parquet``
+
+    The table is streamed in chunks. For tables with a season (a season
+    column or a ``game_id``) rows are written season by season and no row
+    group spans two seasons, so readers filtering on a season can skip the
+    others using the row group statistics.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        table (str): table name
+        parquet_dir (str, optional): output directory. Defaults to PARQUET_DIR.
+        compression (str, optional): parquet compression codec. Defaults to PARQUET_COMPRESSION.
+
+    Raises:
+        ImportError: raised if pyarrow is not installed
+
+    Returns:
+        int: number of rows written
+    """
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(conn, table)
+    season = _season_expression(schema.names)
+    select, _, _ = _source(table)
+    season = season or "NULL"
+    query = f'SELECT {season} AS "__season", * FROM ({select}) ORDER BY 1, "__rowid"'
+    path = os.path.join(parquet_dir, f"{table}.parquet")
+    written = 0
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        buffer, buffered, current = [], 0, None
+
+        def flush():
+            nonlocal buffer, buffered
+            if buffered:
+                df = pd.concat(buffer, ignore_index=True)
+                writer.write_table(_to_arrow(df, schema), row_group_size=buffered)
+            buffer, buffered = [], 0
+
+        for chunk in pd.read_sql(query, conn, chunksize=EXPORT_CHUNK_SIZE):
+            if chunk.empty:
+                continue
+            keys = chunk["__season"].astype(str)
+            # split the chunk at season boundaries (rows are sorted by season)
+            boundaries = (keys != keys.shift()).to_numpy().nonzero()[0].tolist()
+            for start, end in zip(boundaries, boundaries[1:] + [len(chunk)]):
+                key = keys.iloc[start]
+                if key != current or buffered >= EXPORT_CHUNK_SIZE:
+                    flush()
+                    current = key
+                part = chunk.iloc[start:end].drop(columns=["__season", "__rowid"])
+                buffer.append(part)
+                buffered += len(part)
+                written += len(part)
+        flush()
+    logger.info(f"Exported {written} rows of {table} to parquet.")
+    return written
+
+
+def export_parquet(
+    conn,
+    parquet_dir: str = PARQUET_DIR,
+    compression: str = PARQUET_COMPRESSION,
+    workers: int = EXPORT_WORKERS,
+) -> Dict[str, int]:
+    """exports every data table to compressed parquet files
+
+    Parquet output is optional and requires ``pyarrow``.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        parquet_dir (str, optional): output directory. Defaults to PARQUET_DIR.
+        compression (str, optional): parquet compression codec. Defaults to PARQUET_COMPRESSION.
+        workers (int, optional): number of tables exported at once. Defaults to EXPORT_WORKERS.
+
+    Raises:
+        ImportError: raised if pyarrow is not installed
+
+    Returns:
+        Dict[str, int]: number of rows written per table
+    """
+    import pyarrow  # noqa: F401  fail before any work is done
+
+    os.makedirs(parquet_dir, exist_ok=True)
+    tables = list_tables(conn)
+    logger.info(f"Exporting {len(tables)} database tables to parquet files...")
+    _remove_stale_files(parquet_dir, ".parquet", tables)
+    written = _map_tables(
+        conn, export_table_parquet, tables, workers, parquet_dir, compression
+    )
+    logger.info("Exported database tables to parquet files.")
+    return written
@@ -2,9 +2,9 @@
 """
 # == Imports ========================================================================
 import logging
+from contextlib import nullcontext
 from datetime import datetime
 from functools import partial
-from multiprocessing import Pool
 
 import numpy as np
 import pandas as pd
@@ -38,23 +38,47 @@ from nba_db.data import (
     TeamInfoCommonSchema,
     TeamSchema,
 )
-from nba_db.logger import log
+from nba_db.dtypes import to_storage_dtypes
+from nba_db.fetch import fetch_all, fetch_iter, request
+from nba_db.logger import log, log_sampled
+from nba_db.schema import bulk_load, ensure_table, record_change, write_table
+from nba_db.trace import span, traced
+from nba_db.validate import validate
+from nba_db.writer import DBWriter
 
 logger = logging.getLogger("nba_db_logger")
 
 # == Constants ======================================================================
+# values accepted by LeagueGameLog; "All-Star" and "Preseason" only repeated these
 season_types = [
     "Regular Season",
     "Pre Season",
     "Playoffs",
-    "All-Star",
     "All Star",
-    "Preseason",
 ]
+# months in which games of a season type have been played, generous enough to
+# cover lockout seasons and the 2020 restart
+SEASON_TYPE_MONTHS = {
+    "Regular Season": (1, 2, 3, 4, 5, 7, 8, 10, 11, 12),
+    "Pre Season": (9, 10, 11, 12),
+    "Playoffs": (4, 5, 6, 7, 8, 9, 10),
+    "All Star": (2, 3),
+}
+# tables filled from the BoxScoreSummaryV2 result sets of the same name
+BOX_SCORE_TABLES = {
+    "game_summary": GameSummarySchema,
+    "other_stats": OtherStatsSchema,
+    "officials": OfficialsSchema,
+    "inactive_players": InactivePlayersSchema,
+    "game_info": GameInfoSchema,
+    "line_score": LineScoreSchema,
+}
+PLAY_BY_PLAY_CHUNK_SIZE = 250  # games validated and written per transaction
 
 
 # == Functions ========================================================================
 @log(logger)
+@traced("extract")
 def get_players(save_to_db: bool = False, conn=None) -> pd.DataFrame:
     """retrieves all players from the static players endpoint
 
@@ -72,7 +96,7 @@ def get_players(save_to_db: bool = False, conn=None) -> pd.DataFrame:
     )
     df.columns = df.columns.to_series().apply(lambda x: x.lower())
     try:
-        df = PlayerSchema.validate(df, lazy=True)
+        df = validate(PlayerSchema, df)
     except SchemaErrors as err:
         logger.error("Schema validation failed for players")
         logger.error(f"Schema errors: {err.failure_cases}")
@@ -81,12 +105,13 @@ def get_players(save_to_db: bool = False, conn=None) -> pd.DataFrame:
     logger.info("Successfully retrieved all players.")
     if save_to_db:
         logger.info("Saving players to database...")
-        df.to_sql("player", conn, if_exists="replace", index=False)
+        write_table(conn, "player", df, if_exists="replace")
         logger.info("Successfully saved players to database. Returning data...")
     return df
 
 
 @log(logger)
+@traced("extract")
 def get_teams(save_to_db: bool = False, conn=None) -> pd.DataFrame:
     """retrieves all teams from the static teams endpoint
 
@@ -103,7 +128,7 @@ def get_teams(save_to_db: bool = False, conn=None) -> pd.DataFrame:
     )
     df.columns = df.columns.to_series().apply(lambda x: x.lower())
     try:
-        df = TeamSchema.validate(df, lazy=True)
+        df = validate(TeamSchema, df)
     except SchemaErrors as err:
         logger.error("Schema validation failed for players")
         logger.error(f"Schema errors: {err.failure_cases}")
@@ -112,137 +137,189 @@ def get_teams(save_to_db: bool = False, conn=None) -> pd.DataFrame:
     logger.info("Successfully retrieved all teams.")
     if save_to_db:
         logger.info("Saving teams to database...")
-        df.to_sql("team", conn, if_exists="replace", index=False)
+        write_table(conn, "team", df, if_exists="replace")
         logger.info("Successfully saved teams to database. Returning data...")
     return df
 
 
+def pair_home_away(df: pd.DataFrame) -> pd.DataFrame:
+    """pairs the two team rows of every game of a league game log into one row
+
+    The league game log has a row per team and game. The home team's row is
+    the one whose matchup reads ``vs.`` (``GSW vs. LAL``), the away team's
+    reads ``@`` (``LAL @ GSW``). Rows are split with that mask and joined
+    once on ``game_id``; the columns shared by both teams are taken from the
+    home row and the team columns get ``_home`` and ``_away`` suffixes.
+
+    Some games do not fit that pattern and are handled explicitly:
+
+    - neutral-site and other games where both or neither row reads ``vs.``
+      take the first row of the log as the home team
+    - games whose rows report different minutes keep the larger value
+    - repeated rows of a team are dropped, and games without two teams are
+      skipped
+
+    Args:
+        df (pd.DataFrame): league game log with lowercase columns
+
+    Returns:
+        pd.DataFrame: one row per game in the layout of :class:`nba_db.data.LeagueGameLogSchema` (without ``season_type``)
+    """
+    shared = ["season_id", "game_id", "game_date", "min"]
+    codes, game_ids = pd.factorize(df["game_id"])
+    if np.bincount(codes).max(initial=0) > 2:
+        df = df.drop_duplicates(["game_id", "team_id"]).reset_index(drop=True)
+        codes, game_ids = pd.factorize(df["game_id"])
+    teams = np.bincount(codes, minlength=len(game_ids))
+    if (teams != 2).any():
+        logger.warning(f"Skipping {(teams != 2).sum()} games without two teams.")
+    home = df["matchup"].str.contains(" vs. ", regex=False).to_numpy(dtype=bool)
+    neutral = np.bincount(codes, weights=home, minlength=len(game_ids)) != 1
+    neutral &= teams == 2
+    if neutral.any():
+        logger.debug(f"Pairing {neutral.sum()} neutral-site games by row order.")
+        first = np.zeros(len(df), dtype=bool)
+        first[np.unique(codes, return_index=True)[1]] = True
+        home = np.where(neutral[codes], first, home)
+    paired = teams[codes] == 2
+    # one home and one away row per paired game, both ordered by game
+    home_rows = np.flatnonzero(paired & home)
+    away_rows = np.flatnonzero(paired & ~home)
+    home_rows = home_rows[np.argsort(codes[home_rows], kind="stable")]
+    away_rows = away_rows[np.argsort(codes[away_rows], kind="stable")]
+    team_columns = [c for c in df.columns if c not in shared]
+    home_df = df.take(home_rows).reset_index(drop=True)
+    away_df = df[team_columns].take(away_rows).reset_index(drop=True)
+    away_minutes = df["min"].to_numpy()[away_rows]
+    mismatch = home_df["min"].to_numpy() != away_minutes
+    if mismatch.any():
+        logger.debug(f"Keeping the larger minutes of {mismatch.sum()} games.")
+        home_df["min"] = np.maximum(home_df["min"].to_numpy(), away_minutes)
+    # column order of the former self-merge: shared and home columns, then away
+    home_df.columns = [c if c in shared else f"{c}_home" for c in df.columns]
+    away_df.columns = [f"{c}_away" for c in team_columns]
+    return pd.concat([home_df, away_df], axis=1)
+
+
+def season_types_in_window(date_from, date_to=None) -> list:
+    """returns the season types that can have games between two dates
+
+    Args:
+        date_from (str | datetime): first date of the window
+        date_to (str | datetime, optional): last date of the window. Defaults to None (today).
+
+    Returns:
+        list[str]: season types of ``season_types`` whose months overlap the window
+    """
+    start = pd.Timestamp(date_from).to_period("M")
+    end = pd.Timestamp(date_to if date_to is not None else datetime.now()).to_period(
+        "M"
+    )
+    months = {period.month for period in pd.period_range(start, max(start, end))}
+    return [t for t in season_types if months & set(SEASON_TYPE_MONTHS[t])]
+
+
+def _lowercase_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.to_series().apply(lambda x: x.lower())
+    return df
+
+
+def parse_league_game_log(game_log):
+    """converts a LeagueGameLog response to rows of the game table
+
+    Args:
+        game_log (LeagueGameLog): endpoint with the response loaded
+
+    Returns:
+        dict[str, pd.DataFrame]: games of the response with home and away paired under ``game``, None if there are none
+    """
+    df = game_log.get_data_frames()[0]
+    if df.empty:
+        return {"game": None}
+    df = pair_home_away(_lowercase_columns(df))
+    df["season_type"] = game_log.parameters["SeasonType"]
+    return {"game": df}
+
+
+def get_league_game_log_helper(season_type, proxies, timeout=5, **params):
+    """retrieves one season type of the league game log with home and away paired
+
+    Args:
+        season_type (str): season type, one of ``season_types``
+        proxies (list[str]): proxy addresses
+        timeout (int, optional): request timeout in seconds. Defaults to 5.
+        **params: further LeagueGameLog parameters, e.g. ``season`` or ``date_from_nullable``
+
+    Returns:
+        pd.DataFrame: games of the season type, None if there are none or the request failed
+    """
+    try:
+        game_log = request(
+            LeagueGameLog,
+            season_type_all_star=season_type,
+            proxies=proxies,
+            timeout=timeout,
+            **params,
+        )
+        return parse_league_game_log(game_log)["game"]
+    except (RequestException, ValueError, KeyError) as e:
+        # the request layer already retried transient failures
+        log_sampled(
+            logger,
+            logging.WARNING,
+            "league_game_log_failed",
+            "League game log request failed: %s: %s",
+            type(e).__name__,
+            e,
+        )
+        return None
+
+
+def _fetch_season_types(types, proxies, timeout, **params):
+    # season types are requested concurrently, results keep the order of types
+    helper = partial(
+        get_league_game_log_helper, proxies=proxies, timeout=timeout, **params
+    )
+    dfs = [
+        df for df in fetch_all(helper, types, concurrency=len(types)) if df is not None
+    ]
+    if not dfs:
+        return None
+    return pd.concat(dfs, ignore_index=True)
+
+
 @log(logger)
-@log(logger)
+@traced("extract")
 def get_league_game_log_from_date(datefrom, proxies=None, save_to_db=False, conn=None):
     logger.info(f"Retrieving league game log from {datefrom}...")
-    dfs = []
-    for season_type in season_types:
-        while True:
-            try:
-                # Try to get games
-                if proxies is not None and len(proxies) > 0:
-                    gamelog = LeagueGameLog(
-                        date_from_nullable=datefrom,
-                        proxy=np.random.choice(proxies),
-                        season_type_all_star=season_type,
-                        timeout=3,
-                    )
-                else:
-                    gamelog = LeagueGameLog(
-                        date_from_nullable=datefrom,
-                        season_type_all_star=season_type,
-                        season="2023-24",  # Add explicit season
-                        timeout=3,
-                    )
-                
-                # Print raw response for debugging
-                print("Raw response structure:")
-                raw_response = gamelog.nba_response.get_dict()
-                print("Response keys:", raw_response.keys())
-                if 'resultSets' in raw_response:
-                    print("Using resultSets")
-                    results = raw_response['resultSets']
-                elif 'resultSet' in raw_response:
-                    print("Using resultSet")
-                    results = raw_response['resultSet']
-                else:
-                    print("No results found in response")
-                    print("Full response:", raw_response)
-                    continue
-
-                # Get the data frames
-                df = gamelog.get_data_frames()[0]
-                
-                # Process the data
-                df.columns = df.columns.to_series().apply(lambda x: x.lower())
-                df = pd.merge(
-                    df,
-                    df,
-                    on=["season_id", "game_id", "game_date", "min"],
-                    suffixes=["_home", "_away"],
-                )
-                df = df[
-                    (df["matchup_home"].str.contains("vs."))
-                    & (df["team_name_home"] != df["team_name_away"])
-                ]
-                df["season_type"] = season_type
-                dfs.append(df)
-                break
-                
-            except Exception as e:
-                print(f"Error processing data: {type(e).__name__}: {str(e)}")
-                # Try to print the raw response for debugging
-                try:
-                    print("Raw response on error:", gamelog.nba_response.get_json()[:500])
-                except:
-                    print("Could not get raw response")
-                if proxies is not None and len(proxies) > 0:
-                    continue
-                else:
-                    break
-                
-    if not dfs:
-        print("No data collected")
-        return None
-        
-    try:
-        df = pd.concat(dfs, ignore_index=True)
-    except Exception as e:
-        print(f"Error concatenating data frames: {str(e)}")
+    types = season_types_in_window(datefrom)
+    df = _fetch_season_types(types, proxies, timeout=3, date_from_nullable=datefrom)
+    if df is None:
+        logger.info("No games found.")
         return None
-        
+
     try:
-        df = LeagueGameLogSchema.validate(df, lazy=True)
+        df = validate(LeagueGameLogSchema, df)
     except SchemaErrors as err:
         logger.error("Schema validation failed for league game log")
         logger.error(f"Schema errors: {err.failure_cases}")
         logger.error(f"Invalid dataframe: {err.data}")
         return None
-        
+
     if save_to_db:
         logger.info("Saving league game log to database...")
-        df.to_sql("game", conn, if_exists="append", index=False)
+        write_table(conn, "game", df, if_exists="append")
         logger.info("Successfully saved league game log to database. Returning data...")
-        
+
     return df
+
+
 def get_league_game_log_all_helper(season, proxies):
-    dfs = []
-    for season_type in season_types:
-        while True:
-            try:
-                df = LeagueGameLog(
-                    season=season,
-                    season_type_all_star=season_type,
-                    proxy=np.random.choice(proxies),
-                    timeout=5,
-                ).get_data_frames()[0]
-                df.columns = df.columns.to_series().apply(lambda x: x.lower())
-                df = pd.merge(
-                    df,
-                    df,
-                    on=["season_id", "game_id", "game_date", "min"],
-                    suffixes=["_home", "_away"],
-                )
-                df = df[
-                    (df["matchup_home"].str.contains("vs."))
-                    & (df["team_name_home"] != df["team_name_away"])
-                ].reset_index(drop=True)
-                df["season_type"] = season_type
-                dfs.append(df)
-                break
-            except RequestException:
-                continue
-            except ValueError:
-                break
-    df = pd.concat(dfs, ignore_index=True).reset_index(drop=True)
+    df = _fetch_season_types(season_types, proxies, timeout=5, season=season)
+    if df is None:
+        return None
     try:
-        df = LeagueGameLogSchema.validate(df, lazy=True)
+        df = validate(LeagueGameLogSchema, df)
         return df
     except SchemaErrors as err:
         logger.error("Schema validation failed for league game log")
@@ -252,100 +329,159 @@ def get_league_game_log_all_helper(season, proxies):
 
 
 @log(logger)
-def get_league_game_log_all(proxies, conn) -> pd.DataFrame:
-    """ret
+@traced("extract")
+def get_league_game_log_all(
+    proxies, conn, seasons=None, if_exists="replace"
+) -> pd.DataFrame:
+    """retrieves the league game log of every season and saves it to the game table
 
-    _extended_summary_
+    Args:
+        proxies (list[str]): proxy addresses
+        conn (sqlite3.Connection): database connection
+        seasons (list[int], optional): season start years to retrieve. Defaults to None (1946 until last year).
+        if_exists (str, optional): behavior if the game table exists, one of ``append`` or ``replace``. Defaults to "replace".
 
     Returns:
-        pd.DataFrame: _description_
+        list[int]: seasons that were written, None if no season could be retrieved
     """
-    this_year = datetime.now().year
-    years = list(range(1946, this_year))
-    with Pool(len(years)) as p:
-        dfs = p.map(partial(get_league_game_log_all_helper, proxies=proxies), years)
-    dfs = [df for df in dfs if df is not None]
-    df = pd.concat(dfs, ignore_index=True).reset_index(drop=True)
-    df.to_sql("game", conn, if_exists="replace", index=False)
-    return df
+    if seasons is None:
+        seasons = list(range(1946, datetime.now().year))
+    written = []
+    helper = partial(get_league_game_log_all_helper, proxies=proxies)
+    with bulk_load(conn):
+        if if_exists == "replace":
+            ensure_table(conn, "game")
+            with conn:
+                conn.execute('DELETE FROM "game"')
+                record_change(conn, "game")
+        # seasons are written while the remaining ones are still being fetched
+        with DBWriter(conn) as writer:
+            for season, df in fetch_iter(helper, seasons):
+                if df is not None:
+                    writer.put("game", df)
+                    written.append(season)
+    logger.info(
+        f"Retrieved league game log of {len(written)} of {len(seasons)} seasons."
+    )
+    if not written:
+        return None
+    return written
+
+
+def parse_player_info(player_info):
+    """converts a CommonPlayerInfo response to rows of the common_player_info table"""
+    df = player_info.get_data_frames()[0]
+    return {"common_player_info": _lowercase_columns(df)}
+
+
+def _drop_missing(items, dfs, what):
+    """drops the results of failed requests, logging the items they were for
+
+    The rows of those items stay as stored: tables of per-item extractors
+    are upserted, never replaced by a partial result.
+
+    Args:
+        items (list): requested items, e.g. player ids
+        dfs (list): results of the items in the same order, None where a request failed
+        what (str): description used in log messages
+
+    Returns:
+        tuple[list, int]: results of the successful requests and the number of failed ones
+    """
+    items = list(items)
+    missing = [item for item, df in zip(items, dfs) if df is None]
+    if missing:
+        logger.warning(
+            f"Retrieving {what} failed for {len(missing)} of {len(items)} items: "
+            f"{missing[:10]}"
+        )
+    return [df for df in dfs if df is not None], len(missing)
 
 
 def get_player_info_helper(player, proxies):
-    while True:
-        try:
-            df = CommonPlayerInfo(
-                player_id=player, proxy=np.random.choice(proxies), timeout=3
-            ).get_data_frames()[0]
-            df.columns = df.columns.to_series().apply(lambda x: x.lower())
-            return df
-        except RequestException:
-            continue
-        except ValueError:
-            return None
+    try:
+        player_info = request(
+            CommonPlayerInfo,
+            player_id=player,
+            proxies=proxies,
+            timeout=3,
+        )
+    except (RequestException, ValueError):
+        return None
+    return parse_player_info(player_info)["common_player_info"]
 
 
 @log(logger)
+@traced("extract")
 def get_player_info(proxies, save_to_db: bool = False, conn=None) -> pd.DataFrame:
     player_ids = pd.read_sql("SELECT id FROM player", conn)["id"].astype("category")
-    with Pool(250) as p:
-        dfs = p.map(partial(get_player_info_helper, proxies=proxies), player_ids)
-    dfs = [df for df in dfs if df is not None]
+    dfs = fetch_all(partial(get_player_info_helper, proxies=proxies), player_ids)
+    dfs, missing = _drop_missing(player_ids, dfs, "common player info")
+    if not dfs:
+        return None
     dfs = pd.concat(dfs, ignore_index=True).reset_index(drop=True)
     try:
-        dfs = CommonPlayerInfoSchema.validate(dfs, lazy=True)
+        dfs = validate(CommonPlayerInfoSchema, dfs)
     except SchemaErrors as err:
         logger.error("Schema validation failed for players")
         logger.error(f"Schema errors: {err.failure_cases}")
         logger.error(f"Invalid dataframe: {err.data}")
         return None
-    logger.info("Successfully retrieved common player info for all players.")
+    logger.info(
+        f"Retrieved common player info of {len(player_ids) - missing} "
+        f"of {len(player_ids)} players."
+    )
     if save_to_db:
-        dfs.to_sql("common_player_info", conn, if_exists="replace", index=False)
+        write_table(conn, "common_player_info", dfs)
+    # an incomplete result fails the stage, so it is retried
+    return None if missing else dfs
+
+
+def parse_teams_details(team_details):
+    """converts a TeamDetails response to rows of the team_details and team_history tables"""
+    dfs = {"team_details": [], "team_history": []}
+    res_dfs = team_details.get_data_frames()
+    df = pd.concat(
+        [
+            res_dfs[0],
+            res_dfs[2].set_index("ACCOUNTTYPE").T.reset_index(drop=True),
+        ],
+        axis=1,
+    )
+    df.columns = df.columns.to_series().apply(lambda x: x.lower())
+    dfs["team_details"] = df
+    history = res_dfs[1]
+    history.columns = [
+        "team_id",
+        "city",
+        "nickname",
+        "year_founded",
+        "year_active_till",
+    ]
+    history["team_id"] = history["team_id"].astype("category")
+    dfs["team_history"] = history
     return dfs
 
 
 def get_teams_details_helper(team, proxies):
-    dfs = {"team_details": [], "team_history": []}
-    while True:
-        try:
-            res_dfs = TeamDetails(
-                team_id=team, proxy=np.random.choice(proxies), timeout=3
-            ).get_data_frames()
-            df = pd.concat(
-                [
-                    res_dfs[0],
-                    res_dfs[2].set_index("ACCOUNTTYPE").T.reset_index(drop=True),
-                ],
-                axis=1,
-            )
-            df.columns = df.columns.to_series().apply(lambda x: x.lower())
-            dfs["team_details"] = df
-            history = res_dfs[1]
-            history.columns = [
-                "team_id",
-                "city",
-                "nickname",
-                "year_founded",
-                "year_active_till",
-            ]
-            history["team_id"] = history["team_id"].astype("category")
-            dfs["team_history"] = history
-            return dfs
-        except RequestException:
-            continue
-        except ValueError:
-            return None
+    try:
+        team_details = request(TeamDetails, team_id=team, proxies=proxies, timeout=3)
+    except (RequestException, ValueError):
+        return None
+    return parse_teams_details(team_details)
 
 
 @log(logger)
+@traced("extract")
 def get_teams_details(proxies, save_to_db: bool = False, conn=None) -> pd.DataFrame:
     team_ids = pd.read_sql("SELECT id FROM team", conn)["id"].astype("category")
-    with Pool(250) as p:
-        dfs = p.map(partial(get_teams_details_helper, proxies=proxies), team_ids)
-    dfs = [df for df in dfs if df is not None]
+    dfs = fetch_all(partial(get_teams_details_helper, proxies=proxies), team_ids)
+    dfs, missing = _drop_missing(team_ids, dfs, "team details")
+    if not dfs:
+        return None
     team_details = pd.concat([df["team_details"] for df in dfs], ignore_index=True)
     try:
-        team_details = TeamDetailsSchema.validate(team_details, lazy=True)
+        team_details = validate(TeamDetailsSchema, team_details)
     except SchemaErrors as err:
         logger.error("Schema validation failed for team details")
         logger.error(f"Schema errors: {err.failure_cases}")
@@ -353,266 +489,413 @@ def get_teams_details(proxies, save_to_db: bool = False, conn=None) -> pd.DataFr
         return None
     team_history = pd.concat([df["team_history"] for df in dfs], ignore_index=True)
     try:
-        team_history = TeamHistorySchema.validate(team_history, lazy=True)
+        team_history = validate(TeamHistorySchema, team_history)
     except SchemaErrors as err:
         logger.error("Schema validation failed for team history")
         logger.error(f"Schema errors: {err.failure_cases}")
         logger.error(f"Invalid dataframe: {err.data}")
         return None
     if save_to_db:
-        team_details.to_sql("team_details", conn, if_exists="replace", index=False)
-        team_history.to_sql("team_history", conn, if_exists="replace", index=False)
-    return dfs
+        write_table(conn, "team_details", team_details)
+        write_table(conn, "team_history", team_history)
+    return None if missing else dfs
+
+
+def pair_box_score_teams(df, home_team_id, shared):
+    """pairs the two team rows of a box score result set into one row
+
+    Args:
+        df (pd.DataFrame): result set with a row per team and lowercase columns
+        home_team_id (str): id of the home team
+        shared (list[str]): columns that describe the game rather than a team
+
+    Returns:
+        pd.DataFrame: single row with the team columns suffixed ``_home`` and ``_away``, None if the result set does not hold both teams
+    """
+    is_home = (df["team_id"].astype(str) == str(home_team_id)).to_numpy()
+    if len(df) != 2 or is_home.sum() != 1:
+        return None
+    team_columns = [c for c in df.columns if c not in shared]
+    home = df[is_home].reset_index(drop=True)
+    away = df[~is_home].reset_index(drop=True)
+    return pd.concat(
+        [
+            home[shared],
+            home[team_columns].add_suffix("_home"),
+            away[team_columns].add_suffix("_away"),
+        ],
+        axis=1,
+    )
+
+
+def parse_box_score_summary(box_score):
+    """converts the result sets of a BoxScoreSummaryV2 response to database tables
+
+    Args:
+        box_score (BoxScoreSummaryV2): endpoint with the response loaded
+
+    Returns:
+        dict[str, pd.DataFrame]: rows of each table in ``BOX_SCORE_TABLES`` with the columns in schema order, None for result sets that are empty or do not fit the layout of the table
+    """
+    game_id = box_score.parameters["GameID"]
+    frames = {}
+    for table in BOX_SCORE_TABLES:
+        df = getattr(box_score, table).get_data_frame()
+        df.columns = df.columns.to_series().apply(lambda x: x.lower())
+        frames[table] = df if not df.empty else None
+    summary = frames["game_summary"]
+    home_team_id = summary["home_team_id"].iloc[0] if summary is not None else None
+    # result sets with a row per team become one row per game
+    for table, shared in [
+        ("other_stats", ["league_id", "lead_changes", "times_tied"]),
+        ("line_score", ["game_date_est", "game_sequence", "game_id"]),
+    ]:
+        if frames[table] is not None:
+            frames[table] = pair_box_score_teams(frames[table], home_team_id, shared)
+    for table in ["other_stats", "officials", "inactive_players", "game_info"]:
+        if frames[table] is not None and "game_id" not in frames[table]:
+            frames[table].insert(0, "game_id", game_id)
+    for table, schema in BOX_SCORE_TABLES.items():
+        if frames[table] is not None:
+            columns = [c for c in schema.to_schema().columns if c in frames[table]]
+            frames[table] = frames[table][columns]
+    return frames
 
 
 def get_box_score_summaries_helper(game_id, proxies):
-    dfs = {
-        t: []
-        for t in [
-            "game_summary",
-            "other_stats",
-            "officials",
-            "inactive_players",
-            "line_score",
-        ]
-    }
-    while True:
+    try:
+        box_score = request(
+            BoxScoreSummaryV2, game_id=game_id, proxies=proxies, timeout=3
+        )
+        frames = parse_box_score_summary(box_score)
+    except (RequestException, ValueError, KeyError) as e:
+        log_sampled(
+            logger,
+            logging.WARNING,
+            "box_score_failed",
+            "Box score summary of game %s failed: %r",
+            game_id,
+            e,
+        )
+        return None
+    if all(df is None for df in frames.values()):
+        # answered without a box score, e.g. a game not played yet
+        return {}
+    dfs = {}
+    for table, schema in BOX_SCORE_TABLES.items():
+        df = frames[table]
+        if df is None:
+            dfs[table] = None
+            continue
         try:
-            # Try to get box score with or without proxy
-            if proxies is not None and len(proxies) > 0:
-                box_score = BoxScoreSummaryV2(
-                    game_id=game_id,
-                    proxy=np.random.choice(proxies),
-                    timeout=3
-                )
-            else:
-                box_score = BoxScoreSummaryV2(
-                    game_id=game_id,
-                    timeout=3
-                )
-
-            # Print response for debugging
-            print(f"Processing box score for game {game_id}")
-            
-            res_dfs = box_score.get_data_frames()
-            if not res_dfs:
-                print(f"No data frames returned for game {game_id}")
-                return None
-                
-            for df in res_dfs:
-                if df is None or df.empty:
-                    continue
-                df.columns = df.columns.to_series().apply(lambda x: x.lower())
-            
-            df = res_dfs[0].copy()
-            try:
-                df = GameSummarySchema.validate(df, lazy=True)
-            except SchemaErrors as err:
-                print(f"Schema validation failed for game {game_id}")
-                print(f"Schema errors: {err.failure_cases}")
-                df = None
-            dfs["game_summary"] = df
-
-            # Process other data frames similarly...
-            # Rest of the function remains the same
-            
-            return dfs
-            
-        except RequestException:
-            print(f"Request exception for game {game_id}")
-            if proxies is not None and len(proxies) > 0:
-                continue
-            return None
-        except ValueError as e:
-            print(f"Value error for game {game_id}: {str(e)}")
-            return None
-        except Exception as e:
-            print(f"Unexpected error for game {game_id}: {str(e)}")
-            return None
-
+            dfs[table] = validate(schema, df)
+        except SchemaErrors as err:
+            log_sampled(
+                logger,
+                logging.ERROR,
+                f"{table}_schema_failed",
+                "Schema validation failed for %s of game %s. Schema errors: %s",
+                table,
+                game_id,
+                err.failure_cases,
+            )
+            dfs[table] = None
+    if all(df is None for df in dfs.values()):
+        return None
     return dfs
 
 
 @log(logger)
-@log(logger)
+@traced("extract")
 def get_box_score_summaries(game_ids, proxies, save_to_db=False, conn=None):
-    print(f"Processing {len(game_ids)} games...")
-    
-    if len(game_ids) < 250:
-        num_workers = len(game_ids)
-    else:
-        num_workers = 250
-        
-    with Pool(num_workers) as p:
-        dfs = p.map(partial(get_box_score_summaries_helper, proxies=proxies), game_ids)
-    
-    # Filter out None values and print summary
-    dfs = [d for d in dfs if d is not None]
-    print(f"Successfully processed {len(dfs)} out of {len(game_ids)} games")
-    
+    """retrieves the box score summaries of games
+
+    Every result set of a game's BoxScoreSummaryV2 response is parsed and
+    validated in one pass (see ``BOX_SCORE_TABLES``). When saving, the
+    tables are handed to a :class:`DBWriter` while the remaining games are
+    still being fetched.
+
+    Args:
+        game_ids (list[str]): ids of the games
+        proxies (list[str]): proxy addresses
+        save_to_db (bool, optional): indicator for whether to save result to the database. Defaults to False.
+        conn (sqlite3.Connection, optional): database connection. Defaults to None.
+
+    Returns:
+        list[dict[str, pd.DataFrame]] | list[str]: tables of every game with a valid box score summary if save_to_db is False, otherwise the ids of the games written or answered without a box score, in the order their requests complete. None if there is none.
+    """
+    logger.info(f"Retrieving box score summaries of {len(game_ids)} games...")
+    helper = partial(get_box_score_summaries_helper, proxies=proxies)
+    dfs = []
+    written = []
+    with DBWriter(conn) if save_to_db else nullcontext() as writer:
+        for game_id, d in fetch_iter(helper, game_ids):
+            if d is None:
+                continue
+            written.append(game_id)
+            if not d:
+                continue
+            dfs.append(d)
+            if writer is not None:
+                for table, df in d.items():
+                    writer.put(table, df)
+    logger.info(
+        f"Retrieved box score summaries of {len(dfs)} of {len(game_ids)} games."
+    )
+    if save_to_db:
+        return written or None
+    return dfs or None
+
+
+def parse_play_by_play(play_by_play):
+    """converts a PlayByPlayV2 response to rows of the play_by_play table"""
+    df = play_by_play.get_data_frames()[0]
+    return {"play_by_play": _lowercase_columns(df)}
+
+
+def get_play_by_play_helper(game_id, proxies):
+    try:
+        play_by_play = request(
+            PlayByPlayV2, game_id=game_id, proxies=proxies, timeout=3
+        )
+    except (RequestException, ValueError):
+        return None
+    return parse_play_by_play(play_by_play)["play_by_play"]
+
+
+def validate_frames(schema, dfs, table):
+    """validates the frames of a table fetched by separate requests
+
+    The frames are validated as a whole first. If that fails, every frame is
+    validated on its own so a single bad response is dropped instead of all.
+
+    Args:
+        schema (Type[SchemaModel]): data schema of the table
+        dfs (list[pd.DataFrame]): frames of the individual responses
+        table (str): table name used in log messages
+
+    Returns:
+        pd.DataFrame: validated rows of all valid frames, as returned by :func:`validate`. None if no frame is valid.
+    """
     if not dfs:
-        print("No valid box scores found")
         return None
-        
     try:
-        game_summary = pd.concat(
-            [d["game_summary"] for d in dfs if d["game_summary"] is not None]
-        ).reset_index(drop=True)
-        # Rest of concatenations...
-        
-        if save_to_db:
-            if not game_summary.empty:
-                game_summary.to_sql("game_summary", conn, if_exists="append", index=False)
-            # Save other tables...
-            
-        return dfs
-    except Exception as e:
-        print(f"Error processing box scores: {str(e)}")
+        return validate(schema, pd.concat(dfs, ignore_index=True))
+    except SchemaErrors:
+        pass
+    valid = []
+    for df in dfs:
+        try:
+            valid.append(validate(schema, df))
+        except SchemaErrors as err:
+            game_id = df["game_id"].iloc[0] if "game_id" in df and len(df) > 0 else None
+            log_sampled(
+                logger,
+                logging.ERROR,
+                f"{table}_schema_failed",
+                "Schema validation failed for %s of game %s. Schema errors: %s",
+                table,
+                game_id,
+                err.failure_cases,
+            )
+    if not valid:
         return None
+    return pd.concat(valid, ignore_index=True)
 
 
-def get_play_by_play_helper(game_id, proxies):
-    while True:
-        try:
-            df = PlayByPlayV2(
-                game_id=game_id, proxy=np.random.choice(proxies), timeout=3
-            ).get_data_frames()[0]
-            df.columns = df.columns.to_series().apply(lambda x: x.lower())
-            return df
-        except RequestException:
-            continue
-        except ValueError:
-            return None
+def validate_play_by_play(dfs):
+    """validates the play by play of a chunk of games
+
+    The chunk is validated as a whole first. If that fails, every game is
+    validated on its own so a single bad game is dropped instead of the chunk.
+
+    Args:
+        dfs (list[pd.DataFrame]): play by play of the individual games
+
+    Returns:
+        pd.DataFrame: validated play by play of all valid games. None if no game is valid.
+    """
+    return validate_frames(PlayByPlaySchema, dfs, "play by play")
 
 
 @log(logger)
-def get_play_by_play(game_ids, proxies, save_to_db=False, conn=None):
-    if len(game_ids) < 250:
-        num_workers = len(game_ids)
-    else:
-        num_workers = 250
-    with Pool(num_workers) as p:
-        dfs = p.map(partial(get_play_by_play_helper, proxies=proxies), game_ids)
-    dfs = pd.concat(dfs).reset_index(drop=True)
-    try:
-        dfs = PlayByPlaySchema.validate(dfs, lazy=True)
-    except SchemaErrors as err:
-        logger.error("Schema validation failed for league game log")
-        logger.error(f"Schema errors: {err.failure_cases}")
-        logger.error(f"Invalid dataframe: {err.data}")
-        dfs = None
+@traced("extract")
+def get_play_by_play(
+    game_ids, proxies, save_to_db=False, conn=None, chunk_size=PLAY_BY_PLAY_CHUNK_SIZE
+):
+    """retrieves the play by play of games
+
+    Games are consumed as their requests complete and validated in chunks of
+    ``chunk_size`` games. Valid chunks are handed to a :class:`DBWriter`, so
+    fetching, validation and writing overlap and memory use does not grow
+    with the number of games when saving.
+
+    Args:
+        game_ids (list[str]): ids of the games
+        proxies (list[str]): proxy addresses
+        save_to_db (bool, optional): indicator for whether to save result to the database. Defaults to False.
+        conn (sqlite3.Connection, optional): database connection. Defaults to None.
+        chunk_size (int, optional): number of games validated and written at once. Defaults to PLAY_BY_PLAY_CHUNK_SIZE.
+
+    Returns:
+        pd.DataFrame | list[str]: play by play of all valid games if save_to_db is False, otherwise the ids of the games written or answered without events (e.g. games before the 1996-97 season). None if there is none.
+    """
+    results = []
+    chunk = []
+
+    def flush():
+        with span("validate_play_by_play", "validate", games=len(chunk)):
+            df = validate_play_by_play(chunk)
+        chunk.clear()
+        if df is None:
+            return
+        if save_to_db:
+            writer.put("play_by_play", df)
+            results.extend(df["game_id"].unique().tolist())
+        else:
+            results.append(df)
+
+    helper = partial(get_play_by_play_helper, proxies=proxies)
+    with DBWriter(conn) if save_to_db else nullcontext() as writer:
+        for game_id, df in fetch_iter(helper, game_ids):
+            if df is None:
+                continue
+            if df.empty:
+                # nothing to validate or write, but nothing to retry either
+                if save_to_db:
+                    results.append(game_id)
+                continue
+            chunk.append(df)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    if not results:
+        return None
     if save_to_db:
-        dfs.to_sql("play_by_play", conn, if_exists="append", index=False)
-    return dfs
+        return results
+    return to_storage_dtypes(PlayByPlaySchema, pd.concat(results, ignore_index=True))
+
+
+def parse_draft_combine_stats(draft_combine_stats):
+    """converts a DraftCombineStats response to rows of the draft_combine_stats table"""
+    df = draft_combine_stats.get_data_frames()[0]
+    return {"draft_combine_stats": _lowercase_columns(df)}
 
 
 def get_draft_combine_stats_helper(season, proxies):
-    while True:
-        try:
-            df = DraftCombineStats(
-                season_all_time=season, proxy=np.random.choice(proxies), timeout=3
-            ).get_data_frames()[0]
-            df.columns = df.columns.to_series().apply(lambda x: x.lower())
-            return df
-        except RequestException:
-            continue
-        except ValueError:
-            return None
+    try:
+        draft_combine_stats = request(
+            DraftCombineStats,
+            season_all_time=season,
+            proxies=proxies,
+            timeout=3,
+        )
+    except (RequestException, ValueError):
+        return None
+    return parse_draft_combine_stats(draft_combine_stats)["draft_combine_stats"]
 
 
 @log(logger)
+@traced("extract")
 def get_draft_combine_stats(proxies, season=None, save_to_db=False, conn=None):
     if season is None:
         seasons = [str(season) for season in range(1946, datetime.today().year + 1)]
-        with Pool(len(seasons)) as p:
-            dfs = p.map(
-                partial(get_draft_combine_stats_helper, proxies=proxies), seasons
-            )
     else:
         seasons = pd.Series([str(season)])
-        with Pool(len(seasons)) as p:
-            dfs = p.map(
-                partial(get_draft_combine_stats_helper, proxies=proxies), seasons
-            )
+    dfs = fetch_all(partial(get_draft_combine_stats_helper, proxies=proxies), seasons)
+    dfs, missing = _drop_missing(seasons, dfs, "draft combine stats")
+    if not dfs:
+        return None
     dfs = pd.concat(dfs).reset_index(drop=True)
     try:
-        dfs = DraftCombineStatsSchema.validate(dfs, lazy=True)
+        dfs = validate(DraftCombineStatsSchema, dfs)
     except SchemaErrors as err:
         logger.error("Schema validation failed for draft combine stats")
         logger.error(f"Schema errors: {err.failure_cases}")
         logger.error(f"Invalid dataframe: {err.data}")
-        dfs = None
+        return None
     if save_to_db:
-        dfs.to_sql("draft_combine_stats", conn, if_exists="replace", index=False)
-    return dfs
+        write_table(conn, "draft_combine_stats", dfs)
+    return None if missing else dfs
+
+
+def parse_draft_history(draft_history):
+    """converts a DraftHistory response to rows of the draft_history table"""
+    df = draft_history.get_data_frames()[0]
+    return {"draft_history": _lowercase_columns(df)}
 
 
 def get_draft_history_helper(season, proxies):
-    while True:
-        try:
-            df = DraftHistory(
-                season_year_nullable=season, proxy=np.random.choice(proxies), timeout=3
-            ).get_data_frames()[0]
-            df.columns = df.columns.to_series().apply(lambda x: x.lower())
-            return df
-        except RequestException:
-            continue
-        except ValueError:
-            return None
+    try:
+        draft_history = request(
+            DraftHistory,
+            season_year_nullable=season,
+            proxies=proxies,
+            timeout=3,
+        )
+    except (RequestException, ValueError):
+        return None
+    return parse_draft_history(draft_history)["draft_history"]
 
 
 @log(logger)
+@traced("extract")
 def get_draft_history(proxies, season=None, save_to_db=False, conn=None):
     if season is None:
         seasons = [str(season) for season in range(1946, datetime.today().year + 1)]
-        with Pool(len(seasons)) as p:
-            dfs = p.map(partial(get_draft_history_helper, proxies=proxies), seasons)
     else:
         seasons = pd.Series([str(season)])
-        with Pool(len(seasons)) as p:
-            dfs = p.map(partial(get_draft_history_helper, proxies=proxies), seasons)
+    dfs = fetch_all(partial(get_draft_history_helper, proxies=proxies), seasons)
+    dfs, missing = _drop_missing(seasons, dfs, "draft history")
+    if not dfs:
+        return None
     dfs = pd.concat(dfs).reset_index(drop=True)
     try:
-        dfs = DraftHistorySchema.validate(dfs, lazy=True)
+        dfs = validate(DraftHistorySchema, dfs)
     except SchemaErrors as err:
         logger.error("Schema validation failed for draft history")
         logger.error(f"Schema errors: {err.failure_cases}")
         logger.error(f"Invalid dataframe: {err.data}")
-        dfs = None
+        return None
     if save_to_db:
-        dfs.to_sql("draft_history", conn, if_exists="replace", index=False)
-    return dfs
+        write_table(conn, "draft_history", dfs)
+    return None if missing else dfs
+
+
+def parse_team_info_common(team_info_common):
+    """converts a TeamInfoCommon response to rows of the team_info_common table"""
+    dfs = team_info_common.get_data_frames()
+    df = pd.merge(dfs[0], dfs[1], on=["TEAM_ID"])
+    return {"team_info_common": _lowercase_columns(df)}
 
 
 def get_team_info_common_helper(team, proxies):
-    while True:
-        try:
-            dfs = TeamInfoCommon(
-                team_id=team, proxy=np.random.choice(proxies), timeout=3
-            ).get_data_frames()
-            dfs = pd.merge(dfs[0], dfs[1], on=["TEAM_ID"])
-            dfs.columns = dfs.columns.to_series().apply(lambda x: x.lower())
-            return dfs
-        except RequestException:
-            continue
-        except ValueError:
-            return None
+    try:
+        team_info_common = request(
+            TeamInfoCommon, team_id=team, proxies=proxies, timeout=3
+        )
+        return parse_team_info_common(team_info_common)["team_info_common"]
+    except (RequestException, ValueError):
+        return None
 
 
 @log(logger)
+@traced("extract")
 def get_team_info_common(proxies, save_to_db=False, conn=None):
-    dfs = pd.read_sql("SELECT id FROM team", conn)["id"].tolist()
-    num_workers = len(dfs)
-    with Pool(num_workers) as p:
-        dfs = p.map(partial(get_team_info_common_helper, proxies=proxies), dfs)
+    team_ids = pd.read_sql("SELECT id FROM team", conn)["id"].tolist()
+    dfs = fetch_all(partial(get_team_info_common_helper, proxies=proxies), team_ids)
+    dfs, missing = _drop_missing(team_ids, dfs, "team info common")
+    if not dfs:
+        return None
     dfs = pd.concat(dfs).reset_index(drop=True)
     try:
-        dfs = TeamInfoCommonSchema.validate(dfs, lazy=True)
+        dfs = validate(TeamInfoCommonSchema, dfs)
     except SchemaErrors as err:
         logger.error("Schema validation failed for team info common")
         logger.error(f"Schema errors: {err.failure_cases}")
         logger.error(f"Invalid dataframe: {err.data}")
-        dfs = None
+        return None
     if save_to_db:
-        dfs.to_sql("team_info_common", conn, if_exists="replace", index=False)
-    return dfs
+        write_table(conn, "team_info_common", dfs)
+    return None if missing else dfs
@@ -0,0 +1,426 @@
+"""asynchronous fetch engine shared by the extraction helpers
+"""
+# -- Imports --------------------------------------------------------------------------
+import asyncio
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
+
+import requests
+from nba_api.stats.library.http import NBAStatsHTTP, NBAStatsResponse
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from nba_db.cache import ResponseCache
+from nba_db.landing import LandingStore
+from nba_db.logger import log_sampled
+from nba_db.metrics import inc, observe
+from nba_db.proxy import ProxyPool
+from nba_db.retry import (
+    RETRYABLE_STATUS_CODES,
+    RateLimiter,
+    RetryableResponseError,
+    RetryPolicy,
+    error_type,
+)
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+DEFAULT_CONCURRENCY = 64
+# url template requests are sent to instead of stats.nba.com, e.g. a mock server
+STATS_URL = os.environ.get("NBA_DB_STATS_URL")
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+_landing = None
+_base_url = STATS_URL
+_rate_limiter = RateLimiter()
+_retry_policy = RetryPolicy()
+
+
+# -- Functions -----------------------------------------------------------------------
+def get_session(pool_size: int = DEFAULT_CONCURRENCY) -> requests.Session:
+    """returns the process-wide HTTP session used for all endpoint requests
+
+    The session keeps connections alive between requests so that thousands of
+    calls against stats.nba.com (or a proxy) reuse a small pool of sockets.
+
+    Args:
+        pool_size (int, optional): maximum number of pooled connections per host. Defaults to DEFAULT_CONCURRENCY.
+
+    Returns:
+        requests.Session: shared session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def set_cache(cache: Optional[ResponseCache]) -> None:
+    """sets the response cache consulted by :func:`request`
+
+    Args:
+        cache (ResponseCache, optional): cache to use, None disables caching
+    """
+    global _cache
+    _cache = cache
+
+
+def set_landing(landing: Optional[LandingStore]) -> None:
+    """sets the landing zone every response fetched by :func:`request` is appended to
+
+    Args:
+        landing (LandingStore, optional): landing store to use, None disables landing
+    """
+    global _landing
+    _landing = landing
+
+
+def set_base_url(base_url: Optional[str]) -> None:
+    """sets the url template :func:`request` sends requests to
+
+    Args:
+        base_url (str, optional): url with an ``{endpoint}`` placeholder, e.g. ``http://127.0.0.1:8765/stats/{endpoint}`` (see :mod:`nba_db.mock_server`), None restores stats.nba.com
+    """
+    global _base_url
+    _base_url = base_url
+
+
+def set_rate_limiter(rate_limiter: RateLimiter) -> None:
+    """sets the rate limiter every request waits for
+
+    Args:
+        rate_limiter (RateLimiter): rate limiter keyed by proxy or host
+    """
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def set_retry_policy(policy: RetryPolicy) -> None:
+    """sets the retry policy applied by :func:`request`
+
+    Args:
+        policy (RetryPolicy): retry policy
+    """
+    global _retry_policy
+    _retry_policy = policy
+
+
+def request(
+    endpoint_cls,
+    proxy: Optional[str] = None,
+    timeout: int = 30,
+    proxies: Optional[Union[ProxyPool, Sequence[str]]] = None,
+    **params,
+):
+    """requests an nba_api endpoint through the shared session
+
+    The endpoint is instantiated without firing its own request, the HTTP call
+    is made with the pooled session and the response is loaded back into the
+    endpoint, so callers use the returned object exactly like a regular
+    nba_api endpoint.
+
+    Every attempt waits for the rate limiter of its proxy (or host) and
+    transient failures are retried according to the retry policy, picking a
+    new proxy for each attempt. See :func:`set_rate_limiter` and
+    :func:`set_retry_policy`. Responses fetched from the network are appended
+    to the landing zone, if one is set (see :func:`set_landing`). The
+    duration and outcome of every attempt, retries and cache hits are
+    recorded in the metrics registry (see :mod:`nba_db.metrics`). Requests
+    go to stats.nba.com unless another url is set with :func:`set_base_url`
+    or ``$NBA_DB_STATS_URL``.
+
+    Args:
+        endpoint_cls (type): nba_api endpoint class, e.g. ``PlayByPlayV2``
+        proxy (str, optional): proxy address of the form host:port. Defaults to None.
+        timeout (int, optional): request timeout in seconds. Defaults to 30.
+        proxies (ProxyPool | list[str], optional): proxies to pick from if ``proxy`` is not given. The outcome of the request is reported back to a ProxyPool. Defaults to None.
+        **params: endpoint parameters, e.g. ``game_id="0022200001"``
+
+    Raises:
+        requests.exceptions.RequestException: raised once the retry policy gives up on connection errors, timeouts, throttled (429) or failed (5xx) responses
+        ValueError: raised if the response is not valid JSON or a client error, which is not retried
+
+    Returns:
+        Endpoint: endpoint with the response loaded
+    """
+    endpoint = endpoint_cls(**params, timeout=timeout, get_request=False)
+    http = NBAStatsHTTP()
+    url = (_base_url or http.base_url).format(endpoint=endpoint.endpoint)
+    cache = _cache
+    contents = None
+    if cache is not None:
+        contents = cache.get(endpoint.endpoint, endpoint.parameters)
+    if contents is not None:
+        endpoint.nba_response = NBAStatsResponse(
+            response=contents, status_code=200, url=url
+        )
+        endpoint.load_response()
+        inc("nba_db_cache_hits_total", endpoint=endpoint.endpoint)
+        return endpoint
+    pool = proxies if isinstance(proxies, ProxyPool) else None
+    policy = _retry_policy
+    attempt = 0
+    while True:
+        attempt += 1
+        attempt_proxy = proxy
+        if attempt_proxy is None and proxies is not None and len(proxies) > 0:
+            attempt_proxy = (
+                pool.acquire() if pool is not None else random.choice(list(proxies))
+            )
+        _rate_limiter.acquire(attempt_proxy or urlsplit(url).netloc)
+        start = time.perf_counter()
+        try:
+            contents = _send(endpoint, http, url, attempt_proxy, timeout, pool)
+            _record_attempt(endpoint.endpoint, attempt_proxy, "ok", start)
+            break
+        except (RequestException, ValueError) as exc:
+            error = error_type(exc)
+            _record_attempt(endpoint.endpoint, attempt_proxy, error, start)
+            if attempt >= policy.max_attempts or not policy.is_retryable(exc):
+                inc(
+                    "nba_db_request_failures_total",
+                    endpoint=endpoint.endpoint,
+                    error=error,
+                )
+                raise
+            inc("nba_db_request_retries_total", endpoint=endpoint.endpoint, error=error)
+            delay = policy.delay(attempt, exc)
+            log_sampled(
+                logger,
+                logging.DEBUG,
+                "request_retry",
+                "%s attempt %d failed (%r), retrying in %.2fs",
+                endpoint.endpoint,
+                attempt,
+                exc,
+                delay,
+            )
+            time.sleep(delay)
+    if cache is not None:
+        cache.put(endpoint.endpoint, endpoint.parameters, contents)
+    if _landing is not None:
+        _landing.put(endpoint.endpoint, endpoint.parameters, contents)
+    return endpoint
+
+
+def _record_attempt(
+    endpoint: str, proxy: Optional[str], outcome: str, start: float
+) -> None:
+    observe(
+        "nba_db_request_duration_seconds",
+        time.perf_counter() - start,
+        endpoint=endpoint,
+        outcome=outcome,
+    )
+    if proxy is not None:
+        inc("nba_db_proxy_requests_total", proxy=proxy, outcome=outcome)
+
+
+def _send(endpoint, http, url, proxy, timeout, pool) -> str:
+    # one attempt; returns the cleaned response text on success
+    start = time.perf_counter()
+    try:
+        response = get_session().get(
+            url,
+            params=sorted(endpoint.parameters.items(), key=lambda kv: kv[0]),
+            headers=endpoint.headers if endpoint.headers is not None else http.headers,
+            proxies={"http": proxy, "https": proxy} if proxy else None,
+            timeout=timeout,
+        )
+    except RequestException:
+        if pool is not None:
+            pool.report(proxy, False, time.perf_counter() - start)
+        raise
+    latency = time.perf_counter() - start
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        if pool is not None:
+            pool.report(proxy, False, latency)
+        raise RetryableResponseError(
+            f"{endpoint.endpoint} returned HTTP {response.status_code}",
+            status_code=response.status_code,
+            retry_after=_retry_after(response.headers.get("Retry-After")),
+        )
+    contents = http.clean_contents(response.text)
+    endpoint.nba_response = NBAStatsResponse(
+        response=contents,
+        status_code=response.status_code,
+        url=response.url,
+    )
+    try:
+        endpoint.load_response()
+    except ValueError as exc:
+        if pool is not None:
+            pool.report(proxy, False, latency)
+        if proxy is not None:
+            # proxies regularly answer with their own error or captcha pages
+            raise RetryableResponseError(
+                f"{endpoint.endpoint} returned invalid JSON via {proxy}",
+                status_code=response.status_code,
+            ) from exc
+        raise
+    if pool is not None:
+        pool.report(proxy, response.ok, latency)
+    if not response.ok:
+        raise ValueError(f"{endpoint.endpoint} returned HTTP {response.status_code}")
+    return contents
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+async def _run(
+    func: Callable,
+    items: List[Any],
+    concurrency: int,
+    semaphore: asyncio.Semaphore,
+    results: queue.Queue,
+) -> None:
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        async def run_one(index: int, item: Any) -> None:
+            # the slot is released by the consumer once it has taken the result,
+            # which bounds the number of results held in memory
+            await semaphore.acquire()
+            try:
+                result = await loop.run_in_executor(executor, func, item)
+            except BaseException:
+                semaphore.release()
+                raise
+            results.put((index, item, result))
+
+        tasks = [loop.create_task(run_one(i, item)) for i, item in enumerate(items)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def fetch_iter(
+    func: Callable, items: Iterable, concurrency: int = DEFAULT_CONCURRENCY
+) -> Iterator[Tuple[Any, Any]]:
+    """runs ``func`` over ``items`` on a single event loop, yielding results as they complete
+
+    At most ``concurrency`` calls are in flight at any time. The event loop runs
+    in a background thread so results can be consumed (and written) while the
+    remaining requests are still outstanding.
+
+    Args:
+        func (Callable): blocking function of one argument, e.g. a ``*_helper`` bound with ``partial``
+        items (Iterable): items to call ``func`` on
+        concurrency (int, optional): maximum number of concurrent calls. Defaults to DEFAULT_CONCURRENCY.
+
+    Yields:
+        Tuple[Any, Any]: (item, result) pairs in completion order
+    """
+    for _, item, result in _iter_indexed(func, items, concurrency):
+        yield item, result
+
+
+def _iter_indexed(
+    func: Callable, items: Iterable, concurrency: int
+) -> Iterator[Tuple[int, Any, Any]]:
+    items = list(items)
+    if not items:
+        return
+    concurrency = max(1, min(concurrency, len(items)))
+    loop = asyncio.new_event_loop()
+    results = queue.Queue()
+    done = object()
+    errors = []
+    semaphore = asyncio.Semaphore(concurrency)
+    main = loop.create_task(_run(func, items, concurrency, semaphore, results))
+
+    def run_loop() -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(main)
+        except BaseException as exc:  # surfaced to the consumer below
+            errors.append(exc)
+        finally:
+            loop.close()
+            results.put(done)
+
+    thread = threading.Thread(target=run_loop, name="nba_db-fetch", daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            entry = results.get()
+            if entry is done:
+                finished = True
+                break
+            observe("nba_db_queue_depth", results.qsize(), queue="fetch")
+            _release(loop, semaphore)
+            yield entry
+    finally:
+        if not finished:
+            # consumer stopped early: cancel outstanding calls and drain the results
+            loop.call_soon_threadsafe(main.cancel)
+            while results.get() is not done:
+                _release(loop, semaphore)
+        thread.join()
+    if errors and not isinstance(errors[0], asyncio.CancelledError):
+        raise errors[0]
+
+
+def _release(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore) -> None:
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:  # loop already closed, nothing left to schedule
+        pass
+
+
+def fetch_all(
+    func: Callable, items: Iterable, concurrency: int = DEFAULT_CONCURRENCY
+) -> List[Any]:
+    """runs ``func`` over ``items`` on a single event loop and returns the results in input order
+
+    Drop-in replacement for ``Pool.map`` for I/O bound helpers: all calls share
+    one process, one event loop and one connection pool.
+
+    Args:
+        func (Callable): blocking function of one argument
+        items (Iterable): items to call ``func`` on
+        concurrency (int, optional): maximum number of concurrent calls. Defaults to DEFAULT_CONCURRENCY.
+
+    Returns:
+        List[Any]: results ordered like ``items``
+    """
+    items = list(items)
+    results = [None] * len(items)
+    for index, _, result in _iter_indexed(func, items, concurrency):
+        results[index] = result
+    return results
@@ -0,0 +1,185 @@
+"""raw landing zone of stats.nba.com responses
+"""
+# -- Imports --------------------------------------------------------------------------
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from nba_db.cache import CACHE_DIR, current_season_start_year, normalize_params
+
+try:
+    import zstandard
+except ImportError:  # optional, shards are gzip compressed without it
+    zstandard = None
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+LANDING_DIR = os.environ.get("NBA_DB_LANDING_DIR", os.path.join(CACHE_DIR, "landing"))
+EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+DEFAULT_COMPRESSION = "zstd" if zstandard is not None else "gzip"
+UNSHARDED = "all"  # shard of responses that do not belong to a season
+# errors raised when reading a record cut short by an interrupted write
+TRUNCATED_RECORD_ERRORS = (EOFError, OSError, ValueError) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+# -- Functions -----------------------------------------------------------------------
+def shard_of(params: Dict[str, Any]) -> str:
+    """returns the season shard a request belongs to
+
+    The season is read from the ``Season``, ``SeasonYear`` or ``GameID``
+    (``0022300001`` belongs to 2023) parameter, or from the season of
+    ``DateFrom`` for requests by date window.
+
+    Args:
+        params (Dict[str, Any]): request parameters
+
+    Returns:
+        str: season start year, e.g. ``2023``, or ``all`` for requests without a season
+    """
+    params = normalize_params(params)
+    season = params.get("Season") or params.get("SeasonYear") or ""
+    if season[:4].isdigit():
+        return season[:4]
+    game_id = params.get("GameID", "")
+    if len(game_id) == 10 and game_id.isdigit():
+        year = int(game_id[3:5])
+        return str(1900 + year if year >= 46 else 2000 + year)
+    if params.get("DateFrom"):
+        try:
+            date = pd.Timestamp(params["DateFrom"]).to_pydatetime()
+        except ValueError:
+            return UNSHARDED
+        return str(current_season_start_year(date))
+    return UNSHARDED
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    # every record is a frame (member) of its own, so shards can be appended to
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data, mtime=0)
+
+
+def _open_shard(path: str):
+    if path.endswith(EXTENSIONS["zstd"]):
+        if zstandard is None:
+            raise ImportError(f"zstandard is required to read {path}")
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            raw, read_across_frames=True, closefd=True
+        )
+        return io.BufferedReader(reader)
+    return gzip.open(path, "rb")
+
+
+def read_shard(path: str) -> Iterator[Dict[str, Any]]:
+    """reads the records of a shard in the order they were landed
+
+    A record cut short by an interrupted write ends the shard with a warning
+    instead of an error.
+
+    Args:
+        path (str): path of the shard file
+
+    Yields:
+        Dict[str, Any]: records with the keys ``endpoint``, ``params``, ``fetched_at`` and ``contents``
+    """
+    with _open_shard(path) as shard:
+        try:
+            for line in shard:
+                yield json.loads(line)
+        except TRUNCATED_RECORD_ERRORS as exc:
+            logger.warning(f"Shard {path} ends with a truncated record: {exc!r}")
+
+
+# -- Classes -------------------------------------------------------------------------
+class LandingStore:
+    """append-only store of the raw responses fetched during extraction
+
+    Every response is appended as one JSON line (endpoint, normalized
+    parameters, fetch time and the response text) to
+    ``<root>/<endpoint>/<season>.jsonl.zst``, one compressed frame per
+    record, so a shard is valid after every write and concurrent fetches
+    only hold the lock for a single append. Shards are split by season (see
+    :func:`shard_of`), which lets :func:`nba_db.replay.replay_tables` rebuild
+    tables in parallel from local files. ``zstandard`` is optional; without
+    it shards are written as gzip members to ``.jsonl.gz`` files.
+
+    Args:
+        root (str, optional): landing directory. Defaults to ``$NBA_DB_LANDING_DIR`` (``$NBA_DB_CACHE_DIR/landing``).
+        compression (str, optional): ``zstd`` or ``gzip``. Defaults to DEFAULT_COMPRESSION.
+    """
+
+    def __init__(self, root: Optional[str] = None, compression: Optional[str] = None):
+        self.root = root or LANDING_DIR
+        self.compression = compression or DEFAULT_COMPRESSION
+        if self.compression not in EXTENSIONS:
+            raise ValueError(f"compression must be one of {tuple(EXTENSIONS)}")
+        if self.compression == "zstd" and zstandard is None:
+            raise ImportError("zstandard is required for zstd compression")
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def path(self, endpoint: str, shard: str) -> str:
+        """returns the path of the shard of an endpoint"""
+        return os.path.join(
+            self.root, endpoint.lower(), f"{shard}{EXTENSIONS[self.compression]}"
+        )
+
+    def put(self, endpoint: str, params: Dict[str, Any], contents: str) -> None:
+        """appends a response text to the shard of its request"""
+        record = {
+            "endpoint": endpoint.lower(),
+            "params": normalize_params(params),
+            "fetched_at": time.time(),
+            "contents": contents,
+        }
+        data = _compress(
+            (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"),
+            self.compression,
+        )
+        path = self.path(endpoint, shard_of(params))
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "ab") as shard:
+                shard.write(data)
+            self.records += 1
+
+    def shards(
+        self, endpoints: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, str]]:
+        """lists the shards of the store
+
+        Args:
+            endpoints (Iterable[str], optional): endpoints to list. Defaults to None (all).
+
+        Returns:
+            List[Tuple[str, str]]: (endpoint, path) pairs sorted by endpoint and shard
+        """
+        if not os.path.isdir(self.root):
+            return []
+        if endpoints is None:
+            endpoints = sorted(os.listdir(self.root))
+        found = []
+        for endpoint in endpoints:
+            directory = os.path.join(self.root, endpoint.lower())
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(tuple(EXTENSIONS.values())):
+                    found.append((endpoint.lower(), os.path.join(directory, name)))
+        return found
+
+    def close(self) -> None:
+        """logs the number of landed responses"""
+        logger.info(f"Landing zone: {self.records} responses landed in {self.root}.")
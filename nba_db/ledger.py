@@ -0,0 +1,225 @@
+"""work ledger for resumable database builds and updates
+"""
+# -- Imports --------------------------------------------------------------------------
+import logging
+from datetime import datetime
+from typing import Any, Callable, Iterable, List, Optional
+
+from nba_db.trace import span
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+LEDGER_TABLE = "work_ledger"
+WHOLE_STAGE = "*"  # key of stages that are tracked as a single unit
+MAX_ATTEMPTS = 5  # units failing this often are no longer retried
+
+
+# -- Functions -----------------------------------------------------------------------
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def ensure_ledger(conn) -> None:
+    """creates the work ledger table if it does not exist yet
+
+    Args:
+        conn (sqlite3.Connection): database connection
+    """
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS {LEDGER_TABLE} (
+            stage TEXT NOT NULL,
+            key TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            error TEXT,
+            PRIMARY KEY (stage, key)
+        )"""
+    )
+    conn.commit()
+
+
+def has_ledger(conn) -> bool:
+    """checks whether the database contains a work ledger"""
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (LEDGER_TABLE,),
+        ).fetchone()
+        is not None
+    )
+
+
+def register(conn, stage: str, keys: Iterable[Any]) -> None:
+    """adds units of work as pending, leaving already known units untouched
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        stage (str): stage name, e.g. ``play_by_play``
+        keys (Iterable[Any]): unit keys, e.g. game ids
+    """
+    now = _now()
+    conn.executemany(
+        f"INSERT OR IGNORE INTO {LEDGER_TABLE} (stage, key, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?)",
+        [(stage, str(key), now, now) for key in keys],
+    )
+    conn.commit()
+
+
+def pending(conn, stage: Optional[str] = None) -> List[str]:
+    """returns the keys of all units that are not completed yet
+
+    Units that already failed ``MAX_ATTEMPTS`` times are left out.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        stage (str, optional): restrict to one stage. Defaults to None (all stages).
+
+    Returns:
+        List[str]: pending or failed unit keys in insertion order
+    """
+    query = (
+        f"SELECT key FROM {LEDGER_TABLE} "
+        f"WHERE status != 'done' AND attempts < {MAX_ATTEMPTS}"
+    )
+    params = ()
+    if stage is not None:
+        query += " AND stage = ?"
+        params = (stage,)
+    return [row[0] for row in conn.execute(query + " ORDER BY rowid", params)]
+
+
+def has_pending(
+    conn, stages: Optional[Iterable[str]] = None, key: Optional[Any] = None
+) -> bool:
+    """checks whether the database has a ledger with unfinished units
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        stages (Iterable[str], optional): only consider these stages, e.g. those of one kind of run. Defaults to None (all stages).
+        key (Any, optional): only consider units with this key, e.g. the month of a monthly run. Defaults to None (all keys).
+    """
+    if not has_ledger(conn):
+        return False
+    query = (
+        f"SELECT 1 FROM {LEDGER_TABLE} "
+        f"WHERE status != 'done' AND attempts < {MAX_ATTEMPTS}"
+    )
+    params = []
+    if stages is not None:
+        stages = list(stages)
+        query += f" AND stage IN ({', '.join('?' * len(stages))})"
+        params += stages
+    if key is not None:
+        query += " AND key = ?"
+        params.append(str(key))
+    return conn.execute(query + " LIMIT 1", params).fetchone() is not None
+
+
+def is_done(conn, stage: str, key: Any = WHOLE_STAGE) -> bool:
+    """checks whether a unit of work is completed"""
+    row = conn.execute(
+        f"SELECT status FROM {LEDGER_TABLE} WHERE stage = ? AND key = ?",
+        (stage, str(key)),
+    ).fetchone()
+    return row is not None and row[0] == "done"
+
+
+def mark(
+    conn, stage: str, keys: Iterable[Any], status: str, error: Optional[str] = None
+) -> None:
+    """records the outcome of an attempt at some units of work
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        stage (str): stage name
+        keys (Iterable[Any]): unit keys
+        status (str): one of ``done`` or ``failed``
+        error (str, optional): error message of a failed attempt. Defaults to None.
+    """
+    register(conn, stage, keys)
+    conn.executemany(
+        f"UPDATE {LEDGER_TABLE} SET status = ?, attempts = attempts + 1, "
+        "updated_at = ?, error = ? WHERE stage = ? AND key = ?",
+        [(status, _now(), error, stage, str(key)) for key in keys],
+    )
+    conn.commit()
+
+
+def run_stage(
+    conn,
+    stage: str,
+    func: Callable[[], Any],
+    key: Any = WHOLE_STAGE,
+    require_result: bool = True,
+) -> Any:
+    """runs a stage unless the ledger records it as completed
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        stage (str): stage name
+        func (Callable[[], Any]): stage function
+        key (Any, optional): unit key. Defaults to WHOLE_STAGE.
+        require_result (bool, optional): treat a None result (e.g. failed schema validation) as a failure. Defaults to True.
+
+    Returns:
+        Any: result of ``func``, None if the stage was skipped
+    """
+    if is_done(conn, stage, key):
+        logger.info(f"Stage {stage} ({key}) already completed. Skipping...")
+        return None
+    try:
+        with span(stage, "stage", key=str(key)):
+            result = func()
+    except Exception as exc:
+        mark(conn, stage, [key], "failed", repr(exc))
+        raise
+    if require_result and result is None:
+        mark(conn, stage, [key], "failed", "no result")
+    else:
+        mark(conn, stage, [key], "done")
+    return result
+
+
+def run_batches(
+    conn,
+    stage: str,
+    keys: Iterable[Any],
+    func: Callable[[List[str]], Optional[Iterable[Any]]],
+    batch_size: int = 1000,
+) -> None:
+    """runs a per-item stage over its pending units in batches
+
+    ``keys`` are registered first, then every unit that is not completed yet
+    (including units left over from an earlier, interrupted run) is passed to
+    ``func`` in batches. ``func`` returns the keys it completed; these are
+    marked done and the rest of the batch failed (all of it if ``func``
+    returns None), so a rerun only retries the remainder.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        stage (str): stage name
+        keys (Iterable[Any]): unit keys to register
+        func (Callable[[List[str]], Optional[Iterable[Any]]]): function processing a batch of keys and returning the completed ones
+        batch_size (int, optional): number of units per batch. Defaults to 1000.
+    """
+    register(conn, stage, keys)
+    todo = pending(conn, stage)
+    logger.info(f"Stage {stage}: {len(todo)} pending units.")
+    with span(stage, "stage", units=len(todo)):
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start : start + batch_size]
+            try:
+                with span(f"{stage} batch", "batch", first=batch[0], units=len(batch)):
+                    result = func(batch)
+            except Exception as exc:
+                mark(conn, stage, batch, "failed", repr(exc))
+                raise
+            completed = {str(key) for key in result} if result is not None else set()
+            done = [key for key in batch if key in completed]
+            failed = [key for key in batch if key not in completed]
+            mark(conn, stage, done, "done")
+            mark(conn, stage, failed, "failed", "no result")
@@ -3,15 +3,56 @@
 # == Imports ===============================================================
 import inspect
 import logging
+import multiprocessing
+import queue
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
 from functools import wraps
 from logging.config import fileConfig
-from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type
 
 import numpy as np
 import pandas as pd
 
+# == Constants =============================================================
+LOGGER_NAME = "nba_db_logger"
+SAMPLE_FIRST = 10  # occurrences of a per-item message that are always logged
+SAMPLE_EVERY = 100  # afterwards, only every n-th occurrence is logged
+
+_sample_counts: Dict[str, int] = {}
+_sample_lock = threading.Lock()
+
+
+# == Classes ===============================================================
+class LazyMessage:
+    """
+    Log message that is only formatted once a handler emits the record.
+    Args:
+        func (Callable[..., str]): Function returning the message.
+        *args: Positional arguments of func.
+        **kwargs: Keyword arguments of func.
+    """
+
+    def __init__(self, func: Callable[..., str], *args: Any, **kwargs: Any):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self._message = None
+
+    def __str__(self) -> str:
+        if self._message is None:
+            self._message = self.func(*self.args, **self.kwargs)
+        return self._message
+
+
+class _ForwardHandler(logging.Handler):
+    # hands records of worker processes to the logger of the parent process
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
 
 # == Functions =============================================================
 def init_logger(logger_type: str = "both") -> logging.Logger:
@@ -77,24 +118,33 @@ def log(
         # Get the function's signature for later use in binding arguments
         sig = inspect.signature(func)
 
-        @wraps(func)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
+        def bind(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
             # Bind the passed arguments to their names in the function signature
             bound_args = sig.bind(*args, **kwargs)
             bound_args.apply_defaults()
+            return bound_args.arguments
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # Arguments are only bound and formatted for records that are emitted
+            log_start = logger.isEnabledFor(log_level_start)
+            log_end = logger.isEnabledFor(log_level_end)
+            arguments = bind(args, kwargs) if log_start or log_end else None
 
             # Log the start of the function with the given log level
-            logger.log(
-                log_level_start,
-                format_log(
-                    func.__module__,
-                    func.__qualname__,
-                    "start",
-                    bound_args.arguments,
-                    max_result_length=max_result_length,
-                    preview_count=preview_count,
-                ),
-            )
+            if log_start:
+                logger.log(
+                    log_level_start,
+                    LazyMessage(
+                        format_log,
+                        func.__module__,
+                        func.__qualname__,
+                        "start",
+                        arguments,
+                        max_result_length=max_result_length,
+                        preview_count=preview_count,
+                    ),
+                )
 
             # Record the start time of the function for calculating execution time later
             start_time = time.perf_counter()
@@ -112,7 +162,7 @@ def log(
                     func.__module__,
                     func.__qualname__,
                     log_level,
-                    bound_args.arguments,
+                    arguments if arguments is not None else bind(args, kwargs),
                     max_result_length=max_result_length,
                     preview_count=preview_count,
                 )
@@ -125,19 +175,21 @@ def log(
                 execution_time = end_time - start_time
 
                 # Log the end of the function with the given log level
-                logger.log(
-                    log_level_end,
-                    format_log(
-                        func.__module__,
-                        func.__qualname__,
-                        "end",
-                        bound_args.arguments,
-                        result,
-                        execution_time,
-                        max_result_length=max_result_length,
-                        preview_count=preview_count,
-                    ),
-                )
+                if log_end:
+                    logger.log(
+                        log_level_end,
+                        LazyMessage(
+                            format_log,
+                            func.__module__,
+                            func.__qualname__,
+                            "end",
+                            arguments,
+                            result,
+                            execution_time,
+                            max_result_length=max_result_length,
+                            preview_count=preview_count,
+                        ),
+                    )
 
             return result
 
@@ -169,7 +221,10 @@ def handle_exception(
         None
     """
     logger = logging.getLogger(func_module)
-    error_msg = format_log(
+    if not logger.isEnabledFor(log_level):
+        return
+    error_msg = LazyMessage(
+        format_log,
         func_module,
         func_name,
         "error",
@@ -200,6 +255,137 @@ def get_log_level(
     return default_log_level
 
 
+def log_sampled(
+    logger: logging.Logger,
+    level: int,
+    key: str,
+    msg: str,
+    *args: Any,
+    first: int = SAMPLE_FIRST,
+    every: int = SAMPLE_EVERY,
+    **kwargs: Any,
+) -> bool:
+    """
+    Log a per-item message, e.g. once per game, without flooding the log.
+    The first occurrences of a key are logged, afterwards only every n-th one
+    together with the number of occurrences so far. The message is formatted
+    lazily with the args, like any logging call.
+    Args:
+        logger (logging.Logger): The logger to log with.
+        level (int): The logging level of the message.
+        key (str): The kind of message occurrences are counted by.
+        msg (str): The message format string.
+        *args: Arguments merged into msg.
+        first (int, optional): Occurrences that are always logged. Defaults to SAMPLE_FIRST.
+        every (int, optional): Log every n-th occurrence after the first ones. Defaults to SAMPLE_EVERY.
+        **kwargs: Keyword arguments of Logger.log, e.g. exc_info.
+    Returns:
+        bool: Whether the message was logged.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    with _sample_lock:
+        count = _sample_counts[key] = _sample_counts.get(key, 0) + 1
+    if count <= first:
+        logger.log(level, msg, *args, **kwargs)
+        return True
+    if (count - first) % every:
+        return False
+    logger.log(level, msg + " (%d occurrences so far)", *args, count, **kwargs)
+    return True
+
+
+def reset_sampling() -> None:
+    """
+    Reset the occurrence counts of log_sampled, e.g. at the start of a run.
+    """
+    with _sample_lock:
+        _sample_counts.clear()
+
+
+def start_queue_logging(
+    logger_name: str = LOGGER_NAME, log_queue: Optional[queue.Queue] = None
+) -> QueueListener:
+    """
+    Move the handlers of a logger behind a queue. Logging calls only put the
+    record on the queue and a listener thread writes it to the console and
+    files, so threads logging from the hot path never wait for I/O.
+    Args:
+        logger_name (str, optional): The logger to move the handlers of. Defaults to LOGGER_NAME.
+        log_queue (Optional[queue.Queue], optional): The queue to use. Defaults to None (an unbounded queue).
+    Returns:
+        QueueListener: The started listener, see stop_queue_logging.
+    """
+    logger = logging.getLogger(logger_name)
+    handlers = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+    log_queue = log_queue if log_queue is not None else queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    return listener
+
+
+def stop_queue_logging(listener: QueueListener, logger_name: str = LOGGER_NAME) -> None:
+    """
+    Write the queued records and give the handlers back to the logger.
+    Args:
+        listener (QueueListener): The listener returned by start_queue_logging.
+        logger_name (str, optional): The logger the handlers were moved from. Defaults to LOGGER_NAME.
+    """
+    listener.stop()
+    logger = logging.getLogger(logger_name)
+    for handler in logger.handlers[:]:
+        if isinstance(handler, QueueHandler) and handler.queue is listener.queue:
+            logger.removeHandler(handler)
+    for handler in listener.handlers:
+        logger.addHandler(handler)
+
+
+def init_worker_logging(
+    log_queue: Any, level: int, logger_name: str = LOGGER_NAME
+) -> None:
+    """
+    Send the records of a worker process to the parent process, see
+    worker_logging. Used as the initializer of a process pool.
+    Args:
+        log_queue (multiprocessing.Queue): The queue the parent listens on.
+        level (int): The logging level of the parent's logger.
+        logger_name (str, optional): The logger of the worker. Defaults to LOGGER_NAME.
+    """
+    logger = logging.getLogger(logger_name)
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+@contextmanager
+def worker_logging(
+    logger_name: str = LOGGER_NAME, context: Optional[Any] = None
+) -> Iterator[Tuple[Callable, Tuple[Any, ...]]]:
+    """
+    Collect the records of worker processes in the parent process, so
+    workers never write to the console or log files themselves.
+    Args:
+        logger_name (str, optional): The logger of the workers. Defaults to LOGGER_NAME.
+        context (multiprocessing.context.BaseContext, optional): The start method context of the pool, e.g. multiprocessing.get_context("spawn"). Defaults to None (the default context).
+    Yields:
+        Tuple[Callable, Tuple[Any, ...]]: The initializer and initargs of a ProcessPoolExecutor.
+    """
+    logger = logging.getLogger(logger_name)
+    log_queue = (context or multiprocessing).Queue()
+    listener = QueueListener(log_queue, _ForwardHandler())
+    listener.start()
+    try:
+        yield init_worker_logging, (log_queue, logger.getEffectiveLevel(), logger_name)
+    finally:
+        listener.stop()
+        log_queue.close()
+
+
 def format_log(
     func_module: str,
     func_name: str,
@@ -0,0 +1,321 @@
+"""run metrics: request latencies, retries, rows and queue depths
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+METRICS_DIR = os.environ.get("NBA_DB_METRICS_DIR", os.path.join("logs", "metrics"))
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROWS_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 1024)
+QUANTILES = (0.5, 0.95, 0.99)
+# name: (type, help, histogram buckets) of every recorded metric
+METRICS = {
+    "nba_db_request_duration_seconds": (
+        "histogram",
+        "Duration of endpoint request attempts by outcome.",
+        LATENCY_BUCKETS,
+    ),
+    "nba_db_request_retries_total": (
+        "counter",
+        "Failed request attempts that were retried, by error type.",
+        None,
+    ),
+    "nba_db_request_failures_total": (
+        "counter",
+        "Requests that failed after their last attempt, by error type.",
+        None,
+    ),
+    "nba_db_cache_hits_total": (
+        "counter",
+        "Requests served from the response cache.",
+        None,
+    ),
+    "nba_db_proxy_requests_total": (
+        "counter",
+        "Request attempts sent through a proxy by outcome.",
+        None,
+    ),
+    "nba_db_rows_validated_total": (
+        "counter",
+        "Rows validated against a data schema.",
+        None,
+    ),
+    "nba_db_validation_duration_seconds": (
+        "histogram",
+        "Duration of the validation of a frame.",
+        LATENCY_BUCKETS,
+    ),
+    "nba_db_rows_written_total": (
+        "counter",
+        "Rows upserted into a database table.",
+        None,
+    ),
+    "nba_db_write_duration_seconds": (
+        "histogram",
+        "Duration of writes of a frame to a database table.",
+        LATENCY_BUCKETS,
+    ),
+    "nba_db_write_rows": (
+        "histogram",
+        "Rows per write to a database table.",
+        ROWS_BUCKETS,
+    ),
+    "nba_db_queue_depth": (
+        "histogram",
+        "Items waiting in a queue, sampled whenever one is added or taken.",
+        DEPTH_BUCKETS,
+    ),
+    "nba_db_run_duration_seconds": (
+        "gauge",
+        "Duration of the run.",
+        None,
+    ),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+# -- Classes -------------------------------------------------------------------------
+class Histogram:
+    """observations counted in fixed buckets
+
+    Args:
+        buckets (Sequence[float]): upper bounds of the buckets, sorted
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """estimates a quantile by linear interpolation within its bucket"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            **{f"p{round(q * 100)}": self.quantile(q) for q in QUANTILES},
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    """thread-safe registry of the metrics of a run
+
+    Counters, gauges and histograms are keyed by the names in ``METRICS``
+    and a set of labels, e.g. ``endpoint="playbyplayv2"``. The fetch engine,
+    validation, the database writes and the queues record into the registry
+    set with :func:`set_registry`; :meth:`export` writes it as a Prometheus
+    text file and a JSON run summary.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._values: Dict[str, Dict[Labels, Any]] = {name: {} for name in METRICS}
+
+    def _key(self, name: str, labels: Dict[str, Any]) -> Labels:
+        if name not in METRICS:
+            raise KeyError(f"unknown metric {name}")
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """increases a counter
+
+        Args:
+            name (str): metric name, a key of ``METRICS``
+            value (float, optional): increment. Defaults to 1.
+            **labels: labels of the series, e.g. ``endpoint="playbyplayv2"``
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """sets a gauge, see :meth:`inc`"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[name][key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """adds an observation to a histogram, see :meth:`inc`"""
+        key = self._key(name, labels)
+        with self._lock:
+            values = self._values[name]
+            if key not in values:
+                values[key] = Histogram(METRICS[name][2])
+            values[key].observe(value)
+
+    def get(self, name: str, **labels) -> Any:
+        """returns the value (or histogram) of a series, None if it was never recorded"""
+        key = self._key(name, labels)
+        with self._lock:
+            return self._values[name].get(key)
+
+    def to_prometheus(self) -> str:
+        """renders the registry in the Prometheus text exposition format
+
+        Returns:
+            str: text of every recorded series, e.g. for the node exporter's textfile collector
+        """
+        lines = []
+        with self._lock:
+            for name, values in self._values.items():
+                if not values:
+                    continue
+                kind, help_text, _ = METRICS[name]
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for labels, value in sorted(values.items()):
+                    if kind != "histogram":
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                        continue
+                    cumulative = 0
+                    bounds = [*value.buckets, math.inf]
+                    for bound, count in zip(bounds, value.counts):
+                        cumulative += count
+                        le = (("le", "+Inf" if bound == math.inf else _number(bound)),)
+                        lines.append(
+                            f"{name}_bucket{_labels(labels + le)} {cumulative}"
+                        )
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(value.sum)}")
+                    lines.append(f"{name}_count{_labels(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, run: str) -> Dict[str, Any]:
+        """summarizes the registry
+
+        Args:
+            run (str): name of the run, e.g. ``daily``
+
+        Returns:
+            Dict[str, Any]: run name, start, end and duration, and every series by metric with its labels and value, histograms as count, sum, mean, p50, p95, p99 and max
+        """
+        finished = time.time()
+        metrics = {}
+        with self._lock:
+            for name, values in self._values.items():
+                if not values:
+                    continue
+                metrics[name] = [
+                    {
+                        "labels": dict(labels),
+                        **(
+                            value.summary()
+                            if isinstance(value, Histogram)
+                            else {"value": value}
+                        ),
+                    }
+                    for labels, value in sorted(values.items())
+                ]
+        return {
+            "run": run,
+            "started_at": datetime.fromtimestamp(self.started).isoformat(),
+            "finished_at": datetime.fromtimestamp(finished).isoformat(),
+            "duration_seconds": finished - self.started,
+            "metrics": metrics,
+        }
+
+    def export(self, run: str, directory: Optional[str] = None) -> List[str]:
+        """writes the Prometheus text file and the JSON summary of a run
+
+        The text file ``<run>.prom`` is replaced on every run, summaries are
+        kept as ``<run>-<start time>.json``.
+
+        Args:
+            run (str): name of the run, e.g. ``daily``
+            directory (str, optional): output directory. Defaults to None (``$NBA_DB_METRICS_DIR``, ``logs/metrics``).
+
+        Returns:
+            List[str]: paths of the text file and the summary
+        """
+        directory = directory or METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.set("nba_db_run_duration_seconds", time.time() - self.started, run=run)
+        prom_path = os.path.join(directory, f"{run}.prom")
+        # written next to the target and renamed, so collectors never read half a file
+        with open(prom_path + ".tmp", "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(prom_path + ".tmp", prom_path)
+        started = datetime.fromtimestamp(self.started).strftime("%Y%m%dT%H%M%S")
+        summary_path = os.path.join(directory, f"{run}-{started}.json")
+        with open(summary_path, "w") as f:
+            json.dump(self.summary(run), f, indent=2)
+        logger.info(f"Exported {run} metrics to {prom_path} and {summary_path}.")
+        return [prom_path, summary_path]
+
+
+# -- Functions -----------------------------------------------------------------------
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """returns the registry metrics are recorded into"""
+    return _registry
+
+
+def set_registry(registry: MetricsRegistry) -> None:
+    """sets the registry metrics are recorded into, e.g. a new one per run
+
+    Args:
+        registry (MetricsRegistry): registry to use
+    """
+    global _registry
+    _registry = registry
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    """increases a counter of the current registry, see :meth:`MetricsRegistry.inc`"""
+    _registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """adds an observation to a histogram of the current registry, see :meth:`MetricsRegistry.observe`"""
+    _registry.observe(name, value, **labels)
@@ -0,0 +1,543 @@
+"""local stand-in for the stats.nba.com API
+"""
+# -- Imports --------------------------------------------------------------------------
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+from nba_api.stats.library.http import NBAStatsHTTP
+from requests.exceptions import RequestException
+
+from nba_db.cache import cache_key
+from nba_db.fetch import DEFAULT_CONCURRENCY, fetch_iter, get_session
+from nba_db.landing import EXTENSIONS, LandingStore, shard_of
+from nba_db.logger import init_logger
+from nba_db.replay import ENDPOINT_PARSERS, latest_records
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+MOCK_ENDPOINTS = tuple(ENDPOINT_PARSERS)  # every endpoint requested by the extraction
+DEAD_PROXY_MODES = ("refuse", "hang", "garbage")
+SERVER_ERROR_CODES = (500, 502, 503, 504)
+OUTCOMES = ("ok", "recorded", "missing", "throttled", "error", "blocked", "hung")
+ERROR_BODY = '{"Message":"An error has occurred."}'
+BLOCK_PAGE = "<html><body><h1>Access Denied</h1></body></html>"
+PROBE_ENDPOINT = "probe"  # requests for anything but the API, e.g. proxy checks
+
+
+# -- Functions -----------------------------------------------------------------------
+def fixture_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """returns the key a response is served under
+
+    Parameters without a value are ignored, because ``requests`` drops the
+    parameters nba_api sets to None from the query string.
+
+    Args:
+        endpoint (str): endpoint name
+        params (Dict[str, Any]): request parameters
+
+    Returns:
+        str: cache key of the endpoint and its non-empty parameters
+    """
+    return cache_key(
+        endpoint, {k: v for k, v in params.items() if v is not None and v != ""}
+    )
+
+
+def measure(
+    func: Callable, items: Iterable, concurrency: int = DEFAULT_CONCURRENCY
+) -> Dict[str, float]:
+    """measures the throughput and latency of ``func`` over ``items``
+
+    Meant for load tests against a :class:`MockStatsServer`, e.g. with
+    ``func`` requesting an endpoint through :func:`nba_db.fetch.request`.
+
+    Args:
+        func (Callable): blocking function of one argument
+        items (Iterable): items to call ``func`` on
+        concurrency (int, optional): maximum number of concurrent calls. Defaults to DEFAULT_CONCURRENCY.
+
+    Returns:
+        Dict[str, float]: number of calls and failures, total seconds, calls per second and the p50, p95 and p99 latency in seconds
+    """
+
+    def timed(item) -> Tuple[bool, float]:
+        start = time.perf_counter()
+        try:
+            func(item)
+        except Exception:  # every failure is counted, the load test goes on
+            return False, time.perf_counter() - start
+        return True, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [result for _, result in fetch_iter(timed, items, concurrency)]
+    seconds = time.perf_counter() - start
+    latencies = pd.Series([latency for _, latency in results], dtype=float)
+    return {
+        "requests": len(results),
+        "failures": sum(not ok for ok, _ in results),
+        "seconds": seconds,
+        "throughput": len(results) / seconds if seconds > 0 else 0.0,
+        "p50": latencies.quantile(0.5) if len(latencies) else 0.0,
+        "p95": latencies.quantile(0.95) if len(latencies) else 0.0,
+        "p99": latencies.quantile(0.99) if len(latencies) else 0.0,
+    }
+
+
+def _free_port(host: str) -> int:
+    # a port nothing listens on, connections to it are refused
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+# -- Classes -------------------------------------------------------------------------
+class LatencyModel:
+    """distribution of the delay the mock server waits before answering
+
+    Args:
+        distribution (str, optional): ``fixed``, ``uniform``, ``exponential`` or ``lognormal``. Defaults to "fixed".
+        median (float, optional): median delay in seconds. Defaults to 0.
+        spread (float, optional): half width of ``uniform`` delays or standard deviation of the log of ``lognormal`` delays. Defaults to 0.
+        maximum (float, optional): longest delay in seconds. Defaults to None.
+    """
+
+    DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+    def __init__(
+        self,
+        distribution: str = "fixed",
+        median: float = 0.0,
+        spread: float = 0.0,
+        maximum: Optional[float] = None,
+    ):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {self.DISTRIBUTIONS}")
+        self.distribution = distribution
+        self.median = median
+        self.spread = spread
+        self.maximum = maximum
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """parses a latency model of the form ``distribution:median[,spread[,maximum]]``
+
+        Args:
+            spec (str): e.g. ``lognormal:0.3,0.8`` or ``0.1`` for a fixed delay
+
+        Raises:
+            ValueError: raised if the distribution or a number is invalid
+
+        Returns:
+            LatencyModel: parsed latency model
+        """
+        distribution, _, numbers = spec.rpartition(":")
+        return cls(distribution or "fixed", *map(float, numbers.split(",")))
+
+    def sample(self, rng: random.Random) -> float:
+        """draws a delay in seconds"""
+        if self.median <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            delay = rng.uniform(self.median - self.spread, self.median + self.spread)
+        elif self.distribution == "exponential":
+            delay = rng.expovariate(math.log(2) / self.median)
+        elif self.distribution == "lognormal":
+            delay = self.median * rng.lognormvariate(0.0, self.spread)
+        else:
+            delay = self.median
+        if self.maximum is not None:
+            delay = min(delay, self.maximum)
+        return max(0.0, delay)
+
+    def __repr__(self) -> str:
+        return (
+            f"LatencyModel({self.distribution!r}, median={self.median}, "
+            f"spread={self.spread}, maximum={self.maximum})"
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # answers both direct requests and requests sent through a proxy listener
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        mock, mode = self.server.mock, self.server.mode
+        url = urlsplit(self.path)
+        endpoint = (
+            url.path.rsplit("/", 1)[-1].lower()
+            if url.path.startswith("/stats/")
+            else PROBE_ENDPOINT
+        )
+        if mode == "hang":
+            mock._count(endpoint, "hung", 0.0)
+            mock._stopped.wait(mock.hang)
+            self.close_connection = True
+        elif mode == "api" and url.path == "/proxies.txt":
+            self._send(200, "\n".join(mock.proxy_list), "text/plain")
+        elif endpoint == PROBE_ENDPOINT:
+            mock._count(endpoint, "ok", 0.0)
+            self._send(200, "ok", "text/plain")
+        elif mode == "garbage":
+            mock._count(endpoint, "blocked", 0.0)
+            self._send(200, BLOCK_PAGE, "text/html")
+        else:
+            params = dict(parse_qsl(url.query, keep_blank_values=True))
+            status, body, headers = mock.respond(endpoint, params)
+            self._send(status, body, "application/json", headers)
+
+    def _send(
+        self,
+        status: int,
+        body: str,
+        content_type: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"Mock server {self.address_string()}: {format % args}")
+
+
+class MockStatsServer:
+    """local HTTP server standing in for stats.nba.com
+
+    Responses are served from a fixture store in the landing zone format (see
+    :class:`nba_db.landing.LandingStore`), so every response landed by a real
+    run can be replayed, and the latest response of a request wins. Shards are
+    loaded the first time one of their requests comes in. Requests of other
+    endpoints or without a fixture are answered with a 404.
+
+    Faults are injected to measure concurrency, retry and proxy strategies:
+    every request waits for a delay drawn from ``latency`` and is then
+    throttled (429 with ``Retry-After``) with probability ``throttle_rate`` or
+    fails (5xx) with probability ``error_rate``. The server also listens as
+    ``proxies`` HTTP proxies and lists ``dead_proxies`` more that refuse
+    connections, hang until the client times out or answer proxy checks but
+    block API requests with an HTML page. :attr:`proxy_list` is served at
+    ``/proxies.txt`` in the format of the public proxy lists.
+
+    In recorder mode requests without a fixture are forwarded to ``upstream``
+    and successful responses are added to the fixture store.
+
+    Point the extraction at the server with :func:`nba_db.fetch.set_base_url`
+    (or ``$NBA_DB_STATS_URL``) and ``$NBA_DB_PROXY_LISTS``.
+
+    Args:
+        landing_dir (str, optional): fixture store. Defaults to None (``LANDING_DIR``).
+        host (str, optional): address to listen on. Defaults to "127.0.0.1".
+        port (int, optional): port of the API, 0 picks a free port. Defaults to 0.
+        latency (LatencyModel, optional): delay before every API response. Defaults to None (no delay).
+        error_rate (float, optional): share of API requests failing with a 5xx. Defaults to 0.
+        throttle_rate (float, optional): share of API requests throttled with a 429. Defaults to 0.
+        retry_after (float, optional): ``Retry-After`` of throttled responses in seconds. Defaults to 1.
+        proxies (int, optional): number of working proxies. Defaults to 0.
+        dead_proxies (int, optional): number of dead proxies. Defaults to 0.
+        dead_proxy_modes (Sequence[str], optional): behaviours of dead proxies, assigned in turn. Defaults to DEAD_PROXY_MODES.
+        hang (float, optional): seconds a hanging proxy holds a connection. Defaults to 60.
+        record (bool, optional): whether to record missing fixtures from ``upstream``. Defaults to False.
+        upstream (str, optional): url template of the recorded API. Defaults to None (stats.nba.com).
+        upstream_proxy (str, optional): proxy to record through, of the form host:port. Defaults to None.
+        timeout (float, optional): timeout of upstream requests in seconds. Defaults to 30.
+        seed (int, optional): seed of the fault injection. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        landing_dir: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        proxies: int = 0,
+        dead_proxies: int = 0,
+        dead_proxy_modes: Sequence[str] = DEAD_PROXY_MODES,
+        hang: float = 60.0,
+        record: bool = False,
+        upstream: Optional[str] = None,
+        upstream_proxy: Optional[str] = None,
+        timeout: float = 30.0,
+        seed: Optional[int] = None,
+    ):
+        unknown = [mode for mode in dead_proxy_modes if mode not in DEAD_PROXY_MODES]
+        if unknown or (dead_proxies and not dead_proxy_modes):
+            raise ValueError(f"dead_proxy_modes must be among {DEAD_PROXY_MODES}")
+        self.store = LandingStore(landing_dir)
+        self.host = host
+        self.port = port
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.proxies = proxies
+        self.dead_proxies = dead_proxies
+        self.dead_proxy_modes = tuple(dead_proxy_modes)
+        self.hang = hang
+        self.record = record
+        self.upstream = upstream or NBAStatsHTTP.base_url
+        self.upstream_proxy = upstream_proxy
+        self.timeout = timeout
+        self.proxy_list: List[str] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._fixtures: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._delays: Dict[str, List[float]] = {}
+        self._servers: List[ThreadingHTTPServer] = []
+
+    def __enter__(self) -> "MockStatsServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        """url template of the API, see :func:`nba_db.fetch.set_base_url`"""
+        return f"http://{self.host}:{self.port}/stats/{{endpoint}}"
+
+    @property
+    def proxy_list_url(self) -> str:
+        """url of the proxy list, see ``$NBA_DB_PROXY_LISTS``"""
+        return f"http://{self.host}:{self.port}/proxies.txt"
+
+    def start(self) -> "MockStatsServer":
+        """starts the API and proxy listeners in background threads"""
+        self._stopped.clear()
+        self.port = self._listen(self.port, "api")
+        modes = ["proxy"] * self.proxies + [
+            self.dead_proxy_modes[i % len(self.dead_proxy_modes)]
+            for i in range(self.dead_proxies)
+        ]
+        proxy_list = []
+        for mode in modes:
+            port = _free_port(self.host) if mode == "refuse" else self._listen(0, mode)
+            proxy_list.append(f"{self.host}:{port}")
+        self._rng.shuffle(proxy_list)
+        self.proxy_list = proxy_list
+        logger.info(
+            f"Mock server listening at {self.base_url} with {self.proxies} proxies "
+            f"and {self.dead_proxies} dead proxies."
+        )
+        return self
+
+    def _listen(self, port: int, mode: str) -> int:
+        server = ThreadingHTTPServer((self.host, port), _Handler)
+        server.mock = self
+        server.mode = mode
+        threading.Thread(
+            target=server.serve_forever, name=f"nba_db-mock-{mode}", daemon=True
+        ).start()
+        self._servers.append(server)
+        return server.server_address[1]
+
+    def stop(self) -> None:
+        """stops all listeners and releases hanging connections"""
+        self._stopped.set()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+
+    def respond(
+        self, endpoint: str, params: Dict[str, str]
+    ) -> Tuple[int, str, Dict[str, str]]:
+        """answers an API request, injecting the configured faults
+
+        Args:
+            endpoint (str): endpoint name, e.g. ``playbyplayv2``
+            params (Dict[str, str]): query parameters
+
+        Returns:
+            Tuple[int, str, Dict[str, str]]: status code, body and extra headers
+        """
+        endpoint = endpoint.lower()
+        delay = self.latency.sample(self._rng)
+        if delay > 0:
+            self._stopped.wait(delay)
+        roll = self._rng.random()
+        if roll < self.throttle_rate:
+            self._count(endpoint, "throttled", delay)
+            return 429, "", {"Retry-After": f"{self.retry_after:g}"}
+        if roll < self.throttle_rate + self.error_rate:
+            self._count(endpoint, "error", delay)
+            return self._rng.choice(SERVER_ERROR_CODES), ERROR_BODY, {}
+        contents = self.fixture(endpoint, params)
+        if contents is not None:
+            self._count(endpoint, "ok", delay)
+            return 200, contents, {}
+        if self.record and endpoint in MOCK_ENDPOINTS:
+            contents = self._record(endpoint, params)
+            if contents is not None:
+                self._count(endpoint, "recorded", delay)
+                return 200, contents, {}
+        self._count(endpoint, "missing", delay)
+        return 404, f"No fixture for {endpoint} {params}", {}
+
+    def fixture(self, endpoint: str, params: Dict[str, str]) -> Optional[str]:
+        """returns the recorded response of a request
+
+        Args:
+            endpoint (str): endpoint name
+            params (Dict[str, str]): request parameters
+
+        Returns:
+            Optional[str]: latest landed response text, None if the request was never recorded
+        """
+        endpoint = endpoint.lower()
+        shard = (endpoint, shard_of(params))
+        with self._lock:
+            fixtures = self._fixtures.get(shard)
+            if fixtures is None:
+                fixtures = self._fixtures[shard] = self._load_shard(*shard)
+            return fixtures.get(fixture_key(endpoint, params))
+
+    def _load_shard(self, endpoint: str, shard: str) -> Dict[str, str]:
+        fixtures = {}
+        for extension in EXTENSIONS.values():
+            path = os.path.join(self.store.root, endpoint, f"{shard}{extension}")
+            if os.path.exists(path):
+                for record in latest_records(path):
+                    fixtures[fixture_key(endpoint, record["params"])] = record[
+                        "contents"
+                    ]
+        logger.debug(f"Mock server loaded {len(fixtures)} {endpoint} {shard} fixtures.")
+        return fixtures
+
+    def _record(self, endpoint: str, params: Dict[str, str]) -> Optional[str]:
+        proxy = self.upstream_proxy
+        try:
+            response = get_session().get(
+                self.upstream.format(endpoint=endpoint),
+                params=sorted(params.items(), key=lambda kv: kv[0]),
+                headers=NBAStatsHTTP.headers,
+                proxies={"http": proxy, "https": proxy} if proxy else None,
+                timeout=self.timeout,
+            )
+        except RequestException as exc:
+            logger.warning(f"Recording {endpoint} {params} failed: {exc!r}")
+            return None
+        contents = NBAStatsHTTP().clean_contents(response.text)
+        try:
+            json.loads(contents)
+        except ValueError:
+            logger.warning(f"Recording {endpoint} {params} returned invalid JSON.")
+            return None
+        if not response.ok:
+            logger.warning(
+                f"Recording {endpoint} {params} returned HTTP {response.status_code}."
+            )
+            return None
+        self.store.put(endpoint, params, contents)
+        with self._lock:
+            fixtures = self._fixtures.get((endpoint, shard_of(params)))
+            if fixtures is not None:
+                fixtures[fixture_key(endpoint, params)] = contents
+        return contents
+
+    def _count(self, endpoint: str, outcome: str, delay: float) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, dict.fromkeys(OUTCOMES, 0))
+            counts[outcome] += 1
+            self._delays.setdefault(endpoint, []).append(delay)
+
+    def stats(self) -> pd.DataFrame:
+        """returns the requests served so far
+
+        Returns:
+            pd.DataFrame: one row per endpoint with the number of requests per outcome and the p50 and p99 injected delay in seconds
+        """
+        with self._lock:
+            rows = [
+                {
+                    "endpoint": endpoint,
+                    "requests": sum(counts.values()),
+                    **counts,
+                    "delay_p50": pd.Series(self._delays[endpoint]).quantile(0.5),
+                    "delay_p99": pd.Series(self._delays[endpoint]).quantile(0.99),
+                }
+                for endpoint, counts in sorted(self._counts.items())
+            ]
+        columns = ["endpoint", "requests", *OUTCOMES, "delay_p50", "delay_p99"]
+        return pd.DataFrame(rows, columns=columns)
+
+
+# -- Main ----------------------------------------------------------------------------
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """runs a mock server until interrupted
+
+    Args:
+        argv (Sequence[str], optional): command line arguments. Defaults to None (``sys.argv``).
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m nba_db.mock_server", description=__doc__.strip()
+    )
+    parser.add_argument("--landing-dir", help="fixture store (landing zone format)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--latency",
+        type=LatencyModel.parse,
+        default=None,
+        help="distribution:median[,spread[,maximum]], e.g. lognormal:0.3,0.8",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--proxies", type=int, default=0)
+    parser.add_argument("--dead-proxies", type=int, default=0)
+    parser.add_argument(
+        "--dead-proxy-modes",
+        nargs="+",
+        default=DEAD_PROXY_MODES,
+        choices=DEAD_PROXY_MODES,
+    )
+    parser.add_argument("--hang", type=float, default=60.0)
+    parser.add_argument(
+        "--record", action="store_true", help="record missing fixtures upstream"
+    )
+    parser.add_argument("--upstream", help="url template of the recorded API")
+    parser.add_argument("--upstream-proxy", help="proxy to record through")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    init_logger("console")
+    server = MockStatsServer(**vars(args)).start()
+    logger.info(
+        f"Point nba_db at the mock server with:\n"
+        f"export NBA_DB_STATS_URL={server.base_url}\n"
+        f"export NBA_DB_PROXY_LISTS={server.proxy_list_url}"
+    )
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(f"Mock server requests:\n{server.stats().to_string()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        logger.info(f"Mock server requests:\n{server.stats().to_string()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""adaptive proxy pool with health scoring
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Iterable, List, Optional
+
+import pandas as pd
+import requests
+
+from nba_db.cache import CACHE_DIR, DAY
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+LATENCY_ALPHA = 0.3  # weight of the newest sample in the latency moving average
+INITIAL_LATENCY = 1.0  # assumed latency in seconds of a proxy without samples
+FAILURE_THRESHOLD = 2  # consecutive failures before a proxy is quarantined
+PROBE_URL = "http://example.com"
+KNOWN_PROXIES_PATH = os.path.join(CACHE_DIR, "proxies.json")
+KNOWN_PROXY_MAX_AGE = DAY  # seconds a proxy that last worked is tried first
+
+
+# -- Classes -------------------------------------------------------------------------
+class ProxyHealth:
+    """running health statistics of a single proxy"""
+
+    def __init__(self, proxy: str):
+        self.proxy = proxy
+        self.requests = 0
+        self.successes = 0
+        self.consecutive_failures = 0
+        self.latency = INITIAL_LATENCY
+        self.quarantined_until = 0.0
+        self.last_ok = None  # wall clock time of the last successful request
+
+    @property
+    def success_rate(self) -> float:
+        """success rate with a uniform prior, so new proxies start at 0.5"""
+        return (self.successes + 1) / (self.requests + 2)
+
+    @property
+    def score(self) -> float:
+        """higher is better: successful and fast proxies score highest"""
+        return self.success_rate / max(self.latency, 1e-3)
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.quarantined_until
+
+
+class ProxyPool:
+    """pool of proxies that prefers healthy, low-latency proxies
+
+    Every request outcome is reported back with :meth:`report`. Proxies failing
+    ``FAILURE_THRESHOLD`` times in a row are quarantined with exponential
+    backoff; once a quarantine expires the proxy is re-probed by a background
+    thread (see :meth:`start_probing`) before it is handed out again.
+    :meth:`acquire` picks the better of two random available proxies, which
+    favours good proxies without sending all traffic to a single one.
+
+    The pool can be filled while it is in use: :meth:`start_discovery` adds
+    proxies from a streaming source as they validate and :meth:`wait` blocks
+    until enough of them are in the pool to start extracting.
+
+    Args:
+        proxies (Iterable[str], optional): proxy addresses of the form host:port. Defaults to ().
+        base_backoff (float, optional): first quarantine in seconds. Defaults to 5.
+        max_backoff (float, optional): longest quarantine in seconds. Defaults to 600.
+    """
+
+    def __init__(
+        self,
+        proxies: Iterable[str] = (),
+        base_backoff: float = 5.0,
+        max_backoff: float = 600.0,
+    ):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._health = {}
+        self._stop = threading.Event()
+        self._prober = None
+        self._discoverer = None
+        for proxy in proxies:
+            self.add(proxy)
+
+    def __len__(self) -> int:
+        return len(self._health)
+
+    def __iter__(self):
+        return iter(list(self._health))
+
+    def add(self, proxy: str, validated: bool = False) -> None:
+        """adds a proxy to the pool, ignoring proxies already known
+
+        Args:
+            proxy (str): proxy address of the form host:port
+            validated (bool, optional): whether the proxy just answered a probe. Defaults to False.
+        """
+        with self._lock:
+            if proxy not in self._health:
+                self._health[proxy] = ProxyHealth(proxy)
+            if validated:
+                self._health[proxy].last_ok = time.time()
+            self._changed.notify_all()
+
+    def acquire(self) -> Optional[str]:
+        """returns a proxy to send the next request through
+
+        Returns:
+            Optional[str]: best of two random available proxies. If every proxy is quarantined the one released soonest, None if the pool is empty.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._health:
+                return None
+            available = [h for h in self._health.values() if h.is_available(now)]
+            if not available:
+                return min(
+                    self._health.values(), key=lambda h: h.quarantined_until
+                ).proxy
+            if len(available) == 1:
+                return available[0].proxy
+            first, second = random.sample(available, 2)
+            return (first if first.score >= second.score else second).proxy
+
+    def report(self, proxy: Optional[str], ok: bool, latency: float) -> None:
+        """records the outcome of a request sent through a proxy
+
+        Args:
+            proxy (str): proxy the request was sent through
+            ok (bool): whether the request succeeded
+            latency (float): request duration in seconds
+        """
+        if proxy is None:
+            return
+        with self._lock:
+            health = self._health.get(proxy)
+            if health is None:
+                return
+            health.requests += 1
+            health.latency += LATENCY_ALPHA * (latency - health.latency)
+            if ok:
+                health.successes += 1
+                health.last_ok = time.time()
+                health.consecutive_failures = 0
+                health.quarantined_until = 0.0
+            else:
+                health.consecutive_failures += 1
+                if health.consecutive_failures >= FAILURE_THRESHOLD:
+                    self._quarantine(health)
+
+    def _quarantine(self, health: ProxyHealth) -> None:
+        exponent = health.consecutive_failures - FAILURE_THRESHOLD
+        backoff = min(self.max_backoff, self.base_backoff * 2**exponent)
+        health.quarantined_until = time.monotonic() + backoff
+
+    def stats(self) -> pd.DataFrame:
+        """returns the health statistics of all proxies
+
+        Returns:
+            pd.DataFrame: one row per proxy, best scoring first
+        """
+        now = time.monotonic()
+        with self._lock:
+            rows = [
+                {
+                    "proxy": h.proxy,
+                    "requests": h.requests,
+                    "successes": h.successes,
+                    "success_rate": h.success_rate,
+                    "latency": h.latency,
+                    "consecutive_failures": h.consecutive_failures,
+                    "quarantined_for": max(0.0, h.quarantined_until - now),
+                    "score": h.score,
+                }
+                for h in self._health.values()
+            ]
+        columns = [
+            "proxy",
+            "requests",
+            "successes",
+            "success_rate",
+            "latency",
+            "consecutive_failures",
+            "quarantined_for",
+            "score",
+        ]
+        return (
+            pd.DataFrame(rows, columns=columns)
+            .sort_values("score", ascending=False)
+            .reset_index(drop=True)
+        )
+
+    def known_good(self) -> dict:
+        """returns the proxies that worked and are not failing, with the time they last worked"""
+        with self._lock:
+            return {
+                h.proxy: h.last_ok
+                for h in self._health.values()
+                if h.last_ok is not None and h.consecutive_failures < FAILURE_THRESHOLD
+            }
+
+    # -- background discovery --------------------------------------------------------
+    def _discover(self, proxies: Iterable[str]) -> None:
+        try:
+            for proxy in proxies:
+                self.add(proxy, validated=True)
+                if self._stop.is_set():
+                    break
+        except Exception as exc:  # discovery is best effort, the pool stays usable
+            logger.warning(f"Proxy discovery failed: {exc!r}")
+        finally:
+            close = getattr(proxies, "close", None)
+            if close is not None:
+                close()
+            with self._lock:
+                self._discoverer = None
+                self._changed.notify_all()
+
+    def start_discovery(self, proxies: Iterable[str]) -> None:
+        """adds proxies to the pool from a background thread as they are produced
+
+        Args:
+            proxies (Iterable[str]): validated proxies, typically the generator :func:`nba_db.utils.discover_proxies`
+        """
+        with self._lock:
+            if self._discoverer is not None:
+                return
+            self._discoverer = threading.Thread(
+                target=self._discover,
+                args=(proxies,),
+                name="nba_db-proxy-discovery",
+                daemon=True,
+            )
+            self._discoverer.start()
+
+    def wait(self, size: int, timeout: Optional[float] = None) -> int:
+        """waits until the pool holds ``size`` proxies or discovery has finished
+
+        Args:
+            size (int): number of proxies to wait for
+            timeout (float, optional): longest wait in seconds. Defaults to None (no limit).
+
+        Returns:
+            int: number of proxies in the pool
+        """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: len(self._health) >= size or self._discoverer is None,
+                timeout,
+            )
+            return len(self._health)
+
+    # -- background probing ----------------------------------------------------------
+    def probe(self, proxy: str, timeout: float = 3) -> bool:
+        """sends a test request through a proxy and records the outcome
+
+        Args:
+            proxy (str): proxy address
+            timeout (float, optional): request timeout in seconds. Defaults to 3.
+
+        Returns:
+            bool: whether the proxy answered
+        """
+        start = time.perf_counter()
+        try:
+            ok = requests.get(PROBE_URL, proxies={"http": proxy}, timeout=timeout).ok
+        except IOError:
+            ok = False
+        self.report(proxy, ok, time.perf_counter() - start)
+        return ok
+
+    def _due_for_probe(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                h.proxy
+                for h in self._health.values()
+                if h.consecutive_failures >= FAILURE_THRESHOLD and h.is_available(now)
+            ]
+
+    def _probe_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            for proxy in self._due_for_probe():
+                if self._stop.is_set():
+                    return
+                with self._lock:
+                    # hold the proxy back from acquire() while it is probed
+                    self._health[proxy].quarantined_until = time.monotonic() + 60
+                self.probe(proxy)
+
+    def start_probing(self, interval: float = 10.0) -> None:
+        """starts re-probing proxies whose quarantine expired in a background thread
+
+        Args:
+            interval (float, optional): seconds between probe rounds. Defaults to 10.
+        """
+        if self._prober is not None:
+            return
+        self._stop.clear()
+        self._prober = threading.Thread(
+            target=self._probe_loop,
+            args=(interval,),
+            name="nba_db-proxy-probe",
+            daemon=True,
+        )
+        self._prober.start()
+
+    def stop_probing(self) -> None:
+        """stops the background probe thread"""
+        self._stop.set()
+        if self._prober is not None:
+            self._prober.join()
+            self._prober = None
+
+
+# -- Functions -----------------------------------------------------------------------
+def load_known_proxies(
+    path: Optional[str] = None, max_age: float = KNOWN_PROXY_MAX_AGE
+) -> List[str]:
+    """reads the proxies that worked in previous runs
+
+    Args:
+        path (str, optional): path of the proxy file. Defaults to KNOWN_PROXIES_PATH.
+        max_age (float, optional): seconds since a proxy last worked for it to be returned. Defaults to KNOWN_PROXY_MAX_AGE.
+
+    Returns:
+        List[str]: proxies that worked within ``max_age``, most recent first
+    """
+    path = path or KNOWN_PROXIES_PATH
+    try:
+        with open(path, encoding="utf-8") as f:
+            known = json.load(f)
+    except (OSError, ValueError):
+        return []
+    now = time.time()
+    fresh = {p: t for p, t in known.items() if isinstance(t, (int, float))}
+    fresh = {p: t for p, t in fresh.items() if now - t <= max_age}
+    return sorted(fresh, key=fresh.get, reverse=True)
+
+
+def save_known_proxies(
+    pool: ProxyPool, path: Optional[str] = None, max_age: float = KNOWN_PROXY_MAX_AGE
+) -> int:
+    """persists the proxies of a pool that worked, so the next run starts warm
+
+    Proxies of earlier runs that are still within ``max_age`` are kept unless
+    the pool saw them failing.
+
+    Args:
+        pool (ProxyPool): proxy pool of the finished run
+        path (str, optional): path of the proxy file. Defaults to KNOWN_PROXIES_PATH.
+        max_age (float, optional): seconds a proxy is kept after it last worked. Defaults to KNOWN_PROXY_MAX_AGE.
+
+    Returns:
+        int: number of proxies written
+    """
+    path = path or KNOWN_PROXIES_PATH
+    try:
+        with open(path, encoding="utf-8") as f:
+            known = json.load(f)
+    except (OSError, ValueError):
+        known = {}
+    now = time.time()
+    stats = pool.stats()
+    failing = set(
+        stats.loc[stats["consecutive_failures"] >= FAILURE_THRESHOLD, "proxy"]
+    )
+    known = {
+        p: t
+        for p, t in known.items()
+        if isinstance(t, (int, float)) and now - t <= max_age and p not in failing
+    }
+    known.update(pool.known_good())
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # written to a temporary file first so an interrupted run keeps the old file
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(known, f, indent=0, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+    logger.info(f"Saved {len(known)} known good proxies to {path}.")
+    return len(known)
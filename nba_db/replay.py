@@ -0,0 +1,233 @@
+"""deterministic replay of the landing zone into database tables
+"""
+# -- Imports --------------------------------------------------------------------------
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from nba_api.stats.endpoints.boxscoresummaryv2 import BoxScoreSummaryV2
+from nba_api.stats.endpoints.commonplayerinfo import CommonPlayerInfo
+from nba_api.stats.endpoints.draftcombinestats import DraftCombineStats
+from nba_api.stats.endpoints.drafthistory import DraftHistory
+from nba_api.stats.endpoints.leaguegamelog import LeagueGameLog
+from nba_api.stats.endpoints.playbyplayv2 import PlayByPlayV2
+from nba_api.stats.endpoints.teamdetails import TeamDetails
+from nba_api.stats.endpoints.teaminfocommon import TeamInfoCommon
+from nba_api.stats.library.http import NBAStatsResponse
+
+from nba_db.cache import cache_key
+from nba_db.data import (
+    CommonPlayerInfoSchema,
+    DraftCombineStatsSchema,
+    DraftHistorySchema,
+    LeagueGameLogSchema,
+    PlayByPlaySchema,
+    TeamDetailsSchema,
+    TeamHistorySchema,
+    TeamInfoCommonSchema,
+)
+from nba_db.extract import (
+    BOX_SCORE_TABLES,
+    parse_box_score_summary,
+    parse_draft_combine_stats,
+    parse_draft_history,
+    parse_league_game_log,
+    parse_play_by_play,
+    parse_player_info,
+    parse_team_info_common,
+    parse_teams_details,
+    validate_frames,
+)
+from nba_db.landing import LandingStore, read_shard
+from nba_db.logger import log_sampled, worker_logging
+from nba_db.schema import bulk_load
+from nba_db.writer import DBWriter
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+REPLAY_WORKERS = os.cpu_count() or 1
+# endpoint class and parser of every landed endpoint
+ENDPOINT_PARSERS = {
+    LeagueGameLog.endpoint: (LeagueGameLog, parse_league_game_log),
+    CommonPlayerInfo.endpoint: (CommonPlayerInfo, parse_player_info),
+    TeamDetails.endpoint: (TeamDetails, parse_teams_details),
+    BoxScoreSummaryV2.endpoint: (BoxScoreSummaryV2, parse_box_score_summary),
+    PlayByPlayV2.endpoint: (PlayByPlayV2, parse_play_by_play),
+    DraftCombineStats.endpoint: (DraftCombineStats, parse_draft_combine_stats),
+    DraftHistory.endpoint: (DraftHistory, parse_draft_history),
+    TeamInfoCommon.endpoint: (TeamInfoCommon, parse_team_info_common),
+}
+# data schema and source endpoint of every table that can be replayed
+REPLAY_TABLES = {
+    "game": (LeagueGameLogSchema, LeagueGameLog.endpoint),
+    "common_player_info": (CommonPlayerInfoSchema, CommonPlayerInfo.endpoint),
+    "team_details": (TeamDetailsSchema, TeamDetails.endpoint),
+    "team_history": (TeamHistorySchema, TeamDetails.endpoint),
+    **{
+        table: (schema, BoxScoreSummaryV2.endpoint)
+        for table, schema in BOX_SCORE_TABLES.items()
+    },
+    "play_by_play": (PlayByPlaySchema, PlayByPlayV2.endpoint),
+    "draft_combine_stats": (DraftCombineStatsSchema, DraftCombineStats.endpoint),
+    "draft_history": (DraftHistorySchema, DraftHistory.endpoint),
+    "team_info_common": (TeamInfoCommonSchema, TeamInfoCommon.endpoint),
+}
+
+
+# -- Functions -----------------------------------------------------------------------
+def load_endpoint(endpoint_cls, params: Dict[str, str], contents: str):
+    """loads a landed response into an nba_api endpoint without requesting it
+
+    Args:
+        endpoint_cls (type): nba_api endpoint class
+        params (Dict[str, str]): request parameters of the response
+        contents (str): response text
+
+    Raises:
+        ValueError: raised if the response is not valid JSON
+        KeyError: raised if the response lacks a result set of the endpoint
+
+    Returns:
+        Endpoint: endpoint with the response loaded
+    """
+    endpoint = endpoint_cls.__new__(endpoint_cls)
+    endpoint.parameters = dict(params)
+    endpoint.nba_response = NBAStatsResponse(response=contents, status_code=200, url="")
+    endpoint.load_response()
+    return endpoint
+
+
+def latest_records(path: str) -> List[Dict[str, Any]]:
+    """reads the latest response of every request landed in a shard
+
+    Args:
+        path (str): path of the shard file
+
+    Returns:
+        List[Dict[str, Any]]: one record per request ordered by fetch time, so newer responses are written last
+    """
+    latest = {}
+    for record in read_shard(path):
+        key = cache_key(record["endpoint"], record["params"])
+        if key not in latest or record["fetched_at"] >= latest[key]["fetched_at"]:
+            latest[key] = record
+    return sorted(
+        latest.values(),
+        key=lambda r: (r["fetched_at"], cache_key(r["endpoint"], r["params"])),
+    )
+
+
+def replay_shard(
+    endpoint: str, path: str, tables: Tuple[str, ...]
+) -> Dict[str, Optional[pd.DataFrame]]:
+    """parses and validates the responses of a shard
+
+    Args:
+        endpoint (str): endpoint of the shard, a key of ``ENDPOINT_PARSERS``
+        path (str): path of the shard file
+        tables (Tuple[str, ...]): tables filled from the endpoint to rebuild
+
+    Returns:
+        Dict[str, Optional[pd.DataFrame]]: validated rows of every table, None if there are none
+    """
+    endpoint_cls, parse = ENDPOINT_PARSERS[endpoint]
+    frames = {table: [] for table in tables}
+    for record in latest_records(path):
+        try:
+            parsed = parse(
+                load_endpoint(endpoint_cls, record["params"], record["contents"])
+            )
+        except (ValueError, KeyError) as e:
+            log_sampled(
+                logger,
+                logging.WARNING,
+                "replay_invalid_response",
+                "Skipping landed %s response %s: %r",
+                endpoint,
+                record["params"],
+                e,
+            )
+            continue
+        for table in tables:
+            df = parsed.get(table)
+            if df is not None and len(df) > 0:
+                frames[table].append(df)
+    return {
+        table: validate_frames(REPLAY_TABLES[table][0], dfs, table)
+        for table, dfs in frames.items()
+    }
+
+
+def _replay_shard(job: Tuple[str, str, Tuple[str, ...]]):
+    return replay_shard(*job)
+
+
+def replay_tables(
+    conn,
+    tables: Optional[Iterable[str]] = None,
+    landing_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, int]:
+    """rebuilds tables from the responses in the landing zone
+
+    The shards of the tables' endpoints are parsed and validated by a pool
+    of ``workers`` processes, without any network call, and the results are
+    upserted by a :class:`DBWriter` in shard order. Every request is replayed
+    once with its latest landed response, so replaying the same landing zone
+    always produces the same tables.
+
+    The landing zone only holds the responses fetched while landing was
+    enabled, not the rows of a downloaded database or of a build from
+    before, so tables are not emptied: rows of landed requests are
+    replaced, all other rows are kept.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        tables (Iterable[str], optional): tables to rebuild, keys of ``REPLAY_TABLES``. Defaults to None (all).
+        landing_dir (str, optional): landing directory. Defaults to None (``LANDING_DIR``).
+        workers (int, optional): number of shards parsed at once. Defaults to None (REPLAY_WORKERS).
+
+    Raises:
+        ValueError: raised if a table cannot be replayed or has no landed responses
+
+    Returns:
+        Dict[str, int]: number of rows written per table
+    """
+    workers = workers or REPLAY_WORKERS
+    tables = list(REPLAY_TABLES if tables is None else tables)
+    unknown = [table for table in tables if table not in REPLAY_TABLES]
+    if unknown:
+        raise ValueError(f"tables cannot be replayed: {unknown}")
+    endpoint_tables = {}
+    for table in tables:
+        endpoint_tables.setdefault(REPLAY_TABLES[table][1], []).append(table)
+    jobs = [
+        (endpoint, path, tuple(endpoint_tables[endpoint]))
+        for endpoint, path in LandingStore(landing_dir).shards(endpoint_tables)
+    ]
+    landed = {table for _, _, job_tables in jobs for table in job_tables}
+    missing = [table for table in tables if table not in landed]
+    if missing:
+        raise ValueError(f"no landed responses for tables: {missing}")
+    logger.info(f"Replaying {len(jobs)} landed shards into {len(tables)} tables...")
+    rows = {table: 0 for table in tables}
+    with bulk_load(conn):
+        # workers log through the parent, which owns the console and log files
+        with worker_logging() as (initializer, initargs), ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs)),
+            initializer=initializer,
+            initargs=initargs,
+        ) as executor:
+            # workers are started before the writer thread
+            results = executor.map(_replay_shard, jobs)
+            with DBWriter(conn) as writer:
+                for frames in results:
+                    for table, df in frames.items():
+                        if df is not None:
+                            writer.put(table, df)
+                            rows[table] += len(df)
+    logger.info(f"Replayed {sum(rows.values())} rows: {rows}")
+    return rows
@@ -0,0 +1,168 @@
+"""rate limiting and retry policy for endpoint requests
+"""
+# -- Imports --------------------------------------------------------------------------
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import RequestException, Timeout
+
+# -- Constants ------------------------------------------------------------------------
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+# -- Exceptions ----------------------------------------------------------------------
+class RetryableResponseError(RequestException):
+    """raised for responses worth retrying
+
+    These are throttled (429) or failed (5xx) responses and non-JSON pages
+    returned by a misbehaving proxy.
+
+    Args:
+        message (str): error message
+        status_code (int, optional): HTTP status code of the response. Defaults to None.
+        retry_after (float, optional): seconds to wait as requested by the server. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+# -- Classes -------------------------------------------------------------------------
+class TokenBucket:
+    """thread-safe token bucket
+
+    Args:
+        rate (float): tokens added per second
+        burst (float): bucket capacity, i.e. the largest burst of requests
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        # takes a token (possibly going into debt) and returns the wait for it
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """blocks until a token is available"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """token buckets keyed by host or proxy
+
+    Args:
+        rate (float, optional): requests per second per key. Defaults to 2.
+        burst (float, optional): largest burst of requests per key. Defaults to 4.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: float = 4.0):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> None:
+        """blocks until a request for ``key`` may be sent
+
+        Args:
+            key (str): proxy address, or host for direct requests
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+class RetryPolicy:
+    """bounded retries with jittered exponential backoff
+
+    Connection errors, timeouts and :class:`RetryableResponseError` are
+    retried; anything else (e.g. an invalid response for a bad id) is fatal.
+
+    Args:
+        max_attempts (int, optional): attempts including the first one. Defaults to 5.
+        base_delay (float, optional): backoff after the first failure in seconds. Defaults to 0.5.
+        max_delay (float, optional): longest backoff in seconds. Defaults to 30.
+    """
+
+    def __init__(
+        self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, exc: Exception) -> bool:
+        """classifies an exception as retryable or fatal"""
+        return isinstance(
+            exc,
+            (
+                RetryableResponseError,
+                RequestsConnectionError,
+                Timeout,
+                ChunkedEncodingError,
+            ),
+        )
+
+    def delay(self, attempt: int, exc: Optional[Exception] = None) -> float:
+        """returns the backoff before the next attempt ("full jitter")
+
+        Args:
+            attempt (int): number of the failed attempt, starting at 1
+            exc (Exception, optional): exception of the failed attempt. Defaults to None.
+
+        Returns:
+            float: seconds to wait
+        """
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+
+# -- Functions -----------------------------------------------------------------------
+def error_type(exc: Exception) -> str:
+    """classifies a failed request attempt, e.g. for metrics
+
+    Args:
+        exc (Exception): exception of the attempt
+
+    Returns:
+        str: ``http_<status>`` for error responses, ``invalid_response`` for non-JSON pages of a proxy, otherwise the exception's class name, e.g. ``ReadTimeout``
+    """
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(exc, RetryableResponseError):
+        if status_code is not None and status_code >= 400:
+            return f"http_{status_code}"
+        return "invalid_response"
+    return type(exc).__name__
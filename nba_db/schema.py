@@ -0,0 +1,813 @@
+"""SQLite table definitions generated from the data schemas
+"""
+# -- Imports --------------------------------------------------------------------------
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+import pandas as pd
+from pandera import SchemaModel
+
+from nba_db.data import (
+    CommonPlayerInfoSchema,
+    DraftCombineStatsSchema,
+    DraftHistorySchema,
+    GameInfoSchema,
+    GameSummarySchema,
+    InactivePlayersSchema,
+    LeagueGameLogSchema,
+    LineScoreSchema,
+    OfficialsSchema,
+    OtherStatsSchema,
+    PlayByPlayEventSchema,
+    PlayByPlayPlayerSchema,
+    PlayByPlaySchema,
+    PlayByPlayTeamSchema,
+    PlayerSchema,
+    TeamDetailsSchema,
+    TeamHistorySchema,
+    TeamInfoCommonSchema,
+    TeamSchema,
+)
+from nba_db.metrics import inc, observe
+from nba_db.trace import span
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+SQLITE_TYPES = {
+    "str": "TEXT",
+    "string": "TEXT",
+    "int64": "INTEGER",
+    "float64": "REAL",
+    "bool": "INTEGER",
+    "datetime64[ns]": "TIMESTAMP",
+    "object": "NUMERIC",
+}
+WRITE_BATCH_SIZE = 10_000
+BULK_WRITE_BATCH_SIZE = 100_000
+# pragmas of a bulk load: the database can be rebuilt, so durability is traded for speed
+BULK_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": -512_000,  # KiB, i.e. 500 MiB
+    "temp_store": "MEMORY",
+}
+# pragmas of normal operation; a rollback journal keeps the database a single file
+SAFE_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -2_000,
+    "temp_store": "DEFAULT",
+}
+
+_bulk_connections = set()
+
+# generation of every table, increased whenever stored rows change or go away
+CHANGES_TABLE = "table_changes"
+
+PLAY_BY_PLAY_VIEW = "play_by_play"
+PLAY_BY_PLAY_TABLES = ("play_by_play_event", "play_by_play_player", "play_by_play_team")
+PLAY_BY_PLAY_PLAYERS = (1, 2, 3)
+TEAM_COLUMNS = ("team_id", "team_city", "team_nickname", "team_abbreviation")
+
+
+# -- Classes -------------------------------------------------------------------------
+class TableSpec(NamedTuple):
+    """storage definition of a table
+
+    Foreign keys are declared for documentation and tooling only: SQLite does
+    not enforce them unless ``PRAGMA foreign_keys`` is switched on, which we
+    do not do because historical teams and players are missing from the
+    static ``team`` and ``player`` tables.
+
+    Args:
+        schema (Type[SchemaModel]): data schema of the table
+        primary_key (Tuple[str, ...]): natural key of a row
+        not_null (Tuple[str, ...]): non-key columns that must always be set
+        foreign_keys (Dict[str, str]): column to ``table(column)`` references
+        indexes (Tuple[Tuple[str, ...], ...]): secondary indexes
+    """
+
+    schema: Type[SchemaModel]
+    primary_key: Tuple[str, ...]
+    not_null: Tuple[str, ...] = ()
+    foreign_keys: Dict[str, str] = {}
+    indexes: Tuple[Tuple[str, ...], ...] = ()
+
+
+TABLES: Dict[str, TableSpec] = {
+    "player": TableSpec(PlayerSchema, ("id",)),
+    "team": TableSpec(TeamSchema, ("id",), not_null=("full_name",)),
+    "game": TableSpec(
+        LeagueGameLogSchema,
+        ("game_id",),
+        not_null=(
+            "season_id",
+            "team_id_home",
+            "team_id_away",
+            "game_date",
+            "season_type",
+        ),
+        foreign_keys={"team_id_home": "team(id)", "team_id_away": "team(id)"},
+        indexes=(
+            ("game_date",),
+            ("season_id", "game_date"),
+            ("team_id_home", "game_date"),
+            ("team_id_away", "game_date"),
+        ),
+    ),
+    "common_player_info": TableSpec(
+        CommonPlayerInfoSchema,
+        ("person_id",),
+        foreign_keys={"person_id": "player(id)"},
+        indexes=(("team_id",),),
+    ),
+    "team_details": TableSpec(
+        TeamDetailsSchema, ("team_id",), foreign_keys={"team_id": "team(id)"}
+    ),
+    "team_history": TableSpec(
+        TeamHistorySchema,
+        ("team_id", "year_founded"),
+        foreign_keys={"team_id": "team(id)"},
+    ),
+    "game_summary": TableSpec(
+        GameSummarySchema,
+        ("game_id",),
+        foreign_keys={"game_id": "game(game_id)"},
+        indexes=(("game_date_est",), ("home_team_id",), ("visitor_team_id",)),
+    ),
+    "other_stats": TableSpec(
+        OtherStatsSchema, ("game_id",), foreign_keys={"game_id": "game(game_id)"}
+    ),
+    "officials": TableSpec(
+        OfficialsSchema,
+        ("game_id", "official_id"),
+        foreign_keys={"game_id": "game(game_id)"},
+        indexes=(("official_id",),),
+    ),
+    "inactive_players": TableSpec(
+        InactivePlayersSchema,
+        ("game_id", "player_id"),
+        foreign_keys={"game_id": "game(game_id)"},
+        indexes=(("player_id",), ("team_id",)),
+    ),
+    "game_info": TableSpec(
+        GameInfoSchema,
+        ("game_id",),
+        foreign_keys={"game_id": "game(game_id)"},
+        indexes=(("game_date",),),
+    ),
+    "line_score": TableSpec(
+        LineScoreSchema,
+        ("game_id",),
+        foreign_keys={"game_id": "game(game_id)"},
+        indexes=(("game_date_est",), ("team_id_home",), ("team_id_away",)),
+    ),
+    # play by play is stored normalized, see write_play_by_play
+    "play_by_play_event": TableSpec(
+        PlayByPlayEventSchema,
+        ("game_id", "eventnum"),
+        foreign_keys={
+            "game_id": "game(game_id)",
+            "player1_team_key": "play_by_play_team(team_key)",
+            "player2_team_key": "play_by_play_team(team_key)",
+            "player3_team_key": "play_by_play_team(team_key)",
+        },
+        indexes=(("player1_id",), ("player2_id",), ("player3_id",)),
+    ),
+    "play_by_play_player": TableSpec(PlayByPlayPlayerSchema, ("player_id",)),
+    "play_by_play_team": TableSpec(
+        PlayByPlayTeamSchema, ("team_key",), indexes=(TEAM_COLUMNS,)
+    ),
+    "draft_combine_stats": TableSpec(
+        DraftCombineStatsSchema, ("season", "player_id"), indexes=(("player_id",),)
+    ),
+    "draft_history": TableSpec(
+        DraftHistorySchema,
+        ("season", "person_id"),
+        foreign_keys={"team_id": "team(id)"},
+        indexes=(("person_id",), ("team_id",)),
+    ),
+    "team_info_common": TableSpec(
+        TeamInfoCommonSchema,
+        ("team_id", "season_year"),
+        foreign_keys={"team_id": "team(id)"},
+    ),
+}
+
+
+# -- Functions -----------------------------------------------------------------------
+def column_types(schema: Type[SchemaModel]) -> Dict[str, str]:
+    """maps the columns of a data schema to SQLite column types
+
+    Args:
+        schema (Type[SchemaModel]): data schema
+
+    Returns:
+        Dict[str, str]: column name to SQLite type, in schema order
+    """
+    return {
+        name: SQLITE_TYPES.get(str(column.dtype), "NUMERIC")
+        for name, column in schema.to_schema().columns.items()
+    }
+
+
+def create_table_sql(
+    table: str, spec: TableSpec, extra_columns: Optional[Dict[str, str]] = None
+) -> str:
+    """generates the ``CREATE TABLE`` statement of a table
+
+    Args:
+        table (str): table name
+        spec (TableSpec): storage definition
+        extra_columns (Dict[str, str], optional): further columns and their types, e.g. columns of an existing table that are not in the schema. Defaults to None.
+
+    Returns:
+        str: DDL statement
+    """
+    columns = {**column_types(spec.schema), **(extra_columns or {})}
+    required = set(spec.primary_key) | set(spec.not_null)
+    lines = [
+        f'"{name}" {dtype}' + (" NOT NULL" if name in required else "")
+        for name, dtype in columns.items()
+    ]
+    lines.append("PRIMARY KEY (" + ", ".join(f'"{c}"' for c in spec.primary_key) + ")")
+    lines += [
+        f'FOREIGN KEY ("{column}") REFERENCES {reference}'
+        for column, reference in spec.foreign_keys.items()
+    ]
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{table}" (\n    ' + ",\n    ".join(lines) + "\n)"
+    )
+
+
+def _index_name(table: str, columns: Sequence[str]) -> str:
+    return f"ix_{table}_{'_'.join(columns)}"
+
+
+def create_index_sql(table: str, spec: TableSpec) -> List[str]:
+    """generates the ``CREATE INDEX`` statements of a table"""
+    return [
+        f'CREATE INDEX IF NOT EXISTS "{_index_name(table, columns)}" '
+        f'ON "{table}" (' + ", ".join(f'"{c}"' for c in columns) + ")"
+        for columns in spec.indexes
+    ]
+
+
+def _table_info(conn, table: str) -> List[Tuple]:
+    # (cid, name, type, notnull, default, pk) rows, empty if the table does not exist
+    return conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+
+
+def _primary_key(info: List[Tuple]) -> Tuple[str, ...]:
+    return tuple(row[1] for row in sorted(info, key=lambda row: row[5]) if row[5] > 0)
+
+
+def ensure_table(conn, table: str) -> None:
+    """creates a table from its definition if it does not exist yet
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        table (str): table name, tables without a definition are left to pandas
+    """
+    if table == PLAY_BY_PLAY_VIEW:
+        ensure_play_by_play(conn)
+        return
+    spec = TABLES.get(table)
+    if spec is None or _table_info(conn, table):
+        return
+    with conn:
+        conn.execute(create_table_sql(table, spec))
+        if not in_bulk_load(conn):
+            for statement in create_index_sql(table, spec):
+                conn.execute(statement)
+
+
+def migrate_table(conn, table: str) -> bool:
+    """rebuilds a table created by ``to_sql`` with its key, types and indexes
+
+    Rows are copied with ``INSERT OR IGNORE``, which drops duplicates of the
+    primary key that accumulated from repeated appends (and rows without a
+    key). Columns of the old table that are not part of the schema are kept.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        table (str): table name
+
+    Returns:
+        bool: whether the table was rebuilt
+    """
+    spec = TABLES[table]
+    info = _table_info(conn, table)
+    if not info:
+        ensure_table(conn, table)
+        return False
+    if _primary_key(info) == spec.primary_key:
+        with conn:
+            for statement in create_index_sql(table, spec):
+                conn.execute(statement)
+        return False
+    logger.info(f"Migrating table {table}...")
+    existing = {row[1]: row[2] for row in info}
+    schema_columns = column_types(spec.schema)
+    extra = {c: t or "NUMERIC" for c, t in existing.items() if c not in schema_columns}
+    shared = [c for c in {**schema_columns, **extra} if c in existing]
+    before = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+    columns = ", ".join(f'"{c}"' for c in shared)
+    with conn:
+        conn.execute(f'ALTER TABLE "{table}" RENAME TO "{table}__old"')
+        conn.execute(create_table_sql(table, spec, extra))
+        conn.execute(
+            f'INSERT OR IGNORE INTO "{table}" ({columns}) '
+            f'SELECT {columns} FROM "{table}__old" ORDER BY rowid'
+        )
+        conn.execute(f'DROP TABLE "{table}__old"')
+        for statement in create_index_sql(table, spec):
+            conn.execute(statement)
+        record_change(conn, table)
+    after = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+    logger.info(f"Migrated table {table} ({before - after} duplicate rows dropped).")
+    return True
+
+
+def migrate(conn) -> List[str]:
+    """brings every table of the database in line with its definition
+
+    Safe to run on every connection: tables that already have their primary
+    key only get missing indexes created.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+
+    Returns:
+        List[str]: names of the rebuilt tables
+    """
+    migrated = [PLAY_BY_PLAY_VIEW] if normalize_play_by_play(conn) else []
+    migrated += [table for table in TABLES if migrate_table(conn, table)]
+    if migrated:
+        conn.execute("ANALYZE")
+        conn.commit()
+    return migrated
+
+
+def _to_rows(df: pd.DataFrame) -> List[Tuple]:
+    # converts a frame to tuples of values sqlite3 can bind
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+
+def _add_missing_columns(conn, table: str, columns: Sequence[str]) -> None:
+    existing = {row[1] for row in _table_info(conn, table)}
+    for column in columns:
+        if column not in existing:
+            logger.warning(f"Adding column {column} to table {table}...")
+            conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}"')
+
+
+def upsert_sql(table: str, spec: TableSpec, columns: Sequence[str]) -> str:
+    """generates an ``INSERT ... ON CONFLICT DO UPDATE`` statement keyed on the primary key
+
+    Args:
+        table (str): table name
+        spec (TableSpec): storage definition
+        columns (Sequence[str]): columns of the rows to write
+
+    Returns:
+        str: upsert statement with one placeholder per column
+    """
+    names = ", ".join(f'"{c}"' for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    key = ", ".join(f'"{c}"' for c in spec.primary_key)
+    values = [c for c in columns if c not in spec.primary_key]
+    updates = ", ".join(f'"{c}" = excluded."{c}"' for c in values)
+    # rows are only updated (and counted as changed) if a value differs
+    differs = " OR ".join(f'"{c}" IS NOT excluded."{c}"' for c in values)
+    conflict = f"DO UPDATE SET {updates} WHERE {differs}" if values else "DO NOTHING"
+    return (
+        f'INSERT INTO "{table}" ({names}) VALUES ({placeholders}) '
+        f"ON CONFLICT ({key}) {conflict}"
+    )
+
+
+def write_table(
+    conn,
+    table: str,
+    df: pd.DataFrame,
+    if_exists: str = "append",
+    batch_size: Optional[int] = None,
+) -> None:
+    """writes a frame to a table while keeping the table's definition
+
+    Rows are upserted on the table's primary key: a row whose key already
+    exists replaces the stored values, so re-running an update for the same
+    date or overlapping backfills never duplicate rows. All batches are
+    written with ``executemany`` in a single transaction.
+
+    ``to_sql(if_exists="replace")`` would drop the table and recreate it
+    without keys and indexes, so with ``replace`` tables are instead emptied
+    and refilled in the same transaction. Play by play frames are split into
+    the normalized tables (see :func:`write_play_by_play`), tables without a
+    definition are written with ``to_sql``.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        table (str): table name
+        df (pd.DataFrame): rows to write
+        if_exists (str, optional): one of ``append`` (upsert) or ``replace``. Defaults to "append".
+        batch_size (int, optional): rows per ``executemany`` call. Defaults to None (WRITE_BATCH_SIZE, or BULK_WRITE_BATCH_SIZE during a bulk load).
+    """
+    if table == PLAY_BY_PLAY_VIEW:
+        write_play_by_play(conn, df, if_exists=if_exists, batch_size=batch_size)
+        return
+    started = time.perf_counter()
+    if table not in TABLES:
+        df.to_sql(table, conn, if_exists=if_exists, index=False)
+        if if_exists == "replace":
+            with conn:
+                record_change(conn, table)
+        _record_write(table, len(df), started)
+        return
+    if batch_size is None:
+        batch_size = BULK_WRITE_BATCH_SIZE if in_bulk_load(conn) else WRITE_BATCH_SIZE
+    spec = TABLES[table]
+    missing_key = df[list(spec.primary_key)].isna().any(axis=1)
+    if missing_key.any():
+        logger.warning(
+            f"Skipping {int(missing_key.sum())} rows of {table} without a primary key."
+        )
+        df = df[~missing_key]
+    ensure_table(conn, table)
+    statement = upsert_sql(table, spec, list(df.columns))
+    with conn:
+        _add_missing_columns(conn, table, df.columns)
+        if if_exists == "replace":
+            conn.execute(f'DELETE FROM "{table}"')
+            record_change(conn, table)
+        max_rowid = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0]
+        changes = conn.total_changes
+        for start in range(0, len(df), batch_size):
+            conn.executemany(statement, _to_rows(df.iloc[start : start + batch_size]))
+        changes = conn.total_changes - changes
+        inserted = conn.execute(
+            f'SELECT COUNT(*) FROM "{table}" WHERE rowid > ?', (max_rowid or 0,)
+        ).fetchone()[0]
+        if if_exists != "replace" and changes > inserted:
+            # upserts updated rows in place, they keep their rowid
+            record_change(conn, table)
+    _record_write(table, len(df), started)
+
+
+def record_change(conn, table: str) -> None:
+    """records that stored rows of a table changed or were removed
+
+    Every write that does not only add rows (a replace, an upsert updating
+    an existing row, a migration or a deletion) increases the table's
+    generation, so :mod:`nba_db.export` knows that appending new rows to the
+    previous export is not enough. Runs in the caller's transaction.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        table (str): table name
+    """
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL
+        )"""
+    )
+    conn.execute(
+        f"INSERT INTO {CHANGES_TABLE} (table_name, generation) VALUES (?, 1) "
+        "ON CONFLICT (table_name) DO UPDATE SET generation = generation + 1",
+        (table,),
+    )
+
+
+def get_generation(conn, table: str) -> int:
+    """returns the generation of a table, see :func:`record_change`
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        table (str): table name
+
+    Returns:
+        int: number of recorded changes, 0 if there is none
+    """
+    if not _is_table(conn, CHANGES_TABLE):
+        return 0
+    row = conn.execute(
+        f"SELECT generation FROM {CHANGES_TABLE} WHERE table_name = ?", (table,)
+    ).fetchone()
+    return 0 if row is None else row[0]
+
+
+def _record_write(table: str, rows: int, started: float) -> None:
+    seconds = time.perf_counter() - started
+    observe("nba_db_write_duration_seconds", seconds, table=table)
+    observe("nba_db_write_rows", rows, table=table)
+    inc("nba_db_rows_written_total", rows, table=table)
+
+
+# -- Normalized play by play --------------------------------------------------------
+def _split_play_by_play_column(name: str) -> Optional[Tuple[int, str]]:
+    # (n, dimension column) of the player<n>_name and player<n>_team_* columns
+    match = re.fullmatch(r"player(\d)_(name|team_\w+)", name)
+    if match is None or match[2] == "team_key":
+        return None
+    return int(match[1]), "player_name" if match[2] == "name" else match[2]
+
+
+def play_by_play_select_sql(extra_columns: Sequence[str] = ()) -> str:
+    """generates the query joining the normalized tables into wide play by play rows
+
+    Args:
+        extra_columns (Sequence[str], optional): expressions selected before the wide columns, e.g. ``e.rowid``. Defaults to ().
+
+    Returns:
+        str: SELECT statement, the events are aliased ``e``
+    """
+    columns = list(extra_columns)
+    for name in column_types(PlayByPlaySchema):
+        split = _split_play_by_play_column(name)
+        if split is None:
+            columns.append(f'e."{name}"')
+        else:
+            n, column = split
+            alias = f"p{n}" if column == "player_name" else f"t{n}"
+            columns.append(f'{alias}."{column}" AS "{name}"')
+    joins = []
+    for n in PLAY_BY_PLAY_PLAYERS:
+        joins.append(
+            f'LEFT JOIN "play_by_play_player" AS p{n} '
+            f'ON p{n}."player_id" = e."player{n}_id"'
+        )
+        joins.append(
+            f'LEFT JOIN "play_by_play_team" AS t{n} '
+            f'ON t{n}."team_key" = e."player{n}_team_key"'
+        )
+    return (
+        "SELECT\n    "
+        + ",\n    ".join(columns)
+        + '\nFROM "play_by_play_event" AS e\n'
+        + "\n".join(joins)
+    )
+
+
+def create_play_by_play_view_sql() -> str:
+    """generates the view reproducing the wide ``play_by_play`` table
+
+    Returns:
+        str: DDL statement
+    """
+    return (
+        f'CREATE VIEW IF NOT EXISTS "{PLAY_BY_PLAY_VIEW}" AS '
+        + play_by_play_select_sql()
+    )
+
+
+def _is_table(conn, name: str) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        is not None
+    )
+
+
+def ensure_play_by_play(conn) -> None:
+    """creates the normalized play by play tables and their compatibility view
+
+    A wide ``play_by_play`` table from before the normalization is converted
+    first (see :func:`normalize_play_by_play`).
+
+    Args:
+        conn (sqlite3.Connection): database connection
+    """
+    if normalize_play_by_play(conn):
+        return
+    for table in PLAY_BY_PLAY_TABLES:
+        ensure_table(conn, table)
+    with conn:
+        conn.execute(create_play_by_play_view_sql())
+
+
+def normalize_play_by_play(conn) -> bool:
+    """converts a wide ``play_by_play`` table to the normalized layout
+
+    Player names go to ``play_by_play_player``, every distinct combination
+    of team id, city, nickname and abbreviation to ``play_by_play_team``
+    and the events, with team keys instead of the team columns, to
+    ``play_by_play_event``. Duplicates of the primary key are dropped as in
+    :func:`migrate_table`, columns that are not part of the schema stay on
+    the events. The wide table is then replaced by the ``play_by_play`` view.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+
+    Returns:
+        bool: whether a wide table was converted
+    """
+    if not _is_table(conn, PLAY_BY_PLAY_VIEW):
+        return False
+    logger.info("Normalizing table play_by_play...")
+    existing = {row[1]: row[2] for row in _table_info(conn, PLAY_BY_PLAY_VIEW)}
+    wide_columns = column_types(PlayByPlaySchema)
+    event_columns = column_types(PlayByPlayEventSchema)
+    extra = {
+        c: t or "NUMERIC"
+        for c, t in existing.items()
+        if c not in event_columns and c not in wide_columns
+    }
+
+    def source(n: int, column: str) -> str:
+        # column of the wide table holding a dimension column of player n
+        name = f"player{n}_name" if column == "player_name" else f"player{n}_{column}"
+        return f'"{name}"' if name in existing else "NULL"
+
+    def team_key(n: int) -> str:
+        # the team index serves the IS comparisons, which also match nulls
+        matches = " AND ".join(
+            f't."{column}" IS {source(n, column)}' for column in TEAM_COLUMNS
+        )
+        return f'(SELECT t."team_key" FROM "play_by_play_team" AS t WHERE {matches})'
+
+    with conn:
+        conn.execute(f'ALTER TABLE "{PLAY_BY_PLAY_VIEW}" RENAME TO "play_by_play__old"')
+        spec = TABLES["play_by_play_event"]
+        conn.execute(create_table_sql("play_by_play_event", spec, extra))
+        for table in ("play_by_play_player", "play_by_play_team"):
+            conn.execute(create_table_sql(table, TABLES[table]))
+            for statement in create_index_sql(table, TABLES[table]):
+                conn.execute(statement)
+        for n in PLAY_BY_PLAY_PLAYERS:
+            player_id, name = source(n, "id"), source(n, "player_name")
+            conn.execute(
+                'INSERT OR IGNORE INTO "play_by_play_player" ("player_id", "player_name") '
+                f'SELECT {player_id}, {name} FROM "play_by_play__old" '
+                f"WHERE {player_id} IS NOT NULL AND {name} IS NOT NULL"
+            )
+            teams = ", ".join(source(n, column) for column in TEAM_COLUMNS)
+            conn.execute(
+                f'INSERT INTO "play_by_play_team" ({", ".join(TEAM_COLUMNS)}) '
+                f'SELECT DISTINCT {teams} FROM "play_by_play__old" '
+                f"WHERE COALESCE({teams}) IS NOT NULL AND {team_key(n)} IS NULL"
+            )
+        columns, values = [], []
+        for name in {**event_columns, **extra}:
+            match = re.fullmatch(r"player(\d)_team_key", name)
+            if match is not None:
+                columns.append(f'"{name}"')
+                values.append(team_key(int(match[1])))
+            elif name in existing:
+                columns.append(f'"{name}"')
+                values.append(f'"{name}"')
+        conn.execute(
+            f'INSERT OR IGNORE INTO "play_by_play_event" ({", ".join(columns)}) '
+            f'SELECT {", ".join(values)} FROM "play_by_play__old" ORDER BY rowid'
+        )
+        conn.execute('DROP TABLE "play_by_play__old"')
+        conn.execute(create_play_by_play_view_sql())
+        record_change(conn, PLAY_BY_PLAY_VIEW)
+        if not in_bulk_load(conn):
+            for statement in create_index_sql("play_by_play_event", spec):
+                conn.execute(statement)
+    logger.info("Normalized table play_by_play.")
+    return True
+
+
+def _nulls_to_none(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype(object).where(df.notna(), None)
+
+
+def _team_keys(conn, teams: pd.DataFrame) -> pd.DataFrame:
+    # keys of the distinct team rows, new combinations are added to the dimension
+    stored = _nulls_to_none(pd.read_sql('SELECT * FROM "play_by_play_team"', conn))
+    teams = teams.merge(stored, how="left", on=list(TEAM_COLUMNS))
+    new = teams[teams["team_key"].isna()].copy()
+    if not new.empty:
+        start = int(stored["team_key"].max()) + 1 if not stored.empty else 1
+        new["team_key"] = range(start, start + len(new))
+        write_table(conn, "play_by_play_team", new[list(stored.columns)])
+        stored = pd.concat([stored, new[list(stored.columns)]], ignore_index=True)
+    return stored
+
+
+def write_play_by_play(
+    conn,
+    df: pd.DataFrame,
+    if_exists: str = "append",
+    batch_size: Optional[int] = None,
+) -> None:
+    """writes wide play by play rows to the normalized tables
+
+    The names of players and the city, nickname and abbreviation of their
+    teams, repeated on every event of the wide layout, are stored once in
+    ``play_by_play_player`` and ``play_by_play_team``. The events keep the
+    player ids and a key into the team dimension. The ``play_by_play`` view
+    joins them back into the wide shape.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        df (pd.DataFrame): rows in the wide layout of :class:`nba_db.data.PlayByPlaySchema`
+        if_exists (str, optional): one of ``append`` (upsert) or ``replace``. Defaults to "append".
+        batch_size (int, optional): rows per ``executemany`` call. Defaults to None (see :func:`write_table`).
+    """
+    ensure_play_by_play(conn)
+    dimensions = {name: _split_play_by_play_column(name) for name in df.columns}
+    players, teams = [], []
+    for n in PLAY_BY_PLAY_PLAYERS:
+        columns = {name: c for name, c in dimensions.items() if c and c[0] == n}
+        renamed = df[list(columns)].rename(
+            columns={k: v[1] for k, v in columns.items()}
+        )
+        if "player_name" in renamed and f"player{n}_id" in df:
+            names = renamed[["player_name"]].assign(player_id=df[f"player{n}_id"])
+            players.append(names.dropna())
+        if any(column in renamed for column in TEAM_COLUMNS):
+            teams.append((n, renamed.reindex(columns=list(TEAM_COLUMNS))))
+    if players:
+        players = pd.concat(players, ignore_index=True)
+        players = players.drop_duplicates("player_id", keep="last")
+        write_table(conn, "play_by_play_player", players[["player_id", "player_name"]])
+    events = df.drop(columns=[name for name, c in dimensions.items() if c])
+    # empty and all null frames are left out of the concat, if no team is left
+    # there is nothing to look up and every team key is null
+    present = [frame for _, frame in teams if frame.notna().to_numpy().any()]
+    if present:
+        distinct = pd.concat(present, ignore_index=True)
+        distinct = _nulls_to_none(distinct).drop_duplicates()
+        distinct = distinct[distinct.notna().any(axis=1)]
+        keys = _team_keys(conn, distinct)
+    for n, frame in teams:
+        if present:
+            key = _nulls_to_none(frame).merge(keys, how="left", on=list(TEAM_COLUMNS))
+            team_key = key["team_key"].astype("Int64").to_numpy()
+        else:
+            team_key = pd.array([None] * len(events), dtype="Int64")
+        events[f"player{n}_team_key"] = team_key
+    write_table(conn, "play_by_play_event", events, if_exists, batch_size)
+
+
+# -- Bulk loading --------------------------------------------------------------------
+def set_pragmas(conn, pragmas: Dict[str, object]) -> None:
+    """applies connection pragmas, e.g. ``BULK_PRAGMAS`` or ``SAFE_PRAGMAS``"""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def in_bulk_load(conn) -> bool:
+    """checks whether a connection is inside :func:`bulk_load`"""
+    return id(conn) in _bulk_connections
+
+
+@contextmanager
+def bulk_load(conn, defer_indexes: bool = True) -> Iterator:
+    """switches a connection to a fast, non-durable mode for large loads
+
+    Inside the block the database uses WAL journaling with ``synchronous``
+    off, a large page cache and in-memory temp storage, secondary indexes are
+    dropped (primary keys stay, upserts need them) and :func:`write_table`
+    writes in batches of ``BULK_WRITE_BATCH_SIZE`` rows. On exit the indexes
+    are rebuilt in one pass each, the WAL is checkpointed and the safe
+    settings of normal operation are restored, so the database file can be
+    uploaded on its own. Nested calls are no-ops.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        defer_indexes (bool, optional): drop secondary indexes during the load. Defaults to True.
+    """
+    if in_bulk_load(conn):
+        yield conn
+        return
+    conn.commit()
+    set_pragmas(conn, BULK_PRAGMAS)
+    if defer_indexes:
+        with conn:
+            for table, spec in TABLES.items():
+                for columns in spec.indexes:
+                    conn.execute(
+                        f'DROP INDEX IF EXISTS "{_index_name(table, columns)}"'
+                    )
+    _bulk_connections.add(id(conn))
+    try:
+        yield conn
+    finally:
+        _bulk_connections.discard(id(conn))
+        conn.commit()
+        logger.info("Rebuilding indexes after bulk load...")
+        with span("rebuild_indexes", "write"):
+            with conn:
+                for table, spec in TABLES.items():
+                    if _table_info(conn, table):
+                        for statement in create_index_sql(table, spec):
+                            conn.execute(statement)
+            conn.execute("ANALYZE")
+            conn.commit()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        set_pragmas(conn, SAFE_PRAGMAS)
@@ -0,0 +1,214 @@
+"""run timelines: nested spans exported in the Chrome trace-event format
+"""
+# -- Imports --------------------------------------------------------------------------
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+TRACE_DIR = os.environ.get("NBA_DB_TRACE_DIR", os.path.join("logs", "traces"))
+MAX_EVENTS = 1_000_000  # spans kept per run, later ones are counted and dropped
+
+
+# -- Classes -------------------------------------------------------------------------
+class Tracer:
+    """records the spans of a run
+
+    A span covers a stage, a batch or an extractor call and nests inside the
+    spans that are open on the same thread, so a trace viewer
+    (``chrome://tracing``, https://ui.perfetto.dev) shows the run as one
+    timeline per thread, e.g. the main thread fetching and validating and
+    the writer thread writing. :meth:`export` writes the spans as a Chrome
+    trace-event file.
+
+    Args:
+        enabled (bool, optional): record spans, a disabled tracer costs a function call per span. Defaults to True.
+        max_events (int, optional): spans kept before later ones are dropped. Defaults to MAX_EVENTS.
+    """
+
+    def __init__(self, enabled: bool = True, max_events: int = MAX_EVENTS):
+        self.enabled = enabled
+        self.max_events = max_events
+        self.started = time.time()
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+
+    def _now(self) -> float:
+        # microseconds since the start of the run, the unit of trace events
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _add(self, event: Dict[str, Any]) -> None:
+        thread = threading.current_thread()
+        event.update(pid=os.getpid(), tid=thread.ident)
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "nba_db", **args) -> Iterator[Dict[str, Any]]:
+        """records the duration of a block
+
+        Args:
+            name (str): span name, e.g. ``play_by_play``
+            cat (str, optional): category, e.g. ``stage`` or ``batch``. Defaults to "nba_db".
+            **args: details shown with the span, e.g. ``games=1000``
+
+        Yields:
+            Dict[str, Any]: the details, to add results such as row counts from inside the block
+        """
+        if not self.enabled:
+            yield args
+            return
+        start = self._now()
+        try:
+            yield args
+        except BaseException as exc:
+            args["error"] = repr(exc)
+            raise
+        finally:
+            self._add(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": self._now() - start,
+                    "args": args,
+                }
+            )
+
+    def instant(self, name: str, cat: str = "nba_db", **args) -> None:
+        """records a point in time, e.g. the proxy pool becoming ready"""
+        if self.enabled:
+            self._add(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "i",
+                    "s": "t",
+                    "ts": self._now(),
+                    "args": args,
+                }
+            )
+
+    def events(self) -> List[Dict[str, Any]]:
+        """returns the recorded spans and the names of their threads as trace events"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "nba_db"}}
+        ] + [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in threads.items()
+        ]
+        return metadata + sorted(events, key=lambda event: event["ts"])
+
+    def export(self, run: str, directory: Optional[str] = None) -> Optional[str]:
+        """writes the timeline of a run as a Chrome trace-event file
+
+        A span named after the run covers everything since the tracer was
+        created. Files are kept as ``<run>-<start time>.json``.
+
+        Args:
+            run (str): name of the run, e.g. ``daily``
+            directory (str, optional): output directory. Defaults to None (``$NBA_DB_TRACE_DIR``, ``logs/traces``).
+
+        Returns:
+            str: path of the trace file, None if the tracer is disabled
+        """
+        if not self.enabled:
+            return None
+        self._add(
+            {
+                "name": run,
+                "cat": "run",
+                "ph": "X",
+                "ts": 0.0,
+                "dur": self._now(),
+                "args": {"dropped_spans": self.dropped},
+            }
+        )
+        directory = directory or TRACE_DIR
+        os.makedirs(directory, exist_ok=True)
+        started = datetime.fromtimestamp(self.started).strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(directory, f"{run}-{started}.json")
+        trace = {
+            "traceEvents": self.events(),
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "run": run,
+                "started_at": datetime.fromtimestamp(self.started).isoformat(),
+            },
+        }
+        with open(path, "w") as f:
+            json.dump(trace, f, default=str)
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} spans beyond {self.max_events}.")
+        logger.info(f"Exported {run} trace to {path}.")
+        return path
+
+
+# -- Functions -----------------------------------------------------------------------
+# spans outside of a run are not recorded, see set_tracer
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer() -> Tracer:
+    """returns the tracer spans are recorded into"""
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """sets the tracer spans are recorded into, e.g. a new one per run
+
+    Args:
+        tracer (Tracer): tracer to use
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def span(name: str, cat: str = "nba_db", **args):
+    """records a span with the current tracer, see :meth:`Tracer.span`"""
+    return _tracer.span(name, cat, **args)
+
+
+def traced(cat: str = "nba_db", name: Optional[str] = None) -> Callable:
+    """decorator recording every call of a function as a span
+
+    Args:
+        cat (str, optional): category of the spans. Defaults to "nba_db".
+        name (str, optional): span name. Defaults to None (the function name).
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(name or func.__name__, cat):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -4,11 +4,15 @@
 import logging
 import os
 import shutil
+import sqlite3
 import subprocess
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
+from typing import Iterable, Iterator, Optional
 
 import pandas as pd
 
+from nba_db.cache import ResponseCache
 from nba_db.extract import (
     get_box_score_summaries,
     get_draft_combine_stats,
@@ -22,106 +26,389 @@ from nba_db.extract import (
     get_teams,
     get_teams_details,
 )
-from nba_db.logger import log
+from nba_db.fetch import set_cache, set_landing
+from nba_db.landing import LandingStore
+from nba_db.ledger import (
+    ensure_ledger,
+    has_pending,
+    mark,
+    pending,
+    register,
+    run_batches,
+    run_stage,
+)
+from nba_db.logger import log, reset_sampling, start_queue_logging, stop_queue_logging
+from nba_db.metrics import MetricsRegistry, set_registry
+from nba_db.proxy import ProxyPool, save_known_proxies
+from nba_db.replay import replay_tables
+from nba_db.schema import bulk_load, migrate
+from nba_db.trace import Tracer, set_tracer, span
 from nba_db.utils import (
+    DB_PATH,
     download_db,
     dump_db,
     get_db_conn,
-    get_proxies,
+    start_proxy_pool,
     upload_new_db_version,
 )
 
 logger = logging.getLogger("nba_db_logger")
 
+# -- Constants ------------------------------------------------------------------------
+# ledger stages of each kind of run; the ledger is published with the database, so
+# runs only look at their own stages when deciding whether to resume
+INIT_STAGES = (
+    "players",
+    "teams",
+    "game_log",
+    "team_details",
+    "player_info",
+    "box_score_summary",
+    "play_by_play",
+    "draft_combine_stats",
+    "draft_history",
+    "team_info_common",
+    "dump",
+    "upload",
+)
+DAILY_STAGES = ("daily_box_score_summary", "daily_play_by_play", "publish")
+MONTHLY_STAGES = (
+    "monthly_players",
+    "monthly_teams",
+    "monthly_player_info",
+    "monthly_team_details",
+    "monthly_draft_combine_stats",
+    "monthly_draft_history",
+    "monthly_team_info_common",
+)
+
 
 # -- Functions -----------------------------------------------------------------------
-@log(logger)
-def init():
+def has_unfinished_run(stages: Iterable[str], key: Optional[str] = None) -> bool:
+    """checks whether the local database has unfinished units of a run in its work ledger
+
+    Args:
+        stages (Iterable[str]): ledger stages of the run, e.g. DAILY_STAGES
+        key (str, optional): only consider units with this key, e.g. the month of a monthly run. Defaults to None (all keys).
+
+    Returns:
+        bool: True if an interrupted run can be resumed
+    """
+    if not os.path.isfile(DB_PATH):
+        return False
+    conn = sqlite3.connect(DB_PATH)
     try:
-        os.mkdir("nba-db")
-    except FileExistsError:
-        logger.warning("nba directory already exists. Removing...")
-        shutil.rmtree("nba-db")
-        os.mkdir("nba-db")
-    subprocess.run(
-        "wget https://raw.githubusercontent.com/wyattowalsh/nba-db/main/dataset-metadata.json -P nba-db",
-        shell=True,
-    )
-    proxies = get_proxies()
-    conn = get_db_conn()
-    get_players(True, conn)
-    get_teams(True, conn)
-    get_league_game_log_all(proxies, conn)
-    get_teams_details(proxies, True, conn)
-    get_player_info(proxies, True, conn)
-    game_ids = pd.read_sql("SELECT game_id FROM game", conn).game_id.to_list()
-    get_box_score_summaries(game_ids, proxies, True, conn)
-    get_play_by_play(game_ids, proxies, True, conn)
-    get_draft_combine_stats(proxies, None, True, conn)
-    get_draft_history(proxies, None, True, conn)
-    get_team_info_common(proxies, True, conn)
-    dump_db(conn)
-    # upload new db version to Kaggle
-    version_message = f"Daily update: {pd.to_datetime('today').strftime('%Y-%m-%d')}"
-    upload_new_db_version(version_message)
-    # close db connection
-    conn.close()
+        return has_pending(conn, stages, key)
+    finally:
+        conn.close()
+
+
+@contextmanager
+def update_run(name: str, ignore_ttl: bool = False) -> Iterator[ExitStack]:
+    """sets up the state of an update run and tears it down, also if the run fails
+
+    Logging goes through a queue, and fresh metrics and a fresh tracer are
+    recorded. Requests go through the response cache and are landed in
+    the landing zone. On exit, the resources registered on the yielded
+    stack are released first, e.g. the database connection and the proxy
+    pool. Then the cache and the landing store are closed, the metrics and
+    the trace of the run are exported and logging is restored, so failed
+    runs leave their metrics and trace behind as well.
+
+    Args:
+        name (str): name of the run, e.g. ``daily``
+        ignore_ttl (bool, optional): serve every cached response regardless of its age. Defaults to False.
+
+    Yields:
+        ExitStack: stack to register the run's resources on
+    """
+    listener = start_queue_logging()
+    reset_sampling()
+    metrics = MetricsRegistry()
+    set_registry(metrics)
+    tracer = Tracer()
+    set_tracer(tracer)
+    cache = ResponseCache(ignore_ttl=ignore_ttl)
+    set_cache(cache)
+    landing = LandingStore()
+    set_landing(landing)
+    try:
+        with ExitStack() as stack:
+            yield stack
+    finally:
+        set_cache(None)
+        cache.close()
+        set_landing(None)
+        landing.close()
+        # spans after the run are not recorded
+        set_tracer(Tracer(enabled=False))
+        try:
+            metrics.export(name)
+            tracer.export(name)
+        finally:
+            stop_queue_logging(listener)
+
+
+def _start_proxies(stack: ExitStack) -> ProxyPool:
+    # the pool stops probing and saves its proxies when the run ends
+    with span("proxy_pool", "stage"):
+        proxies = start_proxy_pool()
+    stack.callback(save_known_proxies, proxies)
+    stack.callback(proxies.stop_probing)
+    return proxies
 
 
 @log(logger)
-def daily():
-    # download db from Kaggle
-    download_db()
-    # get proxies and establish db connenction
-    proxies = get_proxies()
-    conn = get_db_conn()
-    # get latest date in db and add a day
-    latest_db_date = pd.read_sql("SELECT MAX(GAME_DATE) FROM game", conn).iloc[0, 0]
-    # check if today is a game day
-    if pd.to_datetime(latest_db_date) >= pd.to_datetime(datetime.today().date()):
-        logger.info("No new games today. Exiting...")
-        return
-    # add a day to latest db date
-    latest_db_date = (pd.to_datetime(latest_db_date) + pd.Timedelta(days=1)).strftime(
-        "%Y-%m-%d"
-    )
-    # get new games and add to db
-    df = get_league_game_log_from_date(
-        latest_db_date, proxies, save_to_db=True, conn=conn
-    )
-    if len(df) == 0:
-        conn.close()
-        return 0
-    games = df["game_id"].unique().tolist()
-    # get box score summaries and play by play for new games
-    get_box_score_summaries(games, proxies, save_to_db=True, conn=conn)
-    get_play_by_play(games, proxies, save_to_db=True, conn=conn)
-    # dump db tables to csv
-    dump_db(conn)
-    # upload new db version to Kaggle
-    version_message = f"Daily update: {pd.to_datetime('today').strftime('%Y-%m-%d')}"
-    upload_new_db_version(version_message)
-    # close db connection
-    conn.close()
+def init(replay_cache: bool = False, resume: bool = True):
+    """builds the database from scratch
+
+    Every stage is recorded in the work ledger of the database, per season for
+    the league game log and per game for box score summaries and play by play.
+    If a previous build was interrupted it is resumed from the first pending
+    unit instead of starting over.
+
+    Args:
+        replay_cache (bool, optional): serve every cached response regardless of its age, e.g. to rebuild after a schema change without going to the network. Defaults to False.
+        resume (bool, optional): resume an interrupted build if there is one. Defaults to True.
+    """
+    with update_run("init", ignore_ttl=replay_cache) as stack:
+        if resume and has_unfinished_run(INIT_STAGES):
+            logger.info("Resuming interrupted build...")
+        else:
+            try:
+                os.mkdir("nba-db")
+            except FileExistsError:
+                logger.warning("nba directory already exists. Removing...")
+                shutil.rmtree("nba-db")
+                os.mkdir("nba-db")
+            subprocess.run(
+                "wget https://raw.githubusercontent.com/wyattowalsh/nba-db/main/dataset-metadata.json -P nba-db",
+                shell=True,
+            )
+        proxies = _start_proxies(stack)
+        conn = get_db_conn()
+        stack.callback(conn.close)
+        ensure_ledger(conn)
+        with span("migrate", "stage"):
+            migrate(conn)
+        # load everything in bulk mode; indexes are rebuilt and safe settings restored
+        # before the database is dumped and uploaded
+        with bulk_load(conn):
+            run_stage(conn, "players", lambda: get_players(True, conn))
+            run_stage(conn, "teams", lambda: get_teams(True, conn))
+            run_batches(
+                conn,
+                "game_log",
+                range(1946, datetime.now().year),
+                lambda seasons: get_league_game_log_all(
+                    proxies,
+                    conn,
+                    [int(season) for season in seasons],
+                    if_exists="append",
+                ),
+                batch_size=10,
+            )
+            run_stage(
+                conn, "team_details", lambda: get_teams_details(proxies, True, conn)
+            )
+            run_stage(conn, "player_info", lambda: get_player_info(proxies, True, conn))
+            game_ids = pd.read_sql(
+                "SELECT DISTINCT game_id FROM game", conn
+            ).game_id.to_list()
+            run_batches(
+                conn,
+                "box_score_summary",
+                game_ids,
+                lambda batch: get_box_score_summaries(batch, proxies, True, conn),
+            )
+            run_batches(
+                conn,
+                "play_by_play",
+                game_ids,
+                lambda batch: get_play_by_play(batch, proxies, True, conn),
+            )
+            run_stage(
+                conn,
+                "draft_combine_stats",
+                lambda: get_draft_combine_stats(proxies, None, True, conn),
+            )
+            run_stage(
+                conn,
+                "draft_history",
+                lambda: get_draft_history(proxies, None, True, conn),
+            )
+            run_stage(
+                conn,
+                "team_info_common",
+                lambda: get_team_info_common(proxies, True, conn),
+            )
+        run_stage(conn, "dump", lambda: dump_db(conn), require_result=False)
+        # upload new db version to Kaggle
+        version_message = (
+            f"Daily update: {pd.to_datetime('today').strftime('%Y-%m-%d')}"
+        )
+        run_stage(
+            conn,
+            "upload",
+            lambda: upload_new_db_version(version_message),
+            require_result=False,
+        )
 
 
 @log(logger)
-def monthly():
-    # download db from Kaggle
-    download_db()
-    # get proxies and establish db connenction
-    proxies = get_proxies()
+def daily(resume: bool = True):
+    """adds the games played since the latest game in the database
+
+    New games are registered in the work ledger, so an interrupted update is
+    resumed from the local database instead of downloading it again.
+
+    Args:
+        resume (bool, optional): resume an interrupted update if there is one. Defaults to True.
+    """
+    with update_run("daily") as stack:
+        today = pd.to_datetime("today").strftime("%Y-%m-%d")
+        # a run is unfinished until its games are published, games failing for good
+        # are retried by later runs but do not hold back the download
+        if resume and has_unfinished_run(["publish"]):
+            logger.info("Resuming interrupted update...")
+        else:
+            # download db from Kaggle
+            with span("download", "stage"):
+                download_db()
+        # get proxies and establish db connenction
+        proxies = _start_proxies(stack)
+        conn = get_db_conn()
+        stack.callback(conn.close)
+        ensure_ledger(conn)
+        with span("migrate", "stage"):
+            migrate(conn)
+        # get latest date in db and add a day
+        latest_db_date = pd.read_sql("SELECT MAX(GAME_DATE) FROM game", conn).iloc[0, 0]
+        # check if today is a game day
+        if pd.to_datetime(latest_db_date) < pd.to_datetime(datetime.today().date()):
+            # add a day to latest db date
+            latest_db_date = (
+                pd.to_datetime(latest_db_date) + pd.Timedelta(days=1)
+            ).strftime("%Y-%m-%d")
+            # get new games and add to db
+            df = get_league_game_log_from_date(
+                latest_db_date, proxies, save_to_db=True, conn=conn
+            )
+            if df is not None and len(df) > 0:
+                games = df["game_id"].unique().tolist()
+                # stages of their own, so leftovers of init are not fetched daily
+                register(conn, "daily_box_score_summary", games)
+                register(conn, "daily_play_by_play", games)
+                register(conn, "publish", [today])
+        if not pending(conn, "publish"):
+            logger.info("No new games today. Exiting...")
+            return 0
+        # get box score summaries and play by play for new (and unfinished) games
+        run_batches(
+            conn,
+            "daily_box_score_summary",
+            [],
+            lambda batch: get_box_score_summaries(
+                batch, proxies, save_to_db=True, conn=conn
+            ),
+        )
+        run_batches(
+            conn,
+            "daily_play_by_play",
+            [],
+            lambda batch: get_play_by_play(batch, proxies, save_to_db=True, conn=conn),
+        )
+        # dump db tables to csv
+        with span("dump", "stage"):
+            dump_db(conn)
+        # the ledger is part of the uploaded database, so it is completed beforehand
+        publish = pending(conn, "publish")
+        mark(conn, "publish", publish, "done")
+        # upload new db version to Kaggle
+        version_message = (
+            f"Daily update: {pd.to_datetime('today').strftime('%Y-%m-%d')}"
+        )
+        try:
+            with span("upload", "stage"):
+                upload_new_db_version(version_message)
+        except Exception as exc:
+            mark(conn, "publish", publish, "failed", repr(exc))
+            raise
+
+
+@log(logger)
+def monthly(resume: bool = True):
+    """refreshes players, teams and draft tables
+
+    Args:
+        resume (bool, optional): resume an interrupted update if there is one. Defaults to True.
+    """
+    with update_run("monthly") as stack:
+        month = pd.to_datetime("today").strftime("%Y-%m")
+        if resume and has_unfinished_run(MONTHLY_STAGES, key=month):
+            logger.info("Resuming interrupted update...")
+        else:
+            # download db from Kaggle
+            with span("download", "stage"):
+                download_db()
+        # get proxies and establish db connenction
+        proxies = _start_proxies(stack)
+        conn = get_db_conn()
+        stack.callback(conn.close)
+        ensure_ledger(conn)
+        with span("migrate", "stage"):
+            migrate(conn)
+        stages = {
+            "players": lambda: get_players(save_to_db=True, conn=conn),
+            "teams": lambda: get_teams(save_to_db=True, conn=conn),
+            "player_info": lambda: get_player_info(
+                proxies=proxies, save_to_db=True, conn=conn
+            ),
+            "team_details": lambda: get_teams_details(
+                proxies=proxies, save_to_db=True, conn=conn
+            ),
+            "draft_combine_stats": lambda: get_draft_combine_stats(
+                proxies=proxies, season=None, save_to_db=True, conn=conn
+            ),
+            "draft_history": lambda: get_draft_history(
+                proxies=proxies, season=None, save_to_db=True, conn=conn
+            ),
+            "team_info_common": lambda: get_team_info_common(
+                proxies=proxies, save_to_db=True, conn=conn
+            ),
+        }
+        # update players & teams
+        for stage in stages:
+            register(conn, f"monthly_{stage}", [month])
+        for stage, func in stages.items():
+            run_stage(conn, f"monthly_{stage}", func, key=month)
+        # upload new db version to Kaggle
+        version_message = (
+            f"Monthly update: {pd.to_datetime('today').strftime('%Y-%m-%d')}"
+        )
+        with span("upload", "stage"):
+            upload_new_db_version(version_message)
+
+
+@log(logger)
+def replay(tables=None, workers=None):
+    """rebuilds tables of the local database from the landing zone
+
+    Every response fetched by :func:`init`, :func:`daily` and :func:`monthly`
+    is kept in the landing zone (see :class:`nba_db.landing.LandingStore`), so
+    tables can be rebuilt after a change to parsing, validation or the schema
+    without a single request to stats.nba.com.
+
+    Args:
+        tables (list[str], optional): tables to rebuild. Defaults to None (every table filled from the api).
+        workers (int, optional): number of shards parsed at once. Defaults to None (one per cpu).
+
+    Returns:
+        dict[str, int]: number of rows written per table
+    """
     conn = get_db_conn()
-    # update players & teams
-    get_players(save_to_db=True, conn=conn)
-    get_teams(save_to_db=True, conn=conn)
-    get_player_info(proxies=proxies, save_to_db=True, conn=conn)
-    get_teams_details(proxies=proxies, save_to_db=True, conn=conn)
-    get_draft_combine_stats(proxies=proxies, season=None, save_to_db=True, conn=conn)
-    get_draft_history(proxies=proxies, season=None, save_to_db=True, conn=conn)
-    get_team_info_common(proxies=proxies, save_to_db=True, conn=conn)
-    # upload new db version to Kaggle
-    version_message = f"Monthly update: {pd.to_datetime('today').strftime('%Y-%m-%d')}"
-    upload_new_db_version(version_message)
-    # close db connection
-    conn.close()
+    migrate(conn)
+    try:
+        return replay_tables(conn, tables, workers=workers)
+    finally:
+        conn.close()
@@ -10,23 +10,52 @@ import sqlite3
 import subprocess
 import time
 import traceback
+from contextlib import closing
 from functools import wraps
 from logging.config import fileConfig
-from multiprocessing import Pool
-from typing import Any, Callable, Dict, Sequence, Type
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+)
 
 import pandas as pd
 import requests
 
+from nba_db.export import CSV_DIR, PARQUET_DIR, export_csv, export_parquet
+from nba_db.fetch import fetch_iter
 from nba_db.logger import log
+from nba_db.proxy import PROBE_URL, ProxyPool, load_known_proxies
 
 logger = logging.getLogger("nba_db_logger")
 
+# -- Constants ------------------------------------------------------------------------
+DB_PATH = "nba-db/nba.sqlite"
+PROXY_LISTS = [
+    ("https://raw.githubusercontent.com/TheSpeedX/PROXY-List/master/http.txt", None),
+    (
+        "https://raw.githubusercontent.com/monosans/proxy-list/main/proxies_geolocation/http.txt",
+        "|",
+    ),
+]
+if os.environ.get("NBA_DB_PROXY_LISTS"):  # e.g. the proxy list of a mock server
+    PROXY_LISTS = [(url, None) for url in os.environ["NBA_DB_PROXY_LISTS"].split(",")]
+PROXY_TARGET = 50  # validated proxies after which discovery stops
+PROXY_MIN_POOL = 5  # validated proxies needed before extraction starts
+PROXY_WAIT_TIMEOUT = 60  # longest wait in seconds for PROXY_MIN_POOL proxies
+PROXY_CHECK_CONCURRENCY = 250
+
 
 # -- Functions -----------------------------------------------------------------------
 def check_proxy(proxy):
     try:
-        res = requests.get("http://example.com", proxies={"http": proxy}, timeout=3)
+        res = requests.get(PROBE_URL, proxies={"http": proxy}, timeout=3)
         if res.ok:
             return proxy
     except IOError:
@@ -35,47 +64,112 @@ def check_proxy(proxy):
         return None
 
 
+def download_proxy_lists() -> List[str]:
+    """downloads the candidate proxies of the public proxy lists
+
+    Returns:
+        list[str]: distinct proxy addresses of the form host:port, in list order
+    """
+    candidates = []
+    for url, sep in PROXY_LISTS:
+        try:
+            df = pd.read_csv(url, sep=sep or ",", header=None)
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Proxy list {url} failed: {exc!r}")
+            continue
+        candidates.extend(df.iloc[:, 0].astype(str).tolist())
+    return list(dict.fromkeys(candidates))
+
+
+def discover_proxies(
+    target: Optional[int] = PROXY_TARGET,
+    known: Iterable[str] = (),
+    concurrency: int = PROXY_CHECK_CONCURRENCY,
+) -> Iterator[str]:
+    """validates proxies concurrently and yields each one as soon as it answers
+
+    Proxies that worked in earlier runs (``known``) are checked first and the
+    public proxy lists are only downloaded if they do not reach ``target``.
+    Once ``target`` proxies are validated the outstanding checks are
+    cancelled instead of waiting for the slowest of thousands of probes.
+
+    Args:
+        target (int, optional): number of proxies after which discovery stops. Defaults to PROXY_TARGET, None checks every candidate.
+        known (Iterable[str], optional): proxies to check before the public lists. Defaults to ().
+        concurrency (int, optional): number of concurrent checks. Defaults to PROXY_CHECK_CONCURRENCY.
+
+    Yields:
+        str: validated proxy addresses in the order they answered
+    """
+    found = 0
+
+    def validated(candidates):
+        nonlocal found
+        with closing(fetch_iter(check_proxy, candidates, concurrency)) as results:
+            for _, proxy in results:
+                if proxy is None:
+                    continue
+                found += 1
+                yield proxy
+                if target is not None and found >= target:
+                    return
+
+    known = list(dict.fromkeys(known))
+    if known:
+        logger.info(f"Checking {len(known)} known proxies...")
+        yield from validated(known)
+        if target is not None and found >= target:
+            return
+    seen = set(known)
+    candidates = [p for p in download_proxy_lists() if p not in seen]
+    logger.info(f"Found {len(candidates)} proxies. Checking proxies...")
+    yield from validated(candidates)
+
+
 @log(logger)
-def get_proxies():
-    """retrieves list of proxy addresses using the proxyscrape library
+def get_proxies(target: Optional[int] = PROXY_TARGET) -> List[str]:
+    """retrieves validated proxy addresses, starting with the ones that worked last run
+
+    Args:
+        target (int, optional): number of proxies after which checking stops. Defaults to PROXY_TARGET, None checks every candidate.
 
     Returns:
-        list[str]: list of proxies of the form port:host
+        list[str]: list of proxies of the form host:port
     """
     logger.info("Retrieving proxies...")
-    proxies = pd.read_csv(
-        "https://raw.githubusercontent.com/TheSpeedX/PROXY-List/master/http.txt",
-        header=None,
-    )
-    df = (
-        pd.read_csv(
-            "https://raw.githubusercontent.com/monosans/proxy-list/main/proxies_geolocation/http.txt",
-            sep="|",
-            header=None,
-        )
-        .iloc[:, 0]
-        .reset_index(drop=True)
-    )
-    proxies = (
-        pd.concat([proxies, df])
-        .drop_duplicates()
-        .reset_index(drop=True)
-        .values.tolist()
-    )
-    proxies = [p for sublist in proxies for p in sublist]
-    logger.info(f"Found {len(proxies)} proxies. Checking proxies...")
-    with Pool(250) as p:
-        proxies = p.map(check_proxy, proxies)
-    proxies = pd.Series(proxies).dropna().tolist()
+    proxies = list(discover_proxies(target, load_known_proxies()))
     logger.info(f"Found {len(proxies)} valid proxies. Returning proxies...")
     return proxies
 
 
+def start_proxy_pool(
+    min_size: int = PROXY_MIN_POOL, timeout: float = PROXY_WAIT_TIMEOUT
+) -> ProxyPool:
+    """starts proxy discovery and returns the pool once it can serve requests
+
+    Discovery keeps filling the pool in the background (see
+    :func:`discover_proxies`) while extraction already uses the first proxies.
+
+    Args:
+        min_size (int, optional): proxies to wait for before returning. Defaults to PROXY_MIN_POOL.
+        timeout (float, optional): longest wait in seconds. Defaults to PROXY_WAIT_TIMEOUT.
+
+    Returns:
+        ProxyPool: proxy pool being filled
+    """
+    pool = ProxyPool()
+    pool.start_discovery(discover_proxies(known=load_known_proxies()))
+    pool.start_probing()
+    size = pool.wait(min_size, timeout)
+    logger.info(f"Starting with {size} validated proxies.")
+    return pool
+
+
 @log(logger)
 def get_db_conn():
     logger.info("Connecting to database...")
-    db_name = "nba-db/nba.sqlite"
-    conn = sqlite3.connect(db_name)
+    # shared with the database writer thread, see nba_db.writer.DBWriter
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     logger.info("Connected to database. Returning connection object...")
     return conn
 
@@ -115,20 +209,22 @@ def upload_new_db_version(message):
 
 
 @log(logger)
-def dump_db(conn):
-    tables = pd.read_sql(
-        "SELECT name FROM sqlite_schema WHERE type ='table' AND name NOT LIKE 'sqlite_%';",
-        conn,
-    )["name"]
-    logger.info(f"Dumping {len(tables)} database tables to csv files...")
-    # check if csv directory exists
-    try:
-        os.mkdir("nba-db/csv")
-    except FileExistsError:
-        logger.warning("csv directory already exists. Removing...")
-        shutil.rmtree("nba-db/csv")
-        os.mkdir("nba-db/csv")
-    for table in tables:
-        data = pd.read_sql(f"SELECT * FROM {table}", conn)
-        data.to_csv(f"nba-db/csv/{table}.csv", index=False)
-    logger.info("Dumped database tables to csv files.")
+def dump_db(conn, full: bool = False, parquet: bool = False):
+    """dumps the database tables to csv files in ``nba-db/csv``
+
+    Only rows added since the previous dump are appended to the csv files of
+    append-only tables; replaced tables are regenerated (see
+    :func:`nba_db.export.export_csv`).
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        full (bool, optional): regenerate every csv file. Defaults to False.
+        parquet (bool, optional): additionally export the tables to parquet files in ``nba-db/parquet`` (requires pyarrow). Defaults to False.
+
+    Returns:
+        Dict[str, int]: number of csv rows written per table
+    """
+    written = export_csv(conn, CSV_DIR, full=full)
+    if parquet:
+        export_parquet(conn, PARQUET_DIR)
+    return written
@@ -0,0 +1,178 @@
+"""fast schema validation with compiled cast plans
+"""
+# -- Imports --------------------------------------------------------------------------
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Type
+
+import numpy as np
+import pandas as pd
+from pandera import SchemaModel
+from pandera.engines import pandas_engine
+from pandera.engines.numpy_engine import Object
+from pandera.engines.pandas_engine import NpString
+
+from nba_db.dtypes import to_storage_dtypes
+from nba_db.metrics import inc, observe
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+VALIDATION_LEVELS = ("full", "sampled", "fast", "off")
+DEFAULT_VALIDATION_LEVEL = os.environ.get("NBA_DB_VALIDATION", "sampled")
+SAMPLE_SIZE = 1_000  # rows checked by pandera at the sampled level
+
+_level = DEFAULT_VALIDATION_LEVEL
+
+
+# -- Classes -------------------------------------------------------------------------
+class CastPlan(NamedTuple):
+    """vectorized equivalent of validating a frame against a data schema
+
+    Args:
+        columns (List[str]): required columns
+        astype (Dict[str, str]): dtype of every coerced numeric, boolean or datetime column
+        strings (List[str]): coerced string columns, converted with nulls kept
+        checked (Dict[str, object]): pandera dtypes of columns that are checked but not coerced
+        not_null (List[str]): columns that must not contain nulls
+    """
+
+    columns: List[str]
+    astype: Dict[str, str]
+    strings: List[str]
+    checked: Dict[str, object]
+    not_null: List[str]
+
+
+# -- Functions -----------------------------------------------------------------------
+def set_validation_level(level: str) -> None:
+    """sets the validation level used by :func:`validate`
+
+    Args:
+        level (str): one of ``full`` (pandera), ``sampled`` (cast plan on all rows and pandera on a sample), ``fast`` (cast plan only) or ``off``
+    """
+    global _level
+    if level not in VALIDATION_LEVELS:
+        raise ValueError(f"validation level must be one of {VALIDATION_LEVELS}")
+    _level = level
+
+
+def get_validation_level() -> str:
+    """returns the validation level used by :func:`validate`"""
+    return _level
+
+
+@lru_cache(maxsize=None)
+def compile_schema(schema: Type[SchemaModel]) -> CastPlan:
+    """compiles a data schema into a cast plan
+
+    Args:
+        schema (Type[SchemaModel]): data schema
+
+    Returns:
+        CastPlan: cast plan of the schema
+    """
+    dataframe_schema = schema.to_schema()
+    astype, strings, checked, not_null = {}, [], {}, []
+    for name, column in dataframe_schema.columns.items():
+        if not column.nullable:
+            not_null.append(name)
+        if isinstance(column.dtype, Object):
+            continue
+        if not (column.coerce or dataframe_schema.coerce):
+            checked[name] = column.dtype
+        elif isinstance(column.dtype, NpString):
+            strings.append(name)
+        else:
+            astype[name] = str(column.dtype)
+    return CastPlan(list(dataframe_schema.columns), astype, strings, checked, not_null)
+
+
+def apply_plan(plan: CastPlan, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """casts a frame with a cast plan
+
+    Args:
+        plan (CastPlan): cast plan
+        df (pd.DataFrame): frame to cast
+
+    Returns:
+        Optional[pd.DataFrame]: cast frame, None if the frame does not satisfy the plan
+    """
+    if any(column not in df.columns for column in plan.columns):
+        return None
+    for name, dtype in plan.checked.items():
+        series = df[name]
+        if not np.all(dtype.check(pandas_engine.Engine.dtype(series.dtype), series)):
+            return None
+    if plan.not_null and df[plan.not_null].isna().to_numpy().any():
+        return None
+    try:
+        df = df.astype(plan.astype)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    # columns that already hold strings (the usual case for api data) are left alone
+    convert = [
+        name
+        for name in plan.strings
+        if pd.api.types.infer_dtype(df[name], skipna=True) not in ("string", "empty")
+    ]
+    if convert:
+        strings = df[convert]
+        df[convert] = strings.astype(str).where(strings.notna(), strings)
+    return df
+
+
+def validate(
+    schema: Type[SchemaModel],
+    df: pd.DataFrame,
+    level: Optional[str] = None,
+    compact: bool = True,
+) -> pd.DataFrame:
+    """validates a frame against a data schema at the configured level
+
+    The ``fast`` and ``sampled`` levels cast the frame with the schema's
+    compiled plan, a single ``astype`` plus one batched null check, instead of
+    running pandera column by column. ``sampled`` additionally runs pandera on
+    a random sample of ``SAMPLE_SIZE`` rows, which catches violations of
+    column checks. Whenever the plan does not apply, pandera validates the
+    whole frame, so errors are always reported as pandera ``SchemaErrors``
+    with their failure cases. Valid frames are converted to the compact
+    dtypes of :func:`nba_db.dtypes.to_storage_dtypes`.
+
+    Args:
+        schema (Type[SchemaModel]): data schema
+        df (pd.DataFrame): frame to validate
+        level (str, optional): validation level. Defaults to None (see :func:`set_validation_level`).
+        compact (bool, optional): convert the validated frame to compact storage dtypes. Defaults to True.
+
+    Raises:
+        pandera.errors.SchemaErrors: raised if the frame is invalid
+
+    Returns:
+        pd.DataFrame: validated frame
+    """
+    level = level or _level
+    if level == "off":
+        return df
+    start = time.perf_counter()
+    if level == "full":
+        cast = schema.validate(df, lazy=True)
+    else:
+        cast = apply_plan(compile_schema(schema), df)
+        if cast is None:
+            logger.debug(
+                f"Cast plan of {schema.__name__} failed, validating in full..."
+            )
+            cast = schema.validate(df, lazy=True)
+        elif level == "sampled" and len(cast) > 0:
+            sample = cast.sample(min(len(cast), SAMPLE_SIZE), random_state=0)
+            schema.validate(sample, lazy=True)
+    cast = to_storage_dtypes(schema, cast) if compact else cast
+    name = schema.__name__
+    observe(
+        "nba_db_validation_duration_seconds", time.perf_counter() - start, schema=name
+    )
+    inc("nba_db_rows_validated_total", len(cast), schema=name)
+    return cast
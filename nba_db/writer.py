@@ -0,0 +1,184 @@
+"""single-writer thread that persists extracted batches
+"""
+# -- Imports --------------------------------------------------------------------------
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from nba_db.metrics import observe
+from nba_db.schema import write_table
+from nba_db.trace import span
+
+logger = logging.getLogger("nba_db_logger")
+
+# -- Constants ------------------------------------------------------------------------
+WRITER_QUEUE_SIZE = 16  # batches waiting for the writer before producers block
+WRITER_FLUSH_ROWS = 50_000  # buffered rows of a table that trigger a write
+WRITER_COMMIT_INTERVAL = 5.0  # seconds between writes of partially filled buffers
+
+_STOP = object()
+
+
+# -- Classes -------------------------------------------------------------------------
+class DBWriter:
+    """writes batches of rows to the database from a dedicated thread
+
+    Producers hand validated frames to :meth:`put` and go back to fetching
+    while the writer thread, the only user of the connection inside the
+    ``with`` block, coalesces the frames per table and upserts them with
+    :func:`nba_db.schema.write_table` once ``flush_rows`` rows are buffered
+    or ``commit_interval`` seconds have passed. The queue is bounded, so
+    :meth:`put` blocks when the writer falls behind; with the fetch engine
+    that backpressure propagates to the network requests.
+
+    Leaving the ``with`` block flushes every buffer and waits for the thread,
+    and an error raised by the writer is re-raised in the producer. The
+    connection has to be shareable between threads
+    (``check_same_thread=False``, see :func:`nba_db.utils.get_db_conn`);
+    otherwise batches are written synchronously by :meth:`put`.
+
+    Args:
+        conn (sqlite3.Connection): database connection
+        queue_size (int, optional): batches waiting for the writer before put blocks. Defaults to WRITER_QUEUE_SIZE.
+        flush_rows (int, optional): buffered rows of a table that trigger a write. Defaults to WRITER_FLUSH_ROWS.
+        commit_interval (float, optional): longest time in seconds rows stay buffered. Defaults to WRITER_COMMIT_INTERVAL.
+    """
+
+    def __init__(
+        self,
+        conn,
+        queue_size: int = WRITER_QUEUE_SIZE,
+        flush_rows: int = WRITER_FLUSH_ROWS,
+        commit_interval: float = WRITER_COMMIT_INTERVAL,
+    ):
+        self.conn = conn
+        self.flush_rows = flush_rows
+        self.commit_interval = commit_interval
+        self.rows_written: Dict[str, int] = {}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._buffers: Dict[str, List[pd.DataFrame]] = {}
+        self._buffered: Dict[str, int] = {}
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        self._threaded = False
+
+    def __enter__(self) -> "DBWriter":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _shareable(self) -> bool:
+        # sqlite3 refuses connections created in another thread by default
+        result = []
+
+        def probe():
+            try:
+                self.conn.execute("SELECT 1")
+                result.append(True)
+            except sqlite3.ProgrammingError:
+                result.append(False)
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def start(self) -> None:
+        """starts the writer thread"""
+        self._threaded = self._shareable()
+        if not self._threaded:
+            logger.warning("Connection cannot be shared, writing synchronously.")
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="nba_db-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, table: str, df: Optional[pd.DataFrame]) -> None:
+        """queues rows to be upserted into a table, blocking while the queue is full
+
+        Args:
+            table (str): table name
+            df (pd.DataFrame): validated rows, None and empty frames are ignored
+        """
+        self._raise_error()
+        if df is None or df.empty:
+            return
+        if not self._threaded:
+            self._add(table, df)
+            return
+        observe("nba_db_queue_depth", self._queue.qsize(), queue="writer")
+        while True:
+            try:
+                self._queue.put((table, df), timeout=1)
+                return
+            except queue.Full:
+                # the writer may have died while we were waiting
+                self._raise_error()
+
+    def close(self) -> None:
+        """writes all buffered rows and stops the writer thread"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        else:
+            self._flush_all()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _add(self, table: str, df: pd.DataFrame) -> None:
+        self._buffers.setdefault(table, []).append(df)
+        self._buffered[table] = self._buffered.get(table, 0) + len(df)
+        if self._buffered[table] >= self.flush_rows:
+            self._flush(table)
+
+    def _flush(self, table: str) -> None:
+        frames = self._buffers.pop(table, [])
+        rows = self._buffered.pop(table, 0)
+        if not frames:
+            return
+        start = time.perf_counter()
+        with span(f"write {table}", "write", table=table, rows=rows):
+            write_table(self.conn, table, pd.concat(frames, ignore_index=True))
+        self.rows_written[table] = self.rows_written.get(table, 0) + rows
+        logger.debug(
+            f"Wrote {rows} rows to {table} in {time.perf_counter() - start:.2f}s."
+        )
+
+    def _flush_all(self) -> None:
+        for table in list(self._buffers):
+            self._flush(table)
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.commit_interval)
+            except queue.Empty:
+                item = None
+            try:
+                if item is _STOP:
+                    self._flush_all()
+                    return
+                if item is not None and self._error is None:
+                    self._add(*item)
+                if time.monotonic() - last_flush >= self.commit_interval:
+                    self._flush_all()
+                    last_flush = time.monotonic()
+            except BaseException as exc:  # handed to the producer
+                logger.error(f"Database writer failed: {exc!r}")
+                self._error = exc
+                self._buffers.clear()
+                self._buffered.clear()
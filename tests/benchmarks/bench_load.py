@@ -0,0 +1,51 @@
+"""bench_load.py -- Benchmarks of writing tables and exporting the database.
+"""
+# -- Imports --------------------------------------------------------------------------
+import itertools
+import sqlite3
+from functools import lru_cache
+
+import pytest
+from payloads import GAME_SCALES, ROUNDS, TABLE_SCHEMAS, table_frames
+
+from nba_db.export import export_csv
+from nba_db.schema import write_table
+from nba_db.validate import validate
+
+
+# -- Helpers --------------------------------------------------------------------------
+@lru_cache(maxsize=None)
+def validated_frames(scale):
+    return {
+        table: validate(TABLE_SCHEMAS[table], df)
+        for table, df in table_frames(scale).items()
+    }
+
+
+# -- Benchmarks -----------------------------------------------------------------------
+@pytest.mark.parametrize("table", list(TABLE_SCHEMAS))
+@pytest.mark.parametrize("scale", GAME_SCALES)
+def test_write_table(benchmark, tmp_path, scale, table):
+    df = validated_frames(scale)[table]
+    paths = (str(tmp_path / f"nba_{i}.sqlite") for i in itertools.count())
+
+    def setup():
+        # every round writes into a new database
+        return (sqlite3.connect(next(paths)), table, df), {}
+
+    benchmark.pedantic(write_table, setup=setup, rounds=ROUNDS[scale])
+
+
+@pytest.mark.parametrize("scale", GAME_SCALES)
+def test_export_csv(benchmark, tmp_path, scale):
+    conn = sqlite3.connect(str(tmp_path / "nba.sqlite"))
+    for table, df in validated_frames(scale).items():
+        write_table(conn, table, df)
+    csv_dirs = (str(tmp_path / f"csv_{i}") for i in itertools.count())
+
+    def setup():
+        return (conn, next(csv_dirs)), {"full": True}
+
+    written = benchmark.pedantic(export_csv, setup=setup, rounds=ROUNDS[scale])
+    assert written["game"] == len(table_frames(scale)["game"])
+    conn.close()
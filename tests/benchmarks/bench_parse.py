@@ -0,0 +1,62 @@
+"""bench_parse.py -- Benchmarks of parsing api responses into frames.
+"""
+# -- Imports --------------------------------------------------------------------------
+import pytest
+from nba_api.stats.endpoints.boxscoresummaryv2 import BoxScoreSummaryV2
+from nba_api.stats.endpoints.leaguegamelog import LeagueGameLog
+from nba_api.stats.endpoints.playbyplayv2 import PlayByPlayV2
+from payloads import (
+    GAME_SCALES,
+    ROUNDS,
+    SCALES,
+    game_payloads,
+    league_game_log_payload,
+    load,
+    scale_game_ids,
+)
+
+from nba_db.extract import (
+    parse_box_score_summary,
+    parse_league_game_log,
+    parse_play_by_play,
+)
+
+
+# -- Benchmarks -----------------------------------------------------------------------
+@pytest.mark.parametrize("scale", SCALES)
+def test_parse_league_game_log(benchmark, scale):
+    payload = league_game_log_payload(scale)
+    params = {"SeasonType": "Regular Season"}
+    df = benchmark.pedantic(
+        lambda: parse_league_game_log(load(LeagueGameLog, params, payload))["game"],
+        rounds=ROUNDS[scale],
+    )
+    assert len(df) == len(scale_game_ids(scale))
+
+
+@pytest.mark.parametrize("scale", GAME_SCALES)
+def test_parse_box_score_summaries(benchmark, scale):
+    games = list(zip(scale_game_ids(scale), game_payloads("boxscoresummaryv2", scale)))
+
+    def parse():
+        return [
+            parse_box_score_summary(load(BoxScoreSummaryV2, {"GameID": g}, p))
+            for g, p in games
+        ]
+
+    frames = benchmark.pedantic(parse, rounds=ROUNDS[scale])
+    assert len(frames) == len(games)
+
+
+@pytest.mark.parametrize("scale", GAME_SCALES)
+def test_parse_play_by_play(benchmark, scale):
+    games = list(zip(scale_game_ids(scale), game_payloads("playbyplayv2", scale)))
+
+    def parse():
+        return [
+            parse_play_by_play(load(PlayByPlayV2, {"GameID": g}, p))["play_by_play"]
+            for g, p in games
+        ]
+
+    frames = benchmark.pedantic(parse, rounds=ROUNDS[scale])
+    assert len(frames) == len(games)
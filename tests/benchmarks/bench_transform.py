@@ -0,0 +1,44 @@
+"""bench_transform.py -- Benchmarks of pairing and validating extracted frames.
+"""
+# -- Imports --------------------------------------------------------------------------
+import pytest
+from payloads import (
+    GAME_SCALES,
+    OTHER_SCHEMAS,
+    ROUNDS,
+    SCALES,
+    TABLE_SCHEMAS,
+    game_log_frame,
+    schema_frame,
+    table_frames,
+)
+
+from nba_db.extract import pair_home_away
+from nba_db.validate import validate
+
+
+# -- Benchmarks -----------------------------------------------------------------------
+@pytest.mark.parametrize("scale", SCALES)
+def test_pair_home_away(benchmark, scale):
+    df = game_log_frame(scale)
+    paired = benchmark.pedantic(pair_home_away, args=(df,), rounds=ROUNDS[scale])
+    assert len(paired) == len(df) // 2
+
+
+@pytest.mark.parametrize("level", ["sampled", "full"])
+@pytest.mark.parametrize("table", list(TABLE_SCHEMAS))
+@pytest.mark.parametrize("scale", GAME_SCALES)
+def test_validate(benchmark, scale, table, level):
+    df = table_frames(scale)[table]
+    validated = benchmark.pedantic(
+        validate, args=(TABLE_SCHEMAS[table], df, level), rounds=ROUNDS[scale]
+    )
+    assert len(validated) == len(df)
+
+
+@pytest.mark.parametrize("level", ["sampled", "full"])
+@pytest.mark.parametrize("schema", OTHER_SCHEMAS, ids=lambda schema: schema.__name__)
+def test_validate_other_schemas(benchmark, schema, level):
+    df = schema_frame(schema)
+    validated = benchmark.pedantic(validate, args=(schema, df, level), rounds=3)
+    assert len(validated) == len(df)
@@ -0,0 +1,456 @@
+"""payloads.py -- Recorded-format stats.nba.com payloads for the benchmarks.
+
+Payloads are generated deterministically in the exact layout of the api
+responses (result sets with the headers of the nba_api endpoints), so the
+benchmarks exercise the same parsing, validation and loading code as a live
+run without any network access. Responses recorded in a landing zone (see
+:mod:`nba_db.landing`) are used instead for the per-game endpoints when
+``NBA_DB_BENCHMARK_LANDING`` points to one.
+"""
+# -- Imports --------------------------------------------------------------------------
+import inspect
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from nba_api.stats.endpoints.boxscoresummaryv2 import BoxScoreSummaryV2
+from nba_api.stats.endpoints.leaguegamelog import LeagueGameLog
+from nba_api.stats.endpoints.playbyplayv2 import PlayByPlayV2
+
+import nba_db.data
+from nba_db.data import LeagueGameLogSchema, PlayByPlaySchema
+from nba_db.extract import (
+    BOX_SCORE_TABLES,
+    parse_box_score_summary,
+    parse_league_game_log,
+    parse_play_by_play,
+)
+from nba_db.landing import LandingStore, read_shard
+from nba_db.replay import load_endpoint
+
+# -- Constants ------------------------------------------------------------------------
+SCALES = ("night", "season", "history")
+SEASON = 2023
+NIGHT_GAMES = 12
+SEASON_GAMES = 1230
+FIRST_SEASON = 1946
+EVENTS_PER_GAME = 450
+TEAM_IDS = list(range(1610612737, 1610612767))
+LANDING_DIR = os.environ.get("NBA_DB_BENCHMARK_LANDING")
+# the per-game endpoints are only benchmarked at full history on request
+GAME_SCALES = SCALES if os.environ.get("NBA_DB_BENCHMARK_HISTORY") else SCALES[:2]
+ROUNDS = {"night": 20, "season": 3, "history": 1}
+# data schema of every table filled from the game endpoints
+TABLE_SCHEMAS = {
+    "game": LeagueGameLogSchema,
+    **BOX_SCORE_TABLES,
+    "play_by_play": PlayByPlaySchema,
+}
+# every other data schema with its number of rows at full history (one season for the
+# play by play events); their frames are synthesized from the schema, see schema_frame
+SCHEMA_ROWS = {
+    "PlayerSchema": 5_000,
+    "TeamSchema": 30,
+    "CommonPlayerInfoSchema": 5_000,
+    "TeamDetailsSchema": 30,
+    "TeamHistorySchema": 60,
+    "PlayByPlayEventSchema": SEASON_GAMES * EVENTS_PER_GAME,
+    "PlayByPlayPlayerSchema": 5_000,
+    "PlayByPlayTeamSchema": 200,
+    "DraftCombineStatsSchema": 1_500,
+    "DraftHistorySchema": 8_000,
+    "TeamInfoCommonSchema": 30,
+}
+OTHER_SCHEMAS = [
+    schema
+    for _, schema in inspect.getmembers(nba_db.data, inspect.isclass)
+    if issubclass(schema, nba_db.data.SchemaModel)
+    and schema is not nba_db.data.SchemaModel
+    and schema not in TABLE_SCHEMAS.values()
+]
+
+
+# -- Helpers --------------------------------------------------------------------------
+def result_set(name, headers, rows):
+    return {"name": name, "headers": headers, "rowSet": rows}
+
+
+def games_of_season(season):
+    # the league grew from 300 to 1230 games per season
+    return min(SEASON_GAMES, 300 + 15 * (season - FIRST_SEASON))
+
+
+def scale_seasons(scale):
+    """returns the number of games of every season of a scale"""
+    if scale == "night":
+        return {SEASON: NIGHT_GAMES}
+    if scale == "season":
+        return {SEASON: SEASON_GAMES}
+    return {s: games_of_season(s) for s in range(FIRST_SEASON, SEASON + 1)}
+
+
+def scale_game_ids(scale):
+    """returns the game ids of a scale"""
+    return [
+        f"002{season % 100:02d}{i:05d}"
+        for season, n_games in scale_seasons(scale).items()
+        for i in range(n_games)
+    ]
+
+
+def team(team_id):
+    index = team_id % 100
+    return {
+        "id": team_id,
+        "abbreviation": f"T{index:02d}",
+        "city": f"City {index}",
+        "nickname": f"Team {index}",
+    }
+
+
+def matchup(game_id):
+    # home and away team of a game, stable for every endpoint
+    rng = np.random.default_rng(int(game_id))
+    home, away = rng.choice(TEAM_IDS, size=2, replace=False)
+    return team(int(home)), team(int(away))
+
+
+# -- Payloads -------------------------------------------------------------------------
+@lru_cache(maxsize=None)
+def league_game_log_payload(scale):
+    """LeagueGameLog response with a row per team and game of a scale"""
+    headers = LeagueGameLog.expected_data["LeagueGameLog"]
+    rng = np.random.default_rng(0)
+    rows = []
+    for season, n_games in scale_seasons(scale).items():
+        stats = rng.integers(0, 120, size=(n_games, 2, 19))
+        for i in range(n_games):
+            game_id = f"002{season % 100:02d}{i:05d}"
+            date = np.datetime64(f"{season}-10-15") + i % 170
+            home, away = matchup(game_id)
+            for side, (own, other) in enumerate([(home, away), (away, home)]):
+                separator = "vs." if side == 0 else "@"
+                rows.append(
+                    [
+                        f"2{season}",
+                        own["id"],
+                        own["abbreviation"],
+                        own["nickname"],
+                        game_id,
+                        str(date),
+                        f"{own['abbreviation']} {separator} {other['abbreviation']}",
+                        "W" if side == 0 else "L",
+                        240,
+                        *stats[i, side].tolist(),
+                        1,
+                    ]
+                )
+    rows.sort(key=lambda row: (row[5], row[4]))
+    payload = {
+        "resource": "leaguegamelog",
+        "parameters": {"Season": f"{SEASON}-{(SEASON + 1) % 100:02d}"},
+        "resultSets": [result_set("LeagueGameLog", headers, rows)],
+    }
+    return json.dumps(payload)
+
+
+def box_score_payload(game_id):
+    """BoxScoreSummaryV2 response of a game"""
+    home, away = matchup(game_id)
+    rng = np.random.default_rng(int(game_id))
+    expected = BoxScoreSummaryV2.expected_data
+    date = "2023-10-24T00:00:00"
+    rows = {
+        "GameSummary": [
+            {
+                "GAME_DATE_EST": date,
+                "GAME_SEQUENCE": 2,
+                "GAME_ID": game_id,
+                "GAME_STATUS_ID": 3,
+                "GAME_STATUS_TEXT": "Final",
+                "GAMECODE": f"20231024/{away['abbreviation']}{home['abbreviation']}",
+                "HOME_TEAM_ID": home["id"],
+                "VISITOR_TEAM_ID": away["id"],
+                "SEASON": game_id[3:5],
+                "LIVE_PERIOD": 4,
+                "LIVE_PC_TIME": "",
+                "NATL_TV_BROADCASTER_ABBREVIATION": None,
+                "LIVE_PERIOD_TIME_BCAST": "Q4       - ",
+                "WH_STATUS": 1,
+            }
+        ],
+        "OtherStats": [
+            {
+                "LEAGUE_ID": "00",
+                "TEAM_ID": t["id"],
+                "TEAM_ABBREVIATION": t["abbreviation"],
+                "TEAM_CITY": t["city"],
+                "PTS_PAINT": int(rng.integers(20, 70)),
+                "PTS_2ND_CHANCE": int(rng.integers(0, 25)),
+                "PTS_FB": int(rng.integers(0, 30)),
+                "LARGEST_LEAD": int(rng.integers(0, 30)),
+                "LEAD_CHANGES": 7,
+                "TIMES_TIED": 5,
+                "TEAM_TURNOVERS": int(rng.integers(0, 4)),
+                "TOTAL_TURNOVERS": int(rng.integers(5, 25)),
+                "TEAM_REBOUNDS": int(rng.integers(3, 15)),
+                "PTS_OFF_TO": int(rng.integers(5, 30)),
+            }
+            for t in (away, home)
+        ],
+        "Officials": [
+            {
+                "OFFICIAL_ID": 1100 + int(k),
+                "FIRST_NAME": f"First{k}",
+                "LAST_NAME": f"Last{k}",
+                "JERSEY_NUM": str(k),
+            }
+            for k in rng.choice(70, size=3, replace=False)
+        ],
+        "InactivePlayers": [
+            {
+                "PLAYER_ID": 1620000 + int(rng.integers(0, 5000)),
+                "FIRST_NAME": "Inactive",
+                "LAST_NAME": f"Player{k}",
+                "JERSEY_NUM": str(k),
+                "TEAM_ID": t["id"],
+                "TEAM_CITY": t["city"],
+                "TEAM_NAME": t["nickname"],
+                "TEAM_ABBREVIATION": t["abbreviation"],
+            }
+            for k, t in enumerate((home, away, away))
+        ],
+        "GameInfo": [
+            {
+                "GAME_DATE": "TUESDAY, OCTOBER 24, 2023",
+                "ATTENDANCE": int(rng.integers(10000, 21000)),
+                "GAME_TIME": "2:14",
+            }
+        ],
+        "LineScore": [
+            {
+                "GAME_DATE_EST": date,
+                "GAME_SEQUENCE": 2,
+                "GAME_ID": game_id,
+                "TEAM_ID": t["id"],
+                "TEAM_ABBREVIATION": t["abbreviation"],
+                "TEAM_CITY_NAME": t["city"],
+                "TEAM_NICKNAME": t["nickname"],
+                "TEAM_WINS_LOSSES": "1-0",
+                **{f"PTS_QTR{q}": int(rng.integers(15, 40)) for q in range(1, 5)},
+                **{f"PTS_OT{q}": 0 for q in range(1, 11)},
+                "PTS": int(rng.integers(80, 140)),
+            }
+            for t in (away, home)
+        ],
+        "LastMeeting": [],
+        "SeasonSeries": [],
+        "AvailableVideo": [],
+    }
+    payload = {
+        "resource": "boxscore",
+        "parameters": {"GameID": game_id},
+        "resultSets": [
+            result_set(
+                name,
+                expected[name],
+                [[row.get(h) for h in expected[name]] for row in records],
+            )
+            for name, records in rows.items()
+        ],
+    }
+    return json.dumps(payload)
+
+
+def play_by_play_payload(game_id, n_events=EVENTS_PER_GAME):
+    """PlayByPlayV2 response of a game"""
+    home, away = matchup(game_id)
+    rng = np.random.default_rng(int(game_id))
+    headers = PlayByPlayV2.expected_data["PlayByPlay"]
+    # 13 players per team, ids derived from the team so names repeat across games
+    rosters = {
+        t["id"]: [
+            (t["id"] % 100 * 1000 + k, f"Player {t['id'] % 100}-{k}") for k in range(13)
+        ]
+        for t in (home, away)
+    }
+    event_types = rng.choice([1, 2, 3, 4, 5, 6, 8, 9, 12, 13], size=n_events)
+    sides = rng.integers(0, 2, size=n_events)
+    picks = rng.integers(0, 13, size=(n_events, 3))
+    rows = []
+    home_score = away_score = 0
+    for eventnum in range(n_events):
+        period = min(4, 1 + eventnum * 4 // n_events)
+        clock = 720 - (eventnum * 4 * 720 // n_events) % 720
+        event_type = int(event_types[eventnum])
+        own = home if sides[eventnum] == 0 else away
+        other = away if own is home else home
+        score = margin = None
+        if event_type == 1:
+            if own is home:
+                home_score += 2
+            else:
+                away_score += 2
+            score = f"{away_score} - {home_score}"
+            margin = str(home_score - away_score or "TIE")
+        description = None if event_type in (12, 13) else f"Event {event_type}"
+        players = []
+        for slot, roster_team in enumerate([own, own, other]):
+            involved = event_type not in (12, 13) and (
+                slot == 0 or event_type in (1, 6)
+            )
+            if involved:
+                player_id, name = rosters[roster_team["id"]][picks[eventnum, slot]]
+                players.append(
+                    [
+                        4 if roster_team is home else 5,
+                        player_id,
+                        name,
+                        roster_team["id"],
+                        roster_team["city"],
+                        roster_team["nickname"],
+                        roster_team["abbreviation"],
+                    ]
+                )
+            else:
+                players.append([0, 0, None, None, None, None, None])
+        rows.append(
+            [
+                game_id,
+                eventnum,
+                event_type,
+                int(rng.integers(0, 100)),
+                period,
+                "7:40 PM",
+                f"{clock // 60}:{clock % 60:02d}",
+                description if own is home else None,
+                description if event_type in (12, 13) else None,
+                description if own is away else None,
+                score,
+                margin,
+                *players[0],
+                *players[1],
+                *players[2],
+                1,
+            ]
+        )
+    payload = {
+        "resource": "playbyplay",
+        "parameters": {"GameID": game_id, "StartPeriod": 0, "EndPeriod": 0},
+        "resultSets": [
+            result_set("PlayByPlay", headers, rows),
+            result_set("AvailableVideo", ["VIDEO_AVAILABLE_FLAG"], [[1]]),
+        ],
+    }
+    return json.dumps(payload)
+
+
+def recorded_payloads(endpoint, limit):
+    """returns up to ``limit`` responses of an endpoint recorded in ``NBA_DB_BENCHMARK_LANDING``"""
+    if LANDING_DIR is None:
+        return []
+    payloads = []
+    for _, path in LandingStore(LANDING_DIR).shards([endpoint]):
+        for record in read_shard(path):
+            payloads.append(record["contents"])
+            if len(payloads) >= limit:
+                return payloads
+    return payloads
+
+
+@lru_cache(maxsize=None)
+def game_payloads(endpoint, scale):
+    """responses of a per-game endpoint for every game of a scale, recorded ones if available"""
+    game_ids = scale_game_ids(scale)
+    recorded = recorded_payloads(endpoint, len(game_ids))
+    if len(recorded) == len(game_ids):
+        return tuple(recorded)
+    build = (
+        box_score_payload if endpoint == "boxscoresummaryv2" else play_by_play_payload
+    )
+    return tuple(build(game_id) for game_id in game_ids)
+
+
+# -- Frames ---------------------------------------------------------------------------
+@lru_cache(maxsize=None)
+def schema_frame(schema, seed=0):
+    """unvalidated rows of a data schema in the layout of the api
+
+    Ids and codes are repeating strings, dates iso strings and counts
+    numbers, with some nulls in nullable string and float columns, so
+    validation coerces and checks them like a live response.
+    """
+    n_rows = SCHEMA_ROWS[schema.__name__]
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, column in schema.to_schema().columns.items():
+        dtype = str(column.dtype)
+        if dtype.startswith("int"):
+            values = pd.Series(rng.integers(0, 100, n_rows))
+        elif dtype.startswith("float"):
+            values = pd.Series(rng.integers(0, 1000, n_rows) / 10)
+        elif dtype.startswith("datetime"):
+            days = pd.to_timedelta(rng.integers(0, 20_000, n_rows), unit="D")
+            values = pd.Series(pd.Timestamp("1970-01-01") + days)
+            values = values.dt.strftime("%Y-%m-%dT%H:%M:%S")
+        elif dtype == "bool":
+            values = pd.Series(rng.integers(0, 2, n_rows).astype(bool))
+        else:
+            codes = rng.integers(0, max(1, n_rows // 4), n_rows)
+            values = pd.Series([f"{name} {code}" for code in codes], dtype=object)
+        if column.nullable and not dtype.startswith(("int", "datetime", "bool")):
+            values = values.where(rng.random(n_rows) >= 0.1, None)
+        columns[name] = values
+    return pd.DataFrame(columns)
+
+
+def load(endpoint_cls, params, payload):
+    """loads a payload into an endpoint, exactly like a cached or replayed response"""
+    return load_endpoint(endpoint_cls, params, payload)
+
+
+@lru_cache(maxsize=None)
+def game_log_frame(scale):
+    """league game log of a scale with a row per team and game, as parsed from the api"""
+    game_log = load(
+        LeagueGameLog, {"SeasonType": "Regular Season"}, league_game_log_payload(scale)
+    )
+    df = game_log.get_data_frames()[0]
+    df.columns = df.columns.str.lower()
+    return df
+
+
+@lru_cache(maxsize=None)
+def table_frames(scale):
+    """parsed but not validated rows of every table filled from the game endpoints"""
+    frames = {
+        "game": parse_league_game_log(
+            load(
+                LeagueGameLog,
+                {"SeasonType": "Regular Season"},
+                league_game_log_payload(scale),
+            )
+        )["game"]
+    }
+    box_scores = [
+        parse_box_score_summary(load(BoxScoreSummaryV2, {"GameID": game_id}, payload))
+        for game_id, payload in zip(
+            scale_game_ids(scale), game_payloads("boxscoresummaryv2", scale)
+        )
+    ]
+    for table in BOX_SCORE_TABLES:
+        frames[table] = pd.concat([b[table] for b in box_scores], ignore_index=True)
+    frames["play_by_play"] = pd.concat(
+        [
+            parse_play_by_play(load(PlayByPlayV2, {"GameID": game_id}, payload))[
+                "play_by_play"
+            ]
+            for game_id, payload in zip(
+                scale_game_ids(scale), game_payloads("playbyplayv2", scale)
+            )
+        ],
+        ignore_index=True,
+    )
+    return frames
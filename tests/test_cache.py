@@ -0,0 +1,75 @@
+"""test_cache.py -- Tests for the cache module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import time
+
+from nba_db.cache import UNFINISHED_GAME_TTL, ResponseCache, cache_key, endpoint_ttl
+
+
+# -- Helpers --------------------------------------------------------------------------
+def response(name, rows):
+    headers = sorted({header for row in rows for header in row})
+    return json.dumps(
+        {
+            "resultSets": [
+                {
+                    "name": name,
+                    "headers": headers,
+                    "rowSet": [[row.get(h) for h in headers] for row in rows],
+                }
+            ]
+        }
+    )
+
+
+def event(msg_type, period, score=None):
+    return {"EVENTMSGTYPE": msg_type, "PERIOD": period, "SCORE": score}
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_cache_key_normalizes_params():
+    assert cache_key("PlayByPlayV2", {"GameID": "1", "EndPeriod": None}) == cache_key(
+        "playbyplayv2", {"EndPeriod": "", "GameID": 1}
+    )
+
+
+def test_endpoint_ttl():
+    assert endpoint_ttl("playbyplayv2", {"GameID": "0021900001"}) is None
+    assert endpoint_ttl("leaguegamelog", {"Season": "1996"}) is None
+    assert endpoint_ttl("leaguegamelog", {"Season": "1996", "DateFrom": "x"}) > 0
+    assert endpoint_ttl("commonplayerinfo", {"PlayerID": "2544"}) > 0
+
+
+def test_only_final_games_never_expire():
+    params = {"GameID": "0022300061"}
+
+    def ttl(endpoint, contents):
+        return endpoint_ttl(endpoint, params, contents)
+
+    final = response("GameSummary", [{"GAME_STATUS_ID": 3}])
+    live = response("GameSummary", [{"GAME_STATUS_ID": 2}])
+    assert ttl("boxscoresummaryv2", final) is None
+    assert ttl("boxscoresummaryv2", live) == UNFINISHED_GAME_TTL
+    assert ttl("boxscoresummaryv2", response("GameSummary", [])) > 0
+    played = [event(1, 4, "100 - 98"), event(13, 4)]
+    assert ttl("playbyplayv2", response("PlayByPlay", played)) is None
+    # tied after the 4th period, the game goes to overtime
+    tied = [event(1, 4, "100 - 100"), event(13, 4)]
+    assert ttl("playbyplayv2", response("PlayByPlay", tied)) > 0
+    assert ttl("playbyplayv2", response("PlayByPlay", played[:1])) > 0
+    assert ttl("playbyplayv2", response("PlayByPlay", [])) > 0
+
+
+def test_response_cache_roundtrip(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    params = {"PlayerID": "2544"}
+    assert cache.get("commonplayerinfo", params) is None
+    cache.put("commonplayerinfo", params, '{"resultSets": []}')
+    assert cache.get("commonplayerinfo", params) == '{"resultSets": []}'
+    # entries past their ttl are misses unless the ttl is ignored
+    monkeypatch.setattr(time, "time", lambda: 10**12)
+    assert cache.get("commonplayerinfo", params) is None
+    cache.ignore_ttl = True
+    assert cache.get("commonplayerinfo", params) == '{"resultSets": []}'
+    cache.close()
@@ -0,0 +1,79 @@
+"""test_dtypes.py -- Tests for the dtypes module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from nba_db.data import LeagueGameLogSchema, PlayByPlaySchema
+from nba_db.dtypes import storage_plan, to_storage_dtypes
+from nba_db.schema import write_table
+from nba_db.validate import validate
+
+
+# -- Helpers --------------------------------------------------------------------------
+def play_by_play(n_events=200):
+    df = pd.DataFrame(
+        {column: [None] * n_events for column in PlayByPlaySchema.to_schema().columns}
+    )
+    df["game_id"] = "0022300001"
+    df["eventnum"] = list(range(n_events))
+    df["eventmsgtype"] = 1
+    df["eventmsgactiontype"] = 1
+    df["period"] = [1 + i % 4 for i in range(n_events)]
+    df["wctimestring"] = "7:00 PM"
+    df["pctimestring"] = [f"{i % 12}:00" for i in range(n_events)]
+    df["homedescription"] = [f"event {i}" for i in range(n_events)]
+    df["person1type"] = 4.0
+    df["player1_id"] = "201939"
+    df["player1_team_city"] = "Golden State"
+    df["video_available_flag"] = 1
+    return validate(PlayByPlaySchema, df, level="fast", compact=False)
+
+
+def values(df):
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_storage_plan():
+    plan = storage_plan(LeagueGameLogSchema)
+    assert "team_abbreviation_home" in plan.categories
+    assert "min" in plan.integers
+    assert "fgm_home" in plan.counts
+    assert "fg_pct_home" not in plan.counts
+
+
+def test_to_storage_dtypes_compacts_play_by_play():
+    df = play_by_play()
+    compact = to_storage_dtypes(PlayByPlaySchema, df)
+    assert isinstance(compact["game_id"].dtype, pd.CategoricalDtype)
+    assert isinstance(compact["player1_team_city"].dtype, pd.CategoricalDtype)
+    # unique descriptions are not worth a category
+    assert compact["homedescription"].dtype == object
+    assert compact["period"].dtype == np.int8
+    assert compact["eventnum"].dtype == np.int16
+    assert compact["person1type"].dtype == "Int8"
+    assert compact.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum() / 2
+    assert values(compact) == values(df)
+
+
+def test_counts_stay_float_unless_whole():
+    df = pd.DataFrame({"fgm_home": [40.0, None], "fga_home": [80.5, 90.0]})
+    compact = to_storage_dtypes(LeagueGameLogSchema, df)
+    assert compact["fgm_home"].dtype == "Int8"
+    assert compact["fgm_home"].isna().tolist() == [False, True]
+    assert compact["fga_home"].dtype == np.float64
+
+
+def test_compact_frames_are_written_unchanged():
+    df = play_by_play()
+    conn = sqlite3.connect(":memory:")
+    write_table(conn, "play_by_play", df)
+    expected = pd.read_sql("SELECT * FROM play_by_play", conn)
+    conn.execute("DELETE FROM play_by_play_event")
+    write_table(conn, "play_by_play", to_storage_dtypes(PlayByPlaySchema, df))
+    pd.testing.assert_frame_equal(
+        pd.read_sql("SELECT * FROM play_by_play", conn), expected
+    )
@@ -0,0 +1,159 @@
+"""test_export.py -- Tests for the export module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import logging
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from nba_db.data import PlayByPlaySchema
+from nba_db.export import export_csv, export_parquet
+from nba_db.ledger import ensure_ledger
+from nba_db.schema import write_table
+from nba_db.utils import dump_db
+from test_extract import make_play_by_play
+from test_logger import ListHandler
+
+
+# -- Helpers --------------------------------------------------------------------------
+def players(ids, names):
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "full_name": names,
+            "first_name": names,
+            "last_name": names,
+            "is_active": [True] * len(ids),
+        }
+    )
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_export_csv_appends_new_rows(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    ensure_ledger(conn)
+    pd.DataFrame({"game_id": ["1", "2"], "pts": [100, 98]}).to_sql(
+        "game", conn, index=False
+    )
+    assert export_csv(conn, str(tmp_path)) == {"game": 2}
+    pd.DataFrame({"game_id": ["3"], "pts": [101]}).to_sql(
+        "game", conn, if_exists="append", index=False
+    )
+    assert export_csv(conn, str(tmp_path)) == {"game": 1}
+    assert export_csv(conn, str(tmp_path)) == {"game": 0}
+    df = pd.read_csv(tmp_path / "game.csv", dtype={"game_id": str})
+    assert df["game_id"].tolist() == ["1", "2", "3"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["game.csv"]
+    conn.close()
+
+
+def test_export_csv_regenerates_replaced_tables(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    pd.DataFrame({"id": [1, 2], "name": ["a", "b"]}).to_sql("player", conn, index=False)
+    pd.DataFrame({"id": [1]}).to_sql("team", conn, index=False)
+    export_csv(conn, str(tmp_path))
+    pd.DataFrame({"id": [3, 4, 5], "name": ["c", "d", "e"]}).to_sql(
+        "player", conn, if_exists="replace", index=False
+    )
+    conn.execute("DROP TABLE team")
+    assert export_csv(conn, str(tmp_path)) == {"player": 3}
+    assert pd.read_csv(tmp_path / "player.csv")["id"].tolist() == [3, 4, 5]
+    assert not (tmp_path / "team.csv").exists()
+    conn.close()
+
+
+def test_export_csv_regenerates_upserted_tables(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    write_table(conn, "player", players(["1", "2"], ["a", "b"]))
+    assert export_csv(conn, str(tmp_path)) == {"player": 2}
+    # an identical row is not a change, a new one is only appended
+    write_table(conn, "player", players(["1", "3"], ["a", "c"]))
+    assert export_csv(conn, str(tmp_path)) == {"player": 1}
+    # an upsert updates the row in place, it keeps its rowid
+    write_table(conn, "player", players(["2"], ["z"]))
+    assert export_csv(conn, str(tmp_path)) == {"player": 3}
+    df = pd.read_csv(tmp_path / "player.csv", dtype={"id": str})
+    assert df["full_name"].tolist() == ["a", "z", "c"]
+    conn.close()
+
+
+def test_export_csv_regenerates_replaced_middle_rows(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    write_table(conn, "player", players(["1", "2", "3"], ["a", "b", "c"]))
+    export_csv(conn, str(tmp_path))
+    # same first and last rows, same row count
+    write_table(
+        conn, "player", players(["1", "4", "3"], ["a", "d", "c"]), if_exists="replace"
+    )
+    assert export_csv(conn, str(tmp_path)) == {"player": 3}
+    df = pd.read_csv(tmp_path / "player.csv", dtype={"id": str})
+    assert df["id"].tolist() == ["1", "4", "3"]
+    assert export_csv(conn, str(tmp_path)) == {"player": 0}
+    conn.close()
+
+
+def test_dump_db_exports_play_by_play_in_the_wide_layout(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect(":memory:")
+    pbp = make_play_by_play("0022300061")
+    pbp["player1_id"] = "201939"
+    pbp["player1_name"] = "Stephen Curry"
+    write_table(conn, "play_by_play", pbp)
+    assert dump_db(conn)["play_by_play"] == 5
+    csv_dir = tmp_path / "nba-db" / "csv"
+    assert sorted(p.name for p in csv_dir.iterdir()) == ["play_by_play.csv"]
+    df = pd.read_csv(csv_dir / "play_by_play.csv", dtype=str)
+    assert df.columns.tolist() == list(PlayByPlaySchema.to_schema().columns)
+    assert df["player1_name"].unique().tolist() == ["Stephen Curry"]
+    write_table(conn, "play_by_play", make_play_by_play("0022300062"))
+    assert dump_db(conn)["play_by_play"] == 5
+    df = pd.read_csv(csv_dir / "play_by_play.csv", dtype=str)
+    assert df["game_id"].value_counts().to_dict() == {"0022300061": 5, "0022300062": 5}
+    # a renamed player changes rows that were already exported
+    pbp["player1_name"] = "Steph Curry"
+    write_table(conn, "play_by_play", pbp.iloc[:1])
+    assert dump_db(conn)["play_by_play"] == 10
+    conn.close()
+
+
+def test_export_csv_in_parallel(tmp_path):
+    conn = sqlite3.connect(tmp_path / "nba.sqlite")
+    for table in ["game", "player", "team"]:
+        pd.DataFrame({"id": range(10)}).to_sql(table, conn, index=False)
+    csv_dir = tmp_path / "csv"
+    logger = logging.getLogger("nba_db_logger")
+    handler = ListHandler()
+    logger.addHandler(handler)
+    try:
+        written = export_csv(conn, str(csv_dir), workers=3)
+    finally:
+        logger.removeHandler(handler)
+    assert written == {"game": 10, "player": 10, "team": 10}
+    # the workers' records reach the handlers of the parent
+    messages = [record.getMessage() for record in handler.records]
+    assert "Exported 10 rows of team." in messages
+    assert export_csv(conn, str(csv_dir), workers=3) == {
+        "game": 0,
+        "player": 0,
+        "team": 0,
+    }
+    conn.close()
+
+
+def test_export_parquet_row_groups_by_season(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    conn = sqlite3.connect(":memory:")
+    pd.DataFrame(
+        {
+            "season_id": ["22022", "22023", "22022", "22023", "22021"],
+            "pts": [100, 101, 102, None, 104],
+        }
+    ).to_sql("game", conn, index=False)
+    assert export_parquet(conn, str(tmp_path)) == {"game": 5}
+    parquet = pq.ParquetFile(tmp_path / "game.parquet")
+    assert parquet.metadata.num_row_groups == 3
+    df = parquet.read().to_pandas()
+    assert df["season_id"].tolist() == ["22021", "22022", "22022", "22023", "22023"]
+    assert df["pts"].isna().sum() == 1
+    conn.close()
@@ -1,6 +1,427 @@
-from nba_db.extract import get_players
+"""test_extract.py -- Tests for the extract module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import sqlite3
+import threading
+import time
 
+import numpy as np
+import pandas as pd
+from nba_api.stats.endpoints.boxscoresummaryv2 import BoxScoreSummaryV2
+from nba_api.stats.library.http import NBAStatsResponse
 
+import nba_db.extract
+from nba_db.data import PlayByPlaySchema
+from nba_db.extract import (
+    get_box_score_summaries,
+    get_draft_history,
+    get_league_game_log_from_date,
+    get_play_by_play,
+    get_players,
+    pair_home_away,
+    season_types_in_window,
+    validate_frames,
+)
+from nba_db.schema import write_table
 
 
-def test_get_players():
\ No newline at end of file
+# -- Helpers --------------------------------------------------------------------------
+def make_play_by_play(game_id, n_events=5):
+    df = pd.DataFrame(
+        {column: [None] * n_events for column in PlayByPlaySchema.to_schema().columns}
+    )
+    df["game_id"] = game_id
+    df["eventnum"] = range(n_events)
+    df["eventmsgtype"] = 1
+    df["eventmsgactiontype"] = 1
+    df["period"] = 1
+    df["wctimestring"] = "7:00 PM"
+    df["pctimestring"] = "12:00"
+    df["video_available_flag"] = "1"
+    return df
+
+
+STATS = ["fgm", "fga", "fg_pct", "fg3m", "fg3a", "fg3_pct", "ftm", "fta", "ft_pct"]
+STATS += ["oreb", "dreb", "reb", "ast", "stl", "blk", "tov", "pf", "pts", "plus_minus"]
+
+
+def make_game_log(seasons=range(1946, 2024), seed=0):
+    # league game log with a row per team and game, as returned by the api
+    rng = np.random.default_rng(seed)
+    frames = []
+    for season in seasons:
+        n_games = min(1230, 300 + 15 * (season - 1946))
+        teams = rng.integers(1610612737, 1610612767, size=(n_games, 2))
+        teams[:, 1] = np.where(teams[:, 1] == teams[:, 0], teams[:, 0] + 1, teams[:, 1])
+        game_ids = [f"002{season % 100:02d}{i:05d}" for i in range(n_games)]
+        dates = pd.Timestamp(f"{season}-10-15") + pd.to_timedelta(
+            np.arange(n_games) % 170, unit="D"
+        )
+        for side in (0, 1):
+            team, opponent = teams[:, side], teams[:, 1 - side]
+            df = pd.DataFrame(
+                {
+                    "season_id": f"2{season}",
+                    "team_id": team,
+                    "team_abbreviation": [f"T{t % 100}" for t in team],
+                    "team_name": [f"Team {t % 100}" for t in team],
+                    "game_id": game_ids,
+                    "game_date": dates.strftime("%Y-%m-%d"),
+                    "matchup": [
+                        f"T{t % 100} vs. T{o % 100}"
+                        if side == 0
+                        else f"T{t % 100} @ T{o % 100}"
+                        for t, o in zip(team, opponent)
+                    ],
+                    "wl": "W" if side == 0 else "L",
+                    "min": 240,
+                }
+            )
+            for stat in STATS:
+                df[stat] = rng.integers(0, 120, size=n_games).astype(float)
+            df["video_available"] = 1
+            frames.append(df)
+    # the api lists the rows by date, not by game
+    return pd.concat(frames, ignore_index=True).sort_values(
+        ["game_date", "game_id"], kind="stable", ignore_index=True
+    )
+
+
+def make_box_score(game_id, home="1610612744", away="1610612747", empty=False):
+    # BoxScoreSummaryV2 endpoint loaded with a response for one game, without any
+    # rows if empty
+    def team(team_id, city, nickname):
+        return {"TEAM_ID": team_id, "TEAM_CITY": city, "TEAM_NICKNAME": nickname}
+
+    teams = [
+        team(away, "Los Angeles", "Lakers"),
+        team(home, "Golden State", "Warriors"),
+    ]
+    result_sets = {
+        "GameSummary": [
+            {
+                "GAME_DATE_EST": "2023-10-24T00:00:00",
+                "GAME_SEQUENCE": 2,
+                "GAME_ID": game_id,
+                "GAME_STATUS_ID": 3,
+                "GAME_STATUS_TEXT": "Final",
+                "GAMECODE": "20231024/LALGSW",
+                "HOME_TEAM_ID": int(home),
+                "VISITOR_TEAM_ID": int(away),
+                "SEASON": "2023",
+                "LIVE_PERIOD": 4,
+                "LIVE_PC_TIME": "",
+                "NATL_TV_BROADCASTER_ABBREVIATION": "TNT",
+                "LIVE_PERIOD_TIME_BCAST": "Q4       - TNT",
+                "WH_STATUS": 1,
+            }
+        ],
+        "OtherStats": [
+            {
+                "LEAGUE_ID": "00",
+                "TEAM_ID": int(t["TEAM_ID"]),
+                "TEAM_ABBREVIATION": t["TEAM_NICKNAME"][:3].upper(),
+                "TEAM_CITY": t["TEAM_CITY"],
+                "PTS_PAINT": 50 + i,
+                "PTS_2ND_CHANCE": 10,
+                "PTS_FB": 12,
+                "LARGEST_LEAD": 8 + i,
+                "LEAD_CHANGES": 7,
+                "TIMES_TIED": 5,
+                "TEAM_TURNOVERS": 1,
+                "TOTAL_TURNOVERS": 14,
+                "TEAM_REBOUNDS": 9,
+                "PTS_OFF_TO": 18,
+            }
+            for i, t in enumerate(teams)
+        ],
+        "Officials": [
+            {
+                "OFFICIAL_ID": 1150,
+                "FIRST_NAME": "Scott",
+                "LAST_NAME": "Foster",
+                "JERSEY_NUM": "48",
+            },
+            {
+                "OFFICIAL_ID": 1151,
+                "FIRST_NAME": "Tony",
+                "LAST_NAME": "Brothers",
+                "JERSEY_NUM": "25",
+            },
+        ],
+        "InactivePlayers": [
+            {
+                "PLAYER_ID": 1630228,
+                "FIRST_NAME": "Jonathan",
+                "LAST_NAME": "Kuminga",
+                "JERSEY_NUM": "00",
+                "TEAM_ID": int(home),
+                "TEAM_CITY": "Golden State",
+                "TEAM_NAME": "Warriors",
+                "TEAM_ABBREVIATION": "GSW",
+            }
+        ],
+        "GameInfo": [
+            {
+                "GAME_DATE": "TUESDAY, OCTOBER 24, 2023",
+                "ATTENDANCE": 18064,
+                "GAME_TIME": "2:31",
+            }
+        ],
+        "LineScore": [
+            {
+                "GAME_DATE_EST": "2023-10-24T00:00:00",
+                "GAME_SEQUENCE": 2,
+                "GAME_ID": game_id,
+                "TEAM_ID": int(t["TEAM_ID"]),
+                "TEAM_ABBREVIATION": t["TEAM_NICKNAME"][:3].upper(),
+                "TEAM_CITY_NAME": t["TEAM_CITY"],
+                "TEAM_NICKNAME": t["TEAM_NICKNAME"],
+                "TEAM_WINS_LOSSES": "0-1" if i == 0 else "1-0",
+                **{f"PTS_QTR{q}": 25 + i for q in range(1, 5)},
+                **{f"PTS_OT{q}": 0 for q in range(1, 11)},
+                "PTS": 100 + 4 * i,
+            }
+            for i, t in enumerate(teams)
+        ],
+        "LastMeeting": [],
+        "SeasonSeries": [],
+        "AvailableVideo": [],
+    }
+    if empty:
+        result_sets = {name: [] for name in result_sets}
+    payload = {
+        "resource": "boxscore",
+        "parameters": {"GameID": game_id},
+        "resultSets": [
+            {
+                "name": name,
+                "headers": BoxScoreSummaryV2.expected_data[name],
+                "rowSet": [
+                    [row.get(h) for h in BoxScoreSummaryV2.expected_data[name]]
+                    for row in rows
+                ],
+            }
+            for name, rows in result_sets.items()
+        ],
+    }
+    endpoint = BoxScoreSummaryV2(game_id=game_id, get_request=False)
+    endpoint.nba_response = NBAStatsResponse(
+        response=json.dumps(payload), status_code=200, url=""
+    )
+    endpoint.load_response()
+    return endpoint
+
+
+def self_merge_pairing(df):
+    # pairing used before pair_home_away
+    df = pd.merge(
+        df,
+        df,
+        on=["season_id", "game_id", "game_date", "min"],
+        suffixes=["_home", "_away"],
+    )
+    return df[
+        (df["matchup_home"].str.contains("vs."))
+        & (df["team_name_home"] != df["team_name_away"])
+    ].reset_index(drop=True)
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_get_players():
+    df = get_players()
+    assert df is not None
+    assert len(df) > 0
+    assert list(df.columns) == [
+        "id",
+        "full_name",
+        "first_name",
+        "last_name",
+        "is_active",
+    ]
+
+
+def test_get_play_by_play_streams_chunks_and_drops_bad_games(monkeypatch):
+    def helper(game_id, proxies):
+        df = make_play_by_play(game_id)
+        if game_id == "bad":
+            df["period"] = "not a period"
+        if game_id == "0019500001":
+            # games before 1996-97 are answered without events
+            df = df.iloc[:0]
+        return df
+
+    monkeypatch.setattr(nba_db.extract, "get_play_by_play_helper", helper)
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    game_ids = [f"00223000{i:02d}" for i in range(7)] + ["0019500001", "bad"]
+    written = get_play_by_play(game_ids, [], save_to_db=True, conn=conn, chunk_size=3)
+    assert sorted(written) == sorted(game_ids[:-1])
+    assert pd.read_sql("SELECT COUNT(*) AS n FROM play_by_play", conn)["n"][0] == 35
+    conn.close()
+
+
+def test_validate_frames_drops_only_invalid_frames():
+    good = [make_play_by_play(f"00223000{i:02d}") for i in range(2)]
+    bad = make_play_by_play("bad")
+    bad["period"] = "not a period"
+    expected = validate_frames(PlayByPlaySchema, good, "play by play")
+    result = validate_frames(PlayByPlaySchema, [good[0], bad, good[1]], "play by play")
+    # the rows are the same, the fallback does not compact the concatenated frames
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+
+def test_pair_home_away_matches_self_merge():
+    df = make_game_log(range(2020, 2023))
+    expected = self_merge_pairing(df).sort_values("game_id", ignore_index=True)
+    result = pair_home_away(df).sort_values("game_id", ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_pair_home_away_handles_irregular_games():
+    df = make_game_log([2022]).iloc[:0]
+    rows = make_game_log([2022])
+    rows = rows[rows["game_id"].isin(["0022200000", "0022200001", "0022200002"])]
+    rows = rows.sort_values(["game_id", "matchup"], ascending=[True, False])
+    rows = rows.reset_index(drop=True)
+    # neutral site: both rows read vs.
+    rows.loc[1, "matchup"] = rows.loc[1, "matchup"].replace(" @ ", " vs. ")
+    # minutes disagree
+    rows.loc[2, "min"] = 265
+    # a single team
+    rows = rows.iloc[:5]
+    # a repeated row
+    rows = pd.concat([df, rows, rows.iloc[[0]]], ignore_index=True)
+    paired = pair_home_away(rows)
+    assert paired["game_id"].tolist() == ["0022200000", "0022200001"]
+    assert paired["team_id_home"].tolist() == rows["team_id"].iloc[[0, 2]].tolist()
+    assert paired["min"].tolist() == [240, 265]
+    # the self-merge loses the game whose minutes disagree
+    assert set(self_merge_pairing(rows)["game_id"]) == {"0022200000"}
+
+
+def test_pair_home_away_benchmark(benchmark):
+    # every season since 1946, paired season by season as the extraction does
+    seasons = [df for _, df in make_game_log().groupby("season_id")]
+    start = time.perf_counter()
+    for df in seasons:
+        self_merge_pairing(df)
+    self_merge = time.perf_counter() - start
+    benchmark.extra_info["self_merge_seconds"] = self_merge
+    paired = benchmark(lambda: [pair_home_away(df) for df in seasons])
+    assert sum(len(df) for df in paired) == sum(len(df) for df in seasons) // 2
+
+
+def test_season_types_in_window():
+    assert season_types_in_window("2023-11-02", "2023-11-20") == [
+        "Regular Season",
+        "Pre Season",
+    ]
+    assert "Playoffs" in season_types_in_window("2024-04-10", "2024-04-20")
+    assert "All Star" in season_types_in_window("2024-02-10", "2024-02-11")
+    assert len(season_types_in_window("2023-06-20", "2024-06-20")) == 4
+
+
+def test_league_game_log_from_date_requests_season_types_concurrently(monkeypatch):
+    # both requests have to be in flight at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    calls = []
+
+    class FakeLog:
+        def __init__(self, df, season_type):
+            self.df = df
+            self.parameters = {"SeasonType": season_type}
+
+        def get_data_frames(self):
+            return [self.df]
+
+    def request(endpoint, season_type_all_star, **params):
+        calls.append((season_type_all_star, params["date_from_nullable"]))
+        barrier.wait()
+        df = make_game_log([2023]).head(4)
+        if season_type_all_star != "Regular Season":
+            df = df.iloc[:0]
+        return FakeLog(df, season_type_all_star)
+
+    monkeypatch.setattr(nba_db.extract, "request", request)
+    monkeypatch.setattr(
+        nba_db.extract,
+        "season_types_in_window",
+        lambda date_from: ["Regular Season", "Pre Season"],
+    )
+    df = get_league_game_log_from_date("2023-11-02", [])
+    assert sorted(calls) == [
+        ("Pre Season", "2023-11-02"),
+        ("Regular Season", "2023-11-02"),
+    ]
+    assert len(df) == 2
+    assert set(df["season_type"]) == {"Regular Season"}
+
+
+def test_get_box_score_summaries_writes_every_result_set(monkeypatch):
+    def request(endpoint, game_id, **params):
+        if game_id == "0022300063":
+            raise ValueError("gave up")
+        return make_box_score(game_id, empty=game_id == "0022300064")
+
+    monkeypatch.setattr(nba_db.extract, "request", request)
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    game_ids = ["0022300061", "0022300062", "0022300063", "0022300064"]
+    written = get_box_score_summaries(game_ids, [], save_to_db=True, conn=conn)
+    # ids come in the order the requests complete, answered games without a box
+    # score are done as well
+    assert sorted(written) == ["0022300061", "0022300062", "0022300064"]
+    counts = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in nba_db.extract.BOX_SCORE_TABLES
+    }
+    assert counts == {
+        "game_summary": 2,
+        "other_stats": 2,
+        "officials": 4,
+        "inactive_players": 2,
+        "game_info": 2,
+        "line_score": 2,
+    }
+    line_score = pd.read_sql("SELECT * FROM line_score", conn)
+    assert line_score["team_id_home"].unique().tolist() == ["1610612744"]
+    assert line_score["pts_home"].unique().tolist() == [104.0]
+    other_stats = pd.read_sql("SELECT * FROM other_stats", conn)
+    assert other_stats["largest_lead_away"].unique().tolist() == [8]
+    assert other_stats["lead_changes"].unique().tolist() == [7]
+    conn.close()
+
+
+def test_incomplete_draft_history_keeps_stored_rows(monkeypatch):
+    def draft(season):
+        return pd.DataFrame(
+            {
+                "person_id": [f"{season}1", f"{season}2"],
+                "player_name": ["a", "b"],
+                "season": str(season),
+                "round_number": 1,
+                "round_pick": [1, 2],
+                "overall_pick": [1, 2],
+                "draft_type": "Draft",
+                "team_id": "1610612744",
+                "team_city": "Golden State",
+                "team_name": "Warriors",
+                "team_abbreviation": "GSW",
+                "organization": "",
+                "organization_type": "",
+                "player_profile_flag": "1",
+            }
+        )
+
+    conn = sqlite3.connect(":memory:")
+    write_table(conn, "draft_history", pd.concat([draft(2022), draft(2023)]))
+    monkeypatch.setattr(
+        nba_db.extract,
+        "get_draft_history_helper",
+        lambda season, proxies: None if season == "2022" else draft(season),
+    )
+    assert get_draft_history([], save_to_db=True, conn=conn) is None
+    seasons = pd.read_sql("SELECT season FROM draft_history", conn)["season"]
+    counts = seasons.value_counts()
+    assert counts["2022"] == 2 and counts["1946"] == 2
+    conn.close()
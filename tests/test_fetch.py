@@ -0,0 +1,172 @@
+"""test_fetch.py -- Tests for the fetch module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import threading
+import time
+
+import pytest
+from nba_api.stats.endpoints.playbyplayv2 import PlayByPlayV2
+
+import nba_db.fetch
+from nba_db.cache import ResponseCache
+from nba_db.fetch import fetch_all, fetch_iter, request
+from nba_db.landing import LandingStore, read_shard
+from nba_db.retry import RetryableResponseError, RetryPolicy
+
+
+# -- Helpers --------------------------------------------------------------------------
+class FakeResponse:
+    def __init__(
+        self, payload, url="https://stats.nba.com/stats/playbyplayv2", status_code=200
+    ):
+        self.text = json.dumps(payload)
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.url = url
+        self.headers = {}
+
+
+class FakeSession:
+    def __init__(self, payload, status_codes=()):
+        self.payload = payload
+        self.status_codes = list(status_codes)
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        status_code = self.status_codes.pop(0) if self.status_codes else 200
+        return FakeResponse(self.payload, url, status_code)
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_fetch_all_preserves_order_and_bounds_concurrency():
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def work(x):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.001 * (x % 3))
+        with lock:
+            active[0] -= 1
+        return x * 2
+
+    assert fetch_all(work, range(100), concurrency=8) == [x * 2 for x in range(100)]
+    assert peak[0] <= 8
+
+
+def test_fetch_iter_stops_early():
+    results = []
+    for item, result in fetch_iter(lambda x: x, range(50), concurrency=4):
+        results.append(result)
+        if len(results) == 3:
+            break
+    assert len(results) == 3
+
+
+def test_request_loads_response(monkeypatch):
+    payload = {
+        "resultSets": [
+            {
+                "name": "PlayByPlay",
+                "headers": ["GAME_ID", "EVENTNUM"],
+                "rowSet": [["1", 2]],
+            },
+            {
+                "name": "AvailableVideo",
+                "headers": ["VIDEO_AVAILABLE_FLAG"],
+                "rowSet": [[1]],
+            },
+        ]
+    }
+    session = FakeSession(payload)
+    monkeypatch.setattr(nba_db.fetch, "_session", session)
+    endpoint = request(PlayByPlayV2, game_id="0022200001", timeout=1)
+    df = endpoint.get_data_frames()[0]
+    assert df.to_dict("records") == [{"GAME_ID": "1", "EVENTNUM": 2}]
+    assert dict(session.calls[0][1]["params"])["GameID"] == "0022200001"
+
+
+def test_request_uses_cache(monkeypatch, tmp_path):
+    payload = {
+        "resultSets": [
+            {"name": "PlayByPlay", "headers": ["GAME_ID"], "rowSet": [["1"]]},
+            {
+                "name": "AvailableVideo",
+                "headers": ["VIDEO_AVAILABLE_FLAG"],
+                "rowSet": [[1]],
+            },
+        ]
+    }
+    session = FakeSession(payload)
+    monkeypatch.setattr(nba_db.fetch, "_session", session)
+    nba_db.fetch.set_cache(ResponseCache(str(tmp_path / "responses.sqlite")))
+    try:
+        for _ in range(3):
+            df = request(PlayByPlayV2, game_id="0022200001").get_data_frames()[0]
+            assert df["GAME_ID"].tolist() == ["1"]
+    finally:
+        nba_db.fetch.set_cache(None)
+    assert len(session.calls) == 1
+
+
+def test_request_lands_fetched_responses(monkeypatch, tmp_path):
+    payload = {
+        "resultSets": [
+            {"name": "PlayByPlay", "headers": ["GAME_ID"], "rowSet": [["1"]]},
+            {
+                "name": "AvailableVideo",
+                "headers": ["VIDEO_AVAILABLE_FLAG"],
+                "rowSet": [[1]],
+            },
+        ]
+    }
+    session = FakeSession(payload)
+    monkeypatch.setattr(nba_db.fetch, "_session", session)
+    landing = LandingStore(str(tmp_path / "landing"))
+    nba_db.fetch.set_cache(ResponseCache(str(tmp_path / "responses.sqlite")))
+    nba_db.fetch.set_landing(landing)
+    try:
+        for _ in range(3):
+            request(PlayByPlayV2, game_id="0022200001")
+    finally:
+        nba_db.fetch.set_cache(None)
+        nba_db.fetch.set_landing(None)
+    # cache hits are not landed again
+    [(endpoint, path)] = landing.shards()
+    assert endpoint == "playbyplayv2" and "2022" in path
+    [record] = list(read_shard(path))
+    assert record["params"]["GameID"] == "0022200001"
+    assert json.loads(record["contents"]) == payload
+
+
+def test_request_retries_throttled_responses(monkeypatch):
+    payload = {
+        "resultSets": [
+            {"name": "PlayByPlay", "headers": ["GAME_ID"], "rowSet": [["1"]]},
+            {
+                "name": "AvailableVideo",
+                "headers": ["VIDEO_AVAILABLE_FLAG"],
+                "rowSet": [[1]],
+            },
+        ]
+    }
+    session = FakeSession(payload, status_codes=[429, 503])
+    monkeypatch.setattr(nba_db.fetch, "_session", session)
+    monkeypatch.setattr(nba_db.fetch, "_retry_policy", RetryPolicy(base_delay=0))
+    df = request(PlayByPlayV2, game_id="0022200001").get_data_frames()[0]
+    assert df["GAME_ID"].tolist() == ["1"]
+    assert len(session.calls) == 3
+
+
+def test_request_gives_up_after_max_attempts(monkeypatch):
+    session = FakeSession({}, status_codes=[429] * 10)
+    monkeypatch.setattr(nba_db.fetch, "_session", session)
+    monkeypatch.setattr(
+        nba_db.fetch, "_retry_policy", RetryPolicy(max_attempts=3, base_delay=0)
+    )
+    with pytest.raises(RetryableResponseError):
+        request(PlayByPlayV2, game_id="0022200001")
+    assert len(session.calls) == 3
@@ -0,0 +1,43 @@
+"""test_landing.py -- Tests for the landing module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import pytest
+
+from nba_db.landing import LandingStore, read_shard, shard_of
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_shard_of():
+    assert shard_of({"Season": "2023-24", "SeasonType": "Playoffs"}) == "2023"
+    assert shard_of({"SeasonYear": 1996}) == "1996"
+    assert shard_of({"GameID": "0022300001"}) == "2023"
+    assert shard_of({"GameID": "0024600001"}) == "1946"
+    assert shard_of({"DateFrom": "2024-02-01"}) == "2023"
+    assert shard_of({"PlayerID": "2544"}) == "all"
+
+
+@pytest.mark.parametrize("compression", ["gzip"])
+def test_landing_store_roundtrip(tmp_path, compression):
+    store = LandingStore(str(tmp_path), compression=compression)
+    for game_id in ["0022300001", "0022300002", "0022200001"]:
+        store.put("PlayByPlayV2", {"GameID": game_id, "StartPeriod": 0}, "{}")
+    shards = store.shards()
+    assert [path.rsplit("/", 1)[1][:4] for _, path in shards] == ["2022", "2023"]
+    records = list(read_shard(shards[1][1]))
+    assert [r["params"] for r in records] == [
+        {"GameID": "0022300001", "StartPeriod": "0"},
+        {"GameID": "0022300002", "StartPeriod": "0"},
+    ]
+    assert {r["endpoint"] for r in records} == {"playbyplayv2"}
+    assert store.shards(["boxscoresummaryv2"]) == []
+
+
+def test_read_shard_stops_at_truncated_record(tmp_path):
+    store = LandingStore(str(tmp_path), compression="gzip")
+    store.put("commonplayerinfo", {"PlayerID": "2544"}, "{}")
+    store.put("commonplayerinfo", {"PlayerID": "201939"}, "{}")
+    [(_, path)] = store.shards()
+    with open(path, "r+b") as shard:
+        shard.truncate(shard.seek(0, 2) - 10)
+    records = list(read_shard(path))
+    assert [r["params"]["PlayerID"] for r in records] == ["2544"]
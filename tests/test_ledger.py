@@ -0,0 +1,98 @@
+"""test_ledger.py -- Tests for the ledger module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import sqlite3
+
+import pytest
+
+from nba_db.ledger import (
+    MAX_ATTEMPTS,
+    ensure_ledger,
+    has_pending,
+    is_done,
+    mark,
+    pending,
+    run_batches,
+    run_stage,
+)
+
+
+# -- Fixtures -------------------------------------------------------------------------
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    ensure_ledger(conn)
+    yield conn
+    conn.close()
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_run_batches_resumes_after_failure(conn):
+    calls = []
+
+    def crash_on_second_batch(batch):
+        calls.append(batch)
+        if len(calls) == 2:
+            raise RuntimeError("proxy pool exhausted")
+        return batch
+
+    with pytest.raises(RuntimeError):
+        run_batches(
+            conn, "play_by_play", range(10), crash_on_second_batch, batch_size=3
+        )
+    assert pending(conn, "play_by_play") == [str(i) for i in range(3, 10)]
+    assert has_pending(conn)
+
+    calls.clear()
+    run_batches(
+        conn,
+        "play_by_play",
+        range(10),
+        lambda batch: calls.append(batch) or batch,
+        batch_size=3,
+    )
+    assert [key for batch in calls for key in batch] == [str(i) for i in range(3, 10)]
+    assert not has_pending(conn)
+
+
+def test_run_batches_retries_items_missing_from_the_result(conn):
+    run_batches(
+        conn,
+        "box_score_summary",
+        ["1", "2", "3", "4"],
+        lambda batch: [key for key in batch if key != "2"] if "1" in batch else None,
+        batch_size=2,
+    )
+    assert is_done(conn, "box_score_summary", "1")
+    assert pending(conn, "box_score_summary") == ["2", "3", "4"]
+    calls = []
+    run_batches(
+        conn, "box_score_summary", [], lambda batch: calls.append(batch) or batch
+    )
+    assert calls == [["2", "3", "4"]]
+    assert not has_pending(conn)
+
+
+def test_run_stage_skips_completed_and_retries_failed(conn):
+    assert run_stage(conn, "players", lambda: None) is None
+    assert not is_done(conn, "players")
+    assert run_stage(conn, "players", lambda: "players") == "players"
+    assert is_done(conn, "players")
+    assert run_stage(conn, "players", lambda: pytest.fail("stage ran twice")) is None
+
+
+def test_pending_gives_up_after_max_attempts(conn):
+    for _ in range(MAX_ATTEMPTS):
+        run_stage(conn, "draft_history", lambda: None)
+    assert pending(conn, "draft_history") == []
+
+
+def test_has_pending_only_considers_the_given_stages_and_key(conn):
+    run_batches(conn, "play_by_play", ["1", "2"], lambda batch: ["1"])
+    mark(conn, "monthly_player_info", ["2026-09"], "failed", "no result")
+    mark(conn, "monthly_player_info", ["2026-10"], "done")
+    assert has_pending(conn)
+    assert has_pending(conn, ["play_by_play"])
+    assert not has_pending(conn, ["daily_play_by_play", "publish"])
+    assert not has_pending(conn, ["monthly_player_info"], key="2026-10")
+    assert has_pending(conn, ["monthly_player_info"], key="2026-09")
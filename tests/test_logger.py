@@ -0,0 +1,109 @@
+"""test_logger.py -- Tests for the logger module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler
+
+import pytest
+
+import nba_db.logger
+from nba_db.logger import (
+    log,
+    log_sampled,
+    reset_sampling,
+    start_queue_logging,
+    stop_queue_logging,
+    worker_logging,
+)
+
+
+# -- Helpers --------------------------------------------------------------------------
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def log_in_worker(n):
+    logging.getLogger("nba_db_test").warning("worker %d", n)
+    return n
+
+
+# -- Fixtures -------------------------------------------------------------------------
+@pytest.fixture
+def test_logger():
+    logger = logging.getLogger("nba_db_test")
+    handler = ListHandler()
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield logger, handler
+    for h in logger.handlers[:]:
+        logger.removeHandler(h)
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_log_skips_formatting_of_disabled_levels(monkeypatch, test_logger):
+    logger, handler = test_logger
+    calls = []
+    format_log = nba_db.logger.format_log
+    monkeypatch.setattr(
+        nba_db.logger,
+        "format_log",
+        lambda *args, **kwargs: calls.append(args[2]) or format_log(*args, **kwargs),
+    )
+
+    @log(logger, log_level_start=logging.DEBUG, log_level_end=logging.DEBUG)
+    def double(x):
+        return 2 * x
+
+    logger.setLevel(logging.INFO)
+    assert double(2) == 4
+    assert calls == [] and handler.records == []
+    logger.setLevel(logging.DEBUG)
+    assert double(3) == 6
+    assert calls == ["start", "end"]
+    assert "x = 3" in handler.records[0].getMessage()
+
+
+def test_log_sampled(test_logger):
+    logger, handler = test_logger
+    reset_sampling()
+    logged = [
+        log_sampled(logger, logging.WARNING, "game", "game %s", i, first=2, every=3)
+        for i in range(10)
+    ]
+    assert logged == [True, True, False, False, True, False, False, True, False, False]
+    messages = [record.getMessage() for record in handler.records]
+    assert messages[:2] == ["game 0", "game 1"]
+    assert messages[-1] == "game 7 (8 occurrences so far)"
+    assert not log_sampled(logger, logging.NOTSET, "disabled", "never")
+
+
+def test_queue_logging(test_logger):
+    logger, handler = test_logger
+    listener = start_queue_logging("nba_db_test")
+    assert handler not in logger.handlers and handler in listener.handlers
+    logger.info("queued %s", "record")
+    stop_queue_logging(listener, "nba_db_test")
+    assert handler in logger.handlers
+    assert not any(isinstance(h, QueueHandler) for h in logger.handlers)
+    assert [record.getMessage() for record in handler.records] == ["queued record"]
+
+
+@pytest.mark.parametrize("method", ["fork", "spawn"])
+def test_worker_logging(test_logger, method):
+    logger, handler = test_logger
+    context = multiprocessing.get_context(method)
+    with worker_logging("nba_db_test", context) as (initializer, initargs):
+        with ProcessPoolExecutor(
+            2, mp_context=context, initializer=initializer, initargs=initargs
+        ) as pool:
+            assert list(pool.map(log_in_worker, range(3))) == [0, 1, 2]
+    messages = sorted(record.getMessage() for record in handler.records)
+    assert messages == ["worker 0", "worker 1", "worker 2"]
@@ -0,0 +1,110 @@
+"""test_metrics.py -- Tests for the metrics module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+from nba_api.stats.endpoints.playbyplayv2 import PlayByPlayV2
+
+import nba_db.fetch
+from nba_db.fetch import request
+from nba_db.metrics import Histogram, MetricsRegistry, set_registry
+from nba_db.retry import RetryPolicy
+from nba_db.schema import write_table
+from test_fetch import FakeSession
+
+
+# -- Fixtures -------------------------------------------------------------------------
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    set_registry(registry)
+    yield registry
+    set_registry(MetricsRegistry())
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_histogram_quantiles():
+    histogram = Histogram((1.0, 2.0, 4.0))
+    for value in [0.5] * 50 + [1.5] * 40 + [3.0] * 9 + [10.0]:
+        histogram.observe(value)
+    assert histogram.counts == [50, 40, 9, 1]
+    assert histogram.quantile(0.5) == 1.0
+    assert 1.0 < histogram.quantile(0.9) <= 2.0
+    assert histogram.quantile(1.0) == 10.0
+    assert Histogram((1.0,)).quantile(0.5) is None
+
+
+def test_registry_renders_prometheus_text(registry):
+    registry.inc(
+        "nba_db_request_retries_total", endpoint="playbyplayv2", error="http_429"
+    )
+    registry.inc(
+        "nba_db_request_retries_total", endpoint="playbyplayv2", error="http_429"
+    )
+    registry.observe("nba_db_write_rows", 250, table='odd"name')
+    text = registry.to_prometheus()
+    assert "# TYPE nba_db_request_retries_total counter" in text
+    assert (
+        'nba_db_request_retries_total{endpoint="playbyplayv2",error="http_429"} 2'
+        in text
+    )
+    assert 'nba_db_write_rows_bucket{table="odd\\"name",le="100"} 0' in text
+    assert 'nba_db_write_rows_bucket{table="odd\\"name",le="+Inf"} 1' in text
+    assert 'nba_db_write_rows_count{table="odd\\"name"} 1' in text
+    assert "nba_db_cache_hits_total" not in text
+    with pytest.raises(KeyError):
+        registry.inc("nba_db_unknown_total")
+
+
+def test_request_records_attempts(monkeypatch, registry):
+    payload = {
+        "resultSets": [
+            {"name": "PlayByPlay", "headers": ["GAME_ID"], "rowSet": [["1"]]},
+            {
+                "name": "AvailableVideo",
+                "headers": ["VIDEO_AVAILABLE_FLAG"],
+                "rowSet": [[1]],
+            },
+        ]
+    }
+    monkeypatch.setattr(
+        nba_db.fetch, "_session", FakeSession(payload, status_codes=[429, 503])
+    )
+    monkeypatch.setattr(nba_db.fetch, "_retry_policy", RetryPolicy(base_delay=0))
+    request(PlayByPlayV2, proxy="10.0.0.1:8080", game_id="0022200001")
+    retries = {
+        error: registry.get(
+            "nba_db_request_retries_total", endpoint="playbyplayv2", error=error
+        )
+        for error in ["http_429", "http_503"]
+    }
+    assert retries == {"http_429": 1, "http_503": 1}
+    ok = registry.get(
+        "nba_db_request_duration_seconds", endpoint="playbyplayv2", outcome="ok"
+    )
+    assert ok.count == 1
+    assert (
+        registry.get(
+            "nba_db_proxy_requests_total", proxy="10.0.0.1:8080", outcome="http_429"
+        )
+        == 1
+    )
+
+
+def test_export_writes_text_file_and_summary(tmp_path, registry):
+    conn = sqlite3.connect(":memory:")
+    write_table(conn, "scratch", pd.DataFrame({"a": range(3)}))
+    paths = registry.export("daily", str(tmp_path))
+    assert [p.rsplit("/", 1)[-1][:6] for p in paths] == ["daily.", "daily-"]
+    with open(paths[0]) as f:
+        assert 'nba_db_rows_written_total{table="scratch"} 3' in f.read()
+    with open(paths[1]) as f:
+        summary = json.load(f)
+    assert summary["run"] == "daily"
+    [write] = summary["metrics"]["nba_db_write_duration_seconds"]
+    assert write["labels"] == {"table": "scratch"} and write["count"] == 1
+    [duration] = summary["metrics"]["nba_db_run_duration_seconds"]
+    assert duration["value"] >= 0
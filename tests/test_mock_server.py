@@ -0,0 +1,131 @@
+"""test_mock_server.py -- Tests for the mock_server module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import random
+
+import pytest
+from nba_api.stats.endpoints.boxscoresummaryv2 import BoxScoreSummaryV2
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+import nba_db.fetch
+from nba_db.fetch import request
+from nba_db.landing import LandingStore, read_shard
+from nba_db.mock_server import LatencyModel, MockStatsServer, measure
+from nba_db.retry import RateLimiter, RetryableResponseError, RetryPolicy
+from nba_db.utils import check_proxy
+from test_extract import make_box_score
+
+
+# -- Fixtures -------------------------------------------------------------------------
+@pytest.fixture
+def landing_dir(tmp_path):
+    store = LandingStore(str(tmp_path / "landing"), compression="gzip")
+    for game_id in ["0022300061", "0022300062"]:
+        endpoint = make_box_score(game_id)
+        store.put(endpoint.endpoint, endpoint.parameters, endpoint.get_response())
+    return store.root
+
+
+@pytest.fixture(autouse=True)
+def fast_requests(monkeypatch):
+    monkeypatch.setattr(nba_db.fetch, "_rate_limiter", RateLimiter(1000, 1000))
+    monkeypatch.setattr(
+        nba_db.fetch, "_retry_policy", RetryPolicy(max_attempts=2, base_delay=0)
+    )
+
+
+def use(monkeypatch, server):
+    monkeypatch.setattr(nba_db.fetch, "_base_url", server.base_url)
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_mock_server_serves_landed_responses(monkeypatch, landing_dir):
+    with MockStatsServer(landing_dir) as server:
+        use(monkeypatch, server)
+        game_summary = request(BoxScoreSummaryV2, game_id="0022300062").game_summary
+        assert game_summary.get_dict()["data"][0][2] == "0022300062"
+        with pytest.raises(ValueError):
+            request(BoxScoreSummaryV2, game_id="0022300099")
+        stats = server.stats().set_index("endpoint")
+    assert stats.loc["boxscoresummaryv2", "ok"] == 1
+    assert stats.loc["boxscoresummaryv2", "missing"] == 1
+
+
+def test_mock_server_injects_faults(monkeypatch, landing_dir):
+    with MockStatsServer(landing_dir, throttle_rate=1.0, retry_after=0) as server:
+        use(monkeypatch, server)
+        with pytest.raises(RetryableResponseError) as exc:
+            request(BoxScoreSummaryV2, game_id="0022300062")
+        assert exc.value.status_code == 429
+        server.throttle_rate, server.error_rate = 0.0, 1.0
+        with pytest.raises(RetryableResponseError) as exc:
+            request(BoxScoreSummaryV2, game_id="0022300062")
+        assert exc.value.status_code >= 500
+        stats = server.stats().set_index("endpoint")
+    assert stats.loc["boxscoresummaryv2", "throttled"] == 2
+    assert stats.loc["boxscoresummaryv2", "error"] == 2
+
+
+def test_mock_server_dead_proxies(monkeypatch, landing_dir):
+    with MockStatsServer(
+        landing_dir,
+        proxies=1,
+        dead_proxies=3,
+        dead_proxy_modes=["refuse", "garbage", "hang"],
+        seed=0,
+    ) as server:
+        use(monkeypatch, server)
+        assert len(server.proxy_list) == 4
+        modes = {
+            f"{server.host}:{s.server_address[1]}": s.mode for s in server._servers
+        }
+        by_mode = {modes.get(proxy, "refuse"): proxy for proxy in server.proxy_list}
+        assert request(
+            BoxScoreSummaryV2, proxy=by_mode["proxy"], game_id="0022300061"
+        ).game_summary.get_dict()["data"]
+        # blocking proxies pass proxy checks but not requests
+        assert check_proxy(by_mode["garbage"]) == by_mode["garbage"]
+        with pytest.raises(RetryableResponseError):
+            request(BoxScoreSummaryV2, proxy=by_mode["garbage"], game_id="0022300061")
+        with pytest.raises(RequestsConnectionError):
+            request(BoxScoreSummaryV2, proxy=by_mode["refuse"], game_id="0022300061")
+        assert check_proxy(by_mode["hang"]) is None
+
+
+def test_mock_server_records_missing_responses(monkeypatch, landing_dir, tmp_path):
+    with MockStatsServer(landing_dir) as upstream:
+        recorder = MockStatsServer(
+            str(tmp_path / "recorded"), record=True, upstream=upstream.base_url
+        )
+        with recorder:
+            use(monkeypatch, recorder)
+            request(BoxScoreSummaryV2, game_id="0022300061")
+            request(BoxScoreSummaryV2, game_id="0022300061")
+            assert recorder.stats()[["recorded", "ok"]].values.tolist() == [[1, 1]]
+    [(_, path)] = LandingStore(str(tmp_path / "recorded")).shards()
+    [record] = list(read_shard(path))
+    assert record["params"]["GameID"] == "0022300061"
+
+
+def test_measure(monkeypatch, landing_dir):
+    with MockStatsServer(landing_dir, error_rate=0.5, seed=1) as server:
+        use(monkeypatch, server)
+        summary = measure(
+            lambda game_id: request(BoxScoreSummaryV2, game_id=game_id),
+            ["0022300061", "0022300062"] * 10,
+            concurrency=4,
+        )
+    assert summary["requests"] == 20
+    assert 0 < summary["failures"] < 20
+    assert summary["p50"] <= summary["p99"]
+
+
+def test_latency_model():
+    rng = random.Random(0)
+    model = LatencyModel.parse("lognormal:0.2,0.5,1")
+    delays = [model.sample(rng) for _ in range(1000)]
+    assert max(delays) <= 1
+    assert 0.15 < sorted(delays)[500] < 0.25
+    assert LatencyModel.parse("0.1").sample(rng) == 0.1
+    with pytest.raises(ValueError):
+        LatencyModel.parse("pareto:1")
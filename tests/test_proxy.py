@@ -0,0 +1,83 @@
+"""test_proxy.py -- Tests for the proxy module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import threading
+import time
+from collections import Counter
+
+from nba_db.proxy import (
+    FAILURE_THRESHOLD,
+    ProxyPool,
+    load_known_proxies,
+    save_known_proxies,
+)
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_acquire_prefers_healthy_fast_proxies():
+    pool = ProxyPool(["1.1.1.1:80", "2.2.2.2:80", "3.3.3.3:80"])
+    for _ in range(10):
+        pool.report("1.1.1.1:80", True, 0.1)
+        pool.report("2.2.2.2:80", True, 2.0)
+    picks = Counter(pool.acquire() for _ in range(300))
+    assert picks["1.1.1.1:80"] > picks["2.2.2.2:80"]
+    assert picks["1.1.1.1:80"] > picks["3.3.3.3:80"]
+
+
+def test_failing_proxy_is_quarantined_with_backoff():
+    pool = ProxyPool(["1.1.1.1:80", "2.2.2.2:80"], base_backoff=60)
+    for _ in range(FAILURE_THRESHOLD):
+        pool.report("2.2.2.2:80", False, 3.0)
+    assert {pool.acquire() for _ in range(50)} == {"1.1.1.1:80"}
+    first = pool.stats().set_index("proxy").loc["2.2.2.2:80", "quarantined_for"]
+    pool.report("2.2.2.2:80", False, 3.0)
+    second = pool.stats().set_index("proxy").loc["2.2.2.2:80", "quarantined_for"]
+    assert second > first
+    pool.report("2.2.2.2:80", True, 0.2)
+    assert pool.stats().set_index("proxy").loc["2.2.2.2:80", "quarantined_for"] == 0
+
+
+def test_stats_and_empty_pool():
+    pool = ProxyPool()
+    assert pool.acquire() is None
+    pool.add("1.1.1.1:80")
+    pool.add("1.1.1.1:80")
+    assert len(pool) == 1
+    assert list(pool.stats().columns[:3]) == ["proxy", "requests", "successes"]
+
+
+def test_discovery_fills_pool_while_in_use():
+    release = threading.Event()
+
+    def discovered():
+        yield "1.1.1.1:80"
+        yield "2.2.2.2:80"
+        release.wait(5)
+        yield "3.3.3.3:80"
+
+    pool = ProxyPool()
+    pool.start_discovery(discovered())
+    # the pool serves the first proxies while discovery is still running
+    assert pool.wait(2, timeout=5) == 2
+    assert pool.acquire() in {"1.1.1.1:80", "2.2.2.2:80"}
+    release.set()
+    assert pool.wait(10, timeout=5) == 3
+    assert set(pool.known_good()) == {"1.1.1.1:80", "2.2.2.2:80", "3.3.3.3:80"}
+
+
+def test_known_proxies_roundtrip(tmp_path):
+    path = str(tmp_path / "proxies.json")
+    assert load_known_proxies(path) == []
+    now = time.time()
+    with open(path, "w") as f:
+        json.dump({"9.9.9.9:80": now - 10, "8.8.8.8:80": now - 10**6}, f)
+    pool = ProxyPool(["1.1.1.1:80", "2.2.2.2:80", "3.3.3.3:80"])
+    pool.report("1.1.1.1:80", True, 0.1)
+    pool.report("2.2.2.2:80", True, 0.1)
+    for _ in range(FAILURE_THRESHOLD):
+        pool.report("2.2.2.2:80", False, 3.0)
+    assert save_known_proxies(pool, path, max_age=3600) == 2
+    # most recently working first, stale and failing proxies are dropped
+    assert load_known_proxies(path, max_age=3600) == ["1.1.1.1:80", "9.9.9.9:80"]
+    assert load_known_proxies(path, max_age=1) == ["1.1.1.1:80"]
@@ -0,0 +1,87 @@
+"""test_replay.py -- Tests for the replay module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from nba_db.extract import BOX_SCORE_TABLES
+from nba_db.landing import LandingStore
+from nba_db.replay import replay_tables
+from test_extract import make_box_score
+
+
+# -- Helpers --------------------------------------------------------------------------
+def land_box_score(store, game_id, **teams):
+    endpoint = make_box_score(game_id, **teams)
+    store.put(endpoint.endpoint, endpoint.parameters, endpoint.get_response())
+
+
+def read_tables(conn):
+    return {
+        table: pd.read_sql(f'SELECT * FROM "{table}" ORDER BY rowid', conn)
+        for table in BOX_SCORE_TABLES
+    }
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_replay_rebuilds_box_score_tables(tmp_path):
+    store = LandingStore(str(tmp_path / "landing"), compression="gzip")
+    for game_id in ["0022200010", "0022300061", "0022300062"]:
+        land_box_score(store, game_id)
+    # a newer response of the same request replaces the older one
+    land_box_score(store, "0022300062", home="1610612747", away="1610612744")
+    conn = sqlite3.connect(str(tmp_path / "nba.sqlite"), check_same_thread=False)
+    rows = replay_tables(
+        conn, BOX_SCORE_TABLES, landing_dir=str(tmp_path / "landing"), workers=2
+    )
+    assert rows == {
+        "game_summary": 3,
+        "other_stats": 3,
+        "officials": 6,
+        "inactive_players": 3,
+        "game_info": 3,
+        "line_score": 3,
+    }
+    line_score = pd.read_sql("SELECT * FROM line_score ORDER BY game_id", conn)
+    assert line_score["team_id_home"].tolist() == [
+        "1610612744",
+        "1610612744",
+        "1610612747",
+    ]
+    # replaying the same landing zone produces the same tables
+    before = read_tables(conn)
+    replay_tables(conn, BOX_SCORE_TABLES, landing_dir=str(tmp_path / "landing"))
+    after = read_tables(conn)
+    for table in BOX_SCORE_TABLES:
+        pd.testing.assert_frame_equal(before[table], after[table])
+    conn.close()
+
+
+def test_replay_skips_invalid_responses(tmp_path):
+    store = LandingStore(str(tmp_path), compression="gzip")
+    land_box_score(store, "0022300061")
+    store.put("boxscoresummaryv2", {"GameID": "0022300063"}, json.dumps({}))
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    rows = replay_tables(conn, ["game_summary"], landing_dir=str(tmp_path))
+    assert rows == {"game_summary": 1}
+    with pytest.raises(ValueError):
+        replay_tables(conn, ["player"], landing_dir=str(tmp_path))
+    conn.close()
+
+
+def test_replay_keeps_rows_missing_from_the_landing_zone(tmp_path):
+    store = LandingStore(str(tmp_path / "landing"), compression="gzip")
+    land_box_score(store, "0022300061")
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    # a game whose response was served from the cache and never landed
+    replay_tables(conn, ["game_summary"], landing_dir=str(tmp_path / "landing"))
+    conn.execute("UPDATE game_summary SET game_id = '0022300099'")
+    with pytest.raises(ValueError):
+        replay_tables(conn, ["game_summary"], landing_dir=str(tmp_path / "empty"))
+    replay_tables(conn, ["game_summary"], landing_dir=str(tmp_path / "landing"))
+    game_ids = pd.read_sql("SELECT game_id FROM game_summary ORDER BY game_id", conn)
+    assert game_ids["game_id"].tolist() == ["0022300061", "0022300099"]
+    conn.close()
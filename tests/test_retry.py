@@ -0,0 +1,43 @@
+"""test_retry.py -- Tests for the retry module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import time
+
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from nba_db.retry import RateLimiter, RetryableResponseError, RetryPolicy, TokenBucket
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_token_bucket_allows_burst_then_throttles():
+    bucket = TokenBucket(rate=50, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.08
+
+
+def test_rate_limiter_keys_are_independent():
+    limiter = RateLimiter(rate=1, burst=1)
+    start = time.monotonic()
+    for key in ["a:1", "b:2", "c:3"]:
+        limiter.acquire(key)
+    assert time.monotonic() - start < 0.05
+
+
+def test_retry_policy_classification():
+    policy = RetryPolicy()
+    assert policy.is_retryable(RetryableResponseError("throttled", status_code=429))
+    assert policy.is_retryable(RequestsConnectionError())
+    assert not policy.is_retryable(ValueError("invalid response"))
+
+
+def test_retry_policy_delay():
+    policy = RetryPolicy(base_delay=1, max_delay=4)
+    for attempt in range(1, 10):
+        assert 0 <= policy.delay(attempt) <= min(4, 2 ** (attempt - 1))
+    exc = RetryableResponseError("throttled", status_code=429, retry_after=2)
+    assert policy.delay(1, exc) == 2
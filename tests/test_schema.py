@@ -0,0 +1,171 @@
+"""test_schema.py -- Tests for the schema module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import sqlite3
+import warnings
+
+import pandas as pd
+
+from nba_db.data import PlayByPlaySchema
+from nba_db.schema import TABLES, bulk_load, migrate, write_table
+
+
+# -- Helpers --------------------------------------------------------------------------
+def primary_key(conn, table):
+    info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5] > 0]
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_migrate_adds_keys_and_drops_duplicates():
+    conn = sqlite3.connect(":memory:")
+    pd.DataFrame(
+        {
+            "game_id": ["1", "1", "2"],
+            "eventnum": [1, 1, 1],
+            "legacy": ["a", "a", "b"],
+        }
+    ).to_sql("play_by_play", conn, index=False)
+    assert "play_by_play" in migrate(conn)
+    assert primary_key(conn, "play_by_play_event") == ["game_id", "eventnum"]
+    df = pd.read_sql("SELECT game_id, legacy FROM play_by_play_event", conn)
+    assert df.to_dict("list") == {"game_id": ["1", "2"], "legacy": ["a", "b"]}
+    assert migrate(conn) == []
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT MAX(game_date) FROM game").fetchall()
+    assert "ix_game_game_date" in plan[0][-1]
+    conn.close()
+
+
+def test_write_table_keeps_definition():
+    conn = sqlite3.connect(":memory:")
+    players = pd.DataFrame(
+        {
+            "id": ["1", "2"],
+            "full_name": ["a b", "c d"],
+            "first_name": ["a", "c"],
+            "last_name": ["b", "d"],
+            "is_active": [True, False],
+        }
+    )
+    write_table(conn, "player", players, if_exists="replace")
+    write_table(conn, "player", players, if_exists="append")
+    write_table(conn, "player", players.iloc[:1], if_exists="replace")
+    assert primary_key(conn, "player") == list(TABLES["player"].primary_key)
+    assert pd.read_sql("SELECT id FROM player", conn)["id"].tolist() == ["1"]
+    conn.close()
+
+
+def test_write_table_upserts_on_primary_key():
+    conn = sqlite3.connect(":memory:")
+    events = pd.DataFrame(
+        {"game_id": ["1", "1"], "eventnum": [1, 2], "score": [None, "2 - 0"]}
+    )
+    write_table(conn, "play_by_play", events, batch_size=1)
+    events["score"] = ["0 - 0", "2 - 0"]
+    write_table(conn, "play_by_play", events, batch_size=1)
+    df = pd.read_sql("SELECT game_id, eventnum, score FROM play_by_play", conn)
+    assert df.to_dict("list") == {
+        "game_id": ["1", "1"],
+        "eventnum": [1, 2],
+        "score": ["0 - 0", "2 - 0"],
+    }
+    conn.close()
+
+
+def test_play_by_play_is_stored_normalized():
+    conn = sqlite3.connect(":memory:")
+    wide = pd.DataFrame(
+        {
+            "game_id": ["1", "1", "1"],
+            "eventnum": [1, 2, 3],
+            "player1_id": ["201939", "1610612744", None],
+            "player1_name": ["Stephen Curry", None, None],
+            # team events carry the team's name but no team id
+            "player1_team_id": ["1610612744", None, None],
+            "player1_team_city": ["Golden State", "Golden State", None],
+            "player1_team_nickname": ["Warriors", "Warriors", None],
+            "player1_team_abbreviation": ["GSW", "GSW", None],
+        }
+    )
+    write_table(conn, "play_by_play", wide)
+    write_table(conn, "play_by_play", wide)
+    assert conn.execute("SELECT COUNT(*) FROM play_by_play_team").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM play_by_play_player").fetchone()[0] == 1
+    events = pd.read_sql("SELECT * FROM play_by_play_event", conn)
+    assert "player1_name" not in events.columns
+    assert events["player1_team_key"].isna().tolist() == [False, False, True]
+    df = pd.read_sql(f"SELECT {', '.join(wide.columns)} FROM play_by_play", conn)
+    pd.testing.assert_frame_equal(df, wide)
+    view = pd.read_sql("SELECT * FROM play_by_play", conn)
+    assert view.columns.tolist() == list(PlayByPlaySchema.to_schema().columns)
+    conn.close()
+
+
+def test_play_by_play_without_teams_has_no_team_keys():
+    conn = sqlite3.connect(":memory:")
+    wide = pd.DataFrame(
+        {
+            "game_id": ["1", "1"],
+            "eventnum": [1, 2],
+            # compact frames hold categoricals, without categories if all null
+            "player1_team_city": pd.Categorical(["Golden State", None]),
+            "player2_team_city": pd.Categorical([None, None]),
+        }
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        write_table(conn, "play_by_play", wide)
+        # no team on any event
+        write_table(conn, "play_by_play", wide.drop(columns="player1_team_city"))
+    assert conn.execute("SELECT COUNT(*) FROM play_by_play_team").fetchone()[0] == 1
+    events = pd.read_sql("SELECT * FROM play_by_play_event", conn)
+    assert events["player1_team_key"].isna().tolist() == [False, True]
+    assert events["player2_team_key"].isna().all()
+    conn.close()
+
+
+def test_migrate_normalizes_wide_play_by_play():
+    conn = sqlite3.connect(":memory:")
+    wide = pd.DataFrame(
+        {
+            "game_id": ["1", "1", "2"],
+            "eventnum": [1, 2, 1],
+            "player2_id": ["201939", "2544", "201939"],
+            "player2_name": ["Stephen Curry", "LeBron James", "Stephen Curry"],
+            "player2_team_id": ["1610612744", "1610612747", "1610612744"],
+            "player2_team_city": ["Golden State", "Los Angeles", "Golden State"],
+            "player2_team_nickname": ["Warriors", "Lakers", "Warriors"],
+            "player2_team_abbreviation": ["GSW", "LAL", "GSW"],
+        }
+    )
+    wide.to_sql("play_by_play", conn, index=False)
+    assert migrate(conn) == ["play_by_play"]
+    assert conn.execute("SELECT COUNT(*) FROM play_by_play_team").fetchone()[0] == 2
+    df = pd.read_sql(f"SELECT {', '.join(wide.columns)} FROM play_by_play", conn)
+    pd.testing.assert_frame_equal(df, wide)
+    conn.close()
+
+
+def test_bulk_load_defers_indexes_and_restores_safe_settings(tmp_path):
+    conn = sqlite3.connect(tmp_path / "nba.sqlite")
+    migrate(conn)
+
+    def indexes():
+        return {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'game' AND name LIKE 'ix_%'"
+            )
+        }
+
+    assert "ix_game_game_date" in indexes()
+    with bulk_load(conn):
+        with bulk_load(conn):
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+        assert indexes() == set()
+    assert "ix_game_game_date" in indexes()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert not (tmp_path / "nba.sqlite-wal").exists()
+    conn.close()
@@ -0,0 +1,90 @@
+"""test_trace.py -- Tests for the trace module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from nba_db.ledger import ensure_ledger, run_batches
+from nba_db.trace import Tracer, get_tracer, set_tracer, span, traced
+
+
+# -- Fixtures -------------------------------------------------------------------------
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    set_tracer(tracer)
+    yield tracer
+    set_tracer(Tracer(enabled=False))
+
+
+def spans(tracer):
+    return [event for event in tracer.events() if event["ph"] == "X"]
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_spans_nest_per_thread(tracer):
+    @traced("extract")
+    def extractor():
+        with span("validate", "validate", games=2) as args:
+            args["rows"] = 10
+
+    with span("stage", "stage"):
+        extractor()
+        thread = threading.Thread(target=extractor, name="worker")
+        thread.start()
+        thread.join()
+    events = {(e["name"], e["tid"]): e for e in spans(tracer)}
+    main, worker = threading.main_thread().ident, thread.ident
+    outer, inner = events["stage", main], events["extractor", main]
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert events["validate", worker]["args"] == {"games": 2, "rows": 10}
+    names = {
+        e["tid"]: e["args"]["name"]
+        for e in tracer.events()
+        if e["name"] == "thread_name"
+    }
+    assert names[worker] == "worker"
+
+
+def test_span_records_errors(tracer):
+    with pytest.raises(KeyError):
+        with span("lookup"):
+            raise KeyError("game_id")
+    [event] = spans(tracer)
+    assert event["args"]["error"] == "KeyError('game_id')"
+
+
+def test_disabled_and_full_tracers():
+    disabled = Tracer(enabled=False)
+    with disabled.span("stage"):
+        pass
+    assert spans(disabled) == [] and disabled.export("daily") is None
+    full = Tracer(max_events=2)
+    for _ in range(5):
+        with full.span("game"):
+            pass
+    assert len(spans(full)) == 2 and full.dropped == 3
+    assert get_tracer().enabled is False
+
+
+def test_export_writes_chrome_trace(tmp_path, tracer):
+    conn = sqlite3.connect(":memory:")
+    ensure_ledger(conn)
+    run_batches(conn, "play_by_play", range(5), lambda batch: batch, batch_size=2)
+    path = tracer.export("daily", str(tmp_path))
+    with open(path) as f:
+        trace = json.load(f)
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert [(e["name"], e["cat"]) for e in events] == [
+        ("daily", "run"),
+        ("play_by_play", "stage"),
+        ("play_by_play batch", "batch"),
+        ("play_by_play batch", "batch"),
+        ("play_by_play batch", "batch"),
+    ]
+    assert [e["args"]["units"] for e in events[2:]] == [2, 2, 1]
+    assert trace["otherData"]["run"] == "daily"
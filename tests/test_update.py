@@ -0,0 +1,38 @@
+"""test_update.py -- Tests for the update module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+import nba_db.cache
+import nba_db.fetch
+import nba_db.landing
+import nba_db.metrics
+import nba_db.trace
+from nba_db.update import update_run
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_update_run_tears_down_failed_runs(monkeypatch, tmp_path):
+    monkeypatch.setattr(nba_db.cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(nba_db.landing, "LANDING_DIR", str(tmp_path / "landing"))
+    monkeypatch.setattr(nba_db.metrics, "METRICS_DIR", str(tmp_path / "metrics"))
+    monkeypatch.setattr(nba_db.trace, "TRACE_DIR", str(tmp_path / "traces"))
+    closed = []
+    with pytest.raises(RuntimeError):
+        with update_run("daily") as stack:
+            stack.callback(closed.append, "conn")
+            assert nba_db.fetch._cache is not None
+            raise RuntimeError("proxy pool exhausted")
+    assert closed == ["conn"]
+    assert nba_db.fetch._cache is None and nba_db.fetch._landing is None
+    assert [p.suffix for p in sorted((tmp_path / "metrics").iterdir())] == [
+        ".json",
+        ".prom",
+    ]
+    [trace] = (tmp_path / "traces").iterdir()
+    assert trace.name.startswith("daily-")
+    handlers = logging.getLogger("nba_db_logger").handlers
+    assert not any(isinstance(h, QueueHandler) for h in handlers)
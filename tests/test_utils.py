@@ -2,15 +2,47 @@
 """
 # -- Imports --------------------------------------------------------------------------
 import os
+import threading
 from sqlite3 import Connection
 
 from hypothesis import example, given
 from hypothesis import strategies as st
 from hypothesis.extra.pandas import column, data_frames
-from nba_db.utils import download_db, dump_db, get_db_conn, get_proxies
+
+import nba_db.utils
+from nba_db.utils import (
+    discover_proxies,
+    download_db,
+    dump_db,
+    get_db_conn,
+    get_proxies,
+)
 
 
 # -- Tests ---------------------------------------------------------------------------
+def test_discover_proxies_stops_at_target(monkeypatch):
+    lock = threading.Lock()
+    checked = []
+
+    def check_proxy(proxy):
+        with lock:
+            checked.append(proxy)
+        return proxy if int(proxy.split(".")[0]) % 2 == 0 else None
+
+    lists = [f"{i}.0.0.1:80" for i in range(1000)]
+    monkeypatch.setattr(nba_db.utils, "check_proxy", check_proxy)
+    monkeypatch.setattr(nba_db.utils, "download_proxy_lists", lambda: lists)
+    # known proxies are checked first and enough of them skip the public lists
+    found = list(discover_proxies(2, known=["2.0.0.1:80", "4.0.0.1:80"]))
+    assert sorted(found) == ["2.0.0.1:80", "4.0.0.1:80"]
+    assert sorted(checked) == ["2.0.0.1:80", "4.0.0.1:80"]
+    checked.clear()
+    found = list(discover_proxies(10, known=["2.0.0.1:80"], concurrency=4))
+    assert len(found) == 10 and found.count("2.0.0.1:80") == 1
+    # outstanding checks are cancelled once the target is reached
+    assert len(checked) < 100
+
+
 def test_get_proxies():
     proxies = get_proxies()
     assert isinstance(proxies, list)
@@ -0,0 +1,67 @@
+"""test_validate.py -- Tests for the validate module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import pandas as pd
+import pytest
+from pandera.errors import SchemaErrors
+
+from nba_db.data import PlayByPlaySchema, PlayerSchema
+from nba_db.validate import compile_schema, set_validation_level, validate
+
+
+# -- Helpers --------------------------------------------------------------------------
+def play_by_play(n_events=20):
+    df = pd.DataFrame(
+        {column: [None] * n_events for column in PlayByPlaySchema.to_schema().columns}
+    )
+    df["game_id"] = "0022300001"
+    df["eventnum"] = [str(i) for i in range(n_events)]
+    df["eventmsgtype"] = 1
+    df["eventmsgactiontype"] = 1.0
+    df["period"] = 1
+    df["wctimestring"] = "7:00 PM"
+    df["pctimestring"] = "12:00"
+    df["person1type"] = 4
+    df["player1_id"] = 201939
+    df["video_available_flag"] = 1
+    return df
+
+
+# -- Tests ---------------------------------------------------------------------------
+@pytest.mark.parametrize("level", ["fast", "sampled"])
+def test_cast_plan_matches_pandera(level):
+    df = play_by_play()
+    expected = PlayByPlaySchema.validate(df.copy(), lazy=True)
+    result = validate(PlayByPlaySchema, df.copy(), level=level, compact=False)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_cast_plan_checks_uncoerced_columns():
+    plan = compile_schema(PlayerSchema)
+    assert plan.strings == ["id"]
+    assert "full_name" in plan.checked
+    df = pd.DataFrame(
+        {
+            "id": [1],
+            "full_name": ["a b"],
+            "first_name": ["a"],
+            "last_name": ["b"],
+            "is_active": [True],
+        }
+    )
+    assert validate(PlayerSchema, df, level="fast")["id"].tolist() == ["1"]
+
+
+def test_invalid_frames_raise_pandera_errors():
+    df = play_by_play()
+    df["period"] = df["period"].astype(object)
+    df.loc[3, "period"] = "not a period"
+    for level in ["full", "sampled", "fast"]:
+        with pytest.raises(SchemaErrors):
+            validate(PlayByPlaySchema, df, level=level)
+    assert validate(PlayByPlaySchema, df, level="off") is df
+
+
+def test_set_validation_level():
+    with pytest.raises(ValueError):
+        set_validation_level("some")
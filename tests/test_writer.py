@@ -0,0 +1,56 @@
+"""test_writer.py -- Tests for the writer module.
+"""
+# -- Imports --------------------------------------------------------------------------
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import nba_db.writer
+from nba_db.writer import DBWriter
+
+
+# -- Helpers --------------------------------------------------------------------------
+def events(game_id, n=3):
+    return pd.DataFrame({"game_id": [game_id] * n, "eventnum": range(n)})
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM play_by_play").fetchone()[0]
+
+
+# -- Tests ---------------------------------------------------------------------------
+def test_writer_coalesces_batches(monkeypatch):
+    calls = []
+    write_table = nba_db.writer.write_table
+
+    def spy(conn, table, df):
+        calls.append(len(df))
+        write_table(conn, table, df)
+
+    monkeypatch.setattr(nba_db.writer, "write_table", spy)
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    with DBWriter(conn, flush_rows=7, commit_interval=60) as writer:
+        for game_id in ["1", "2", "3", "4"]:
+            writer.put("play_by_play", events(game_id))
+        writer.put("play_by_play", None)
+    assert calls == [9, 3]
+    assert count(conn) == 12
+    assert writer.rows_written == {"play_by_play": 12}
+    conn.close()
+
+
+def test_writer_raises_errors_in_producer():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    with pytest.raises(KeyError):
+        with DBWriter(conn, flush_rows=1) as writer:
+            writer.put("play_by_play", pd.DataFrame({"eventnum": [1]}))
+    conn.close()
+
+
+def test_writer_falls_back_to_synchronous_writes():
+    conn = sqlite3.connect(":memory:")
+    with DBWriter(conn, flush_rows=1) as writer:
+        writer.put("play_by_play", events("1"))
+        assert count(conn) == 3
+    conn.close()